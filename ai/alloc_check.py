@@ -0,0 +1,258 @@
+import gc
+import random
+import sys
+import tracemalloc
+
+import numpy as np
+
+from config import Config
+from ai.pygame_env import DinoPygameEnv, Game, MS_PER_FRAME, dino_game, game_observation, render_profile
+from ai.expert import ScriptedExpert
+
+# Per-step allocation budgets of the hot path; alloc-check fails when a phase exceeds one.
+# bytes: mean tracemalloc high-water above the phase start (transient allocations per step)
+# retained: mean bytes still allocated after the phase, not counting the returned observation
+# blocks: mean change of sys.getallocatedblocks() over the phase: small objects created per step
+#   net of those freed. Catches steps that leave many small objects behind at few bytes each;
+#   CPython has no count of transient allocations, those show in the byte high-water mark.
+# collections: garbage collections per 1000 steps
+# The observation phases copy the whole game frame, so their byte budgets follow its size.
+ALLOC_BUDGETS = {
+    'update': {'bytes': 450, 'retained': 16, 'blocks': 1.0, 'collections': 1.0},
+    'draw': {'bytes': 450, 'retained': 64, 'blocks': 1.0, 'collections': 1.0},
+    'observation': {'bytes': 600_000, 'retained': 512, 'blocks': 4.0, 'collections': 3.0},
+    'game_step': {'bytes': 500, 'retained': 64, 'blocks': 1.0, 'collections': 1.0},
+    'env_step': {'bytes': 600_000, 'retained': 512, 'blocks': 4.0, 'collections': 3.0},
+}
+
+# Palette mode converts every new score text to 8 bits once (numpy temporaries),
+# but reads observations without the RGB frame
+INDEXED_ALLOC_BUDGETS = dict(ALLOC_BUDGETS, **{
+    'draw': {'bytes': 16_000, 'retained': 64, 'blocks': 1.0, 'collections': 1.0},
+    'observation': {'bytes': 300_000, 'retained': 512, 'blocks': 4.0, 'collections': 3.0},
+    'game_step': {'bytes': 16_000, 'retained': 64, 'blocks': 1.0, 'collections': 1.0},
+    'env_step': {'bytes': 300_000, 'retained': 512, 'blocks': 4.0, 'collections': 3.0},
+})
+
+# Functions measured one at a time in a separate pass, at the sites of past offenders
+# (a per-tick dict in Trex.update, CollisionBox objects per collision check, list rebuilds
+# in Horizon, font rendering every frame). Whole-phase high-water marks hide allocations
+# that are freed before the next one, so each site gets its own budget (per call).
+HOT_SPOTS = {
+    'trex.update': (dino_game.Trex, 'update'),
+    'collision': (dino_game, 'check_for_collision'),
+    'horizon.clouds': (dino_game.Horizon, 'update_clouds'),
+    'horizon.obstacles': (dino_game.Horizon, 'update_obstacles'),
+    'horizon.draw': (dino_game.Horizon, 'draw'),
+    'meter.draw': (dino_game.DistanceMeter, 'draw'),
+}
+HOT_SPOT_BUDGETS = {
+    'trex.update': {'bytes': 32, 'retained': 16, 'blocks': 0.5},
+    'collision': {'bytes': 48, 'retained': 16, 'blocks': 0.5},
+    'horizon.clouds': {'bytes': 96, 'retained': 16, 'blocks': 0.5},
+    'horizon.obstacles': {'bytes': 128, 'retained': 16, 'blocks': 0.5},
+    # Blit results; retained counts kwargs dicts parked on the interpreter free list
+    'horizon.draw': {'bytes': 512, 'retained': 192, 'blocks': 2.0},
+    'meter.draw': {'bytes': 200, 'retained': 32, 'blocks': 0.5},
+}
+INDEXED_HOT_SPOT_BUDGETS = dict(HOT_SPOT_BUDGETS, **{
+    'meter.draw': {'bytes': 16_000, 'retained': 32, 'blocks': 0.5},
+})
+
+class PhaseStats:
+    def __init__(self):
+        self.steps = 0
+        self.bytes = 0
+        self.max_bytes = 0
+        self.retained = 0
+        self.blocks = 0
+        self.collections = 0
+
+    def per_step(self):
+        steps = max(self.steps, 1)
+        return {
+            'bytes': self.bytes / steps,
+            'max_bytes': self.max_bytes,
+            'retained': self.retained / steps,
+            'blocks': self.blocks / steps,
+            'collections': self.collections * 1000 / steps,
+        }
+
+class AllocProbe:
+    """Counts traced bytes and garbage collections of measured calls, per phase name"""
+
+    def __init__(self):
+        self.stats = {}
+        self.collections = 0
+        self.overhead = 0  # Bytes allocated by measure() itself (the get_traced_memory result)
+        self.block_overhead = 0.0
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self.collections += 1
+
+    def start(self):
+        tracemalloc.start()
+        gc.callbacks.append(self._on_gc)
+        self.overhead = 0
+        self.block_overhead = 0.0
+        for _ in range(100):
+            self.measure('calibration', lambda: None)
+        calibration = self.stats.pop('calibration')
+        self.overhead = calibration.max_bytes
+        self.block_overhead = calibration.blocks / calibration.steps
+
+    def stop(self):
+        gc.callbacks.remove(self._on_gc)
+        tracemalloc.stop()
+
+    def measure(self, name, fn, *args, **kwargs):
+        collections = self.collections
+        blocks = sys.getallocatedblocks()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn(*args, **kwargs)
+        after, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks() - blocks
+
+        stats = self.stats.setdefault(name, PhaseStats())
+        stats.steps += 1
+        stats.bytes += peak - before - self.overhead
+        stats.max_bytes = max(stats.max_bytes, peak - before - self.overhead)
+        # The returned observation is the output of the step, not a leak
+        stats.retained += after - before - self.overhead - _array_bytes(result)
+        stats.blocks += blocks - self.block_overhead
+        stats.collections += self.collections - collections
+        return result
+
+def _array_bytes(result):
+    """Data bytes of numpy arrays in a call result (an observation or an env step tuple)"""
+    items = result if isinstance(result, tuple) else (result,)
+    return sum(item.nbytes for item in items if isinstance(item, np.ndarray))
+
+def _settle_gc():
+    # Measure from an empty young generation: otherwise whether a collection lands in the
+    # measured steps depends on what the process allocated before (e.g. other tests)
+    gc.collect()
+
+def _restart(game, rng):
+    game.seed(rng.getrandbits(32))
+    game.restart(rng.uniform(*Config.WARM_START_SPEED_RANGE))
+    game.step(1, present=False)
+
+def measure_game(probe, steps, warmup, seed):
+    """update / draw / observation phases of single game ticks, then whole Game.step calls"""
+    rng = random.Random(seed)
+    game = Game(human_mode=False, indexed=Config.INDEXED_RENDER, render_profile=render_profile())
+    expert = ScriptedExpert(Config.FRAME_SKIP)
+    _restart(game, rng)
+
+    action = 0
+    for tick in range(warmup + 2 * steps):
+        if tick == warmup:
+            _settle_gc()
+        if tick % Config.FRAME_SKIP == 0:
+            action = expert.act(game)
+        measured = tick >= warmup
+        if tick < warmup + steps:
+            # Same work as Game.step, one phase at a time
+            game.apply_action(action)
+            if game.playing and not game.crashed and not game.won:
+                if measured:
+                    probe.measure('update', game.update, MS_PER_FRAME)
+                else:
+                    game.update(MS_PER_FRAME)
+            if measured:
+                probe.measure('draw', game.draw, False)
+                probe.measure('observation', game_observation, game)
+            else:
+                game.draw(False)
+        else:
+            probe.measure('game_step', game.step, action, 1, False)
+        if game.crashed or game.won:
+            _restart(game, rng)
+
+def measure_hot_spots(probe, steps, warmup, seed):
+    """Game.step with every HOT_SPOTS function wrapped in its own measurement"""
+    originals = {name: getattr(owner, attr) for name, (owner, attr) in HOT_SPOTS.items()}
+
+    def wrap(name, original):
+        def measured(*args, **kwargs):
+            return probe.measure(name, original, *args, **kwargs)
+        return measured
+
+    rng = random.Random(seed)
+    game = Game(human_mode=False, indexed=Config.INDEXED_RENDER, render_profile=render_profile())
+    expert = ScriptedExpert(Config.FRAME_SKIP)
+    _restart(game, rng)
+    action = 0
+    try:
+        for tick in range(warmup + steps):
+            if tick == warmup:
+                _settle_gc()
+                for name, (owner, attr) in HOT_SPOTS.items():
+                    setattr(owner, attr, wrap(name, originals[name]))
+            if tick % Config.FRAME_SKIP == 0:
+                action = expert.act(game)
+            game.step(action, present=False)
+            if game.crashed or game.won:
+                _restart(game, rng)
+    finally:
+        for name, (owner, attr) in HOT_SPOTS.items():
+            setattr(owner, attr, originals[name])
+
+def measure_env(probe, steps, warmup, seed):
+    env = DinoPygameEnv()
+    expert = ScriptedExpert(env.frame_skip)
+    env.reset(seed=seed)
+    try:
+        for step in range(warmup + steps):
+            if step == warmup:
+                _settle_gc()
+            action = expert.act(env.game)
+            if step >= warmup:
+                _, _, terminated, truncated, _ = probe.measure('env_step', env.step, action)
+            else:
+                _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated or env.game.won:
+                env.reset()
+    finally:
+        env.close()
+
+def alloc_check(steps=2000, warmup=300, seed=0, budgets=None):
+    """
+    Measure allocations and garbage collections per step of the game and env hot path
+    against ALLOC_BUDGETS and HOT_SPOT_BUDGETS (the INDEXED_ variants in palette mode).
+    Returns (per-phase stats, list of exceeded budgets).
+    """
+    if budgets is None:
+        if Config.INDEXED_RENDER:
+            budgets = dict(INDEXED_ALLOC_BUDGETS, **INDEXED_HOT_SPOT_BUDGETS)
+        else:
+            budgets = dict(ALLOC_BUDGETS, **HOT_SPOT_BUDGETS)
+    probe = AllocProbe()
+    probe.start()
+    try:
+        measure_game(probe, steps, warmup, seed)
+        measure_hot_spots(probe, steps, warmup, seed)
+        measure_env(probe, steps // Config.FRAME_SKIP, warmup // Config.FRAME_SKIP, seed)
+    finally:
+        probe.stop()
+
+    results = {name: probe.stats[name].per_step() for name in budgets if name in probe.stats}
+    failures = []
+    print(f"{'phase':<18} {'bytes/step':>11} {'max bytes':>10} {'retained':>9} {'blocks':>7} {'gc/1k':>7}")
+    for name, result in results.items():
+        print(f"{name:<18} {result['bytes']:>11.1f} {result['max_bytes']:>10d} "
+              f"{result['retained']:>9.1f} {result['blocks']:>7.2f} {result['collections']:>7.2f}")
+        for key, limit in budgets[name].items():
+            if result[key] > limit:
+                failures.append(f"{name} {key}: {result[key]:.2f} > budget {limit}")
+
+    if failures:
+        print("\nOver budget:")
+        for failure in failures:
+            print(f"  {failure}")
+    else:
+        print("\nAll phases within budget")
+    return results, failures
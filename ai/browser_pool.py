@@ -0,0 +1,241 @@
+import threading
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+from config import Config
+
+READY_SCRIPT = "return !!(window.Runner && Runner.instance_);"
+
+# Pages in one browser share a renderer budget: keep them all running
+POOL_CHROME_ARGS = [
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+]
+
+# Pages of a pooled browser are iframes of one host window (the game page itself, left idle):
+# a page's scripts run against its iframe, so stepping any page needs no switch_to.window.
+ADD_FRAME_SCRIPT = """
+const frame = document.createElement('iframe');
+frame.id = arguments[0];
+frame.src = location.href;
+frame.style.cssText = 'position: fixed; left: 0; top: 0; width: 100%; height: 100%; border: 0; background: #fff';
+document.body.appendChild(frame);
+"""
+
+REMOVE_FRAME_SCRIPT = "const frame = document.getElementById(arguments[0]); if (frame) frame.remove();"
+
+# Stacks the iframe on top, e.g. for a screenshot of its page
+RAISE_FRAME_SCRIPT = "document.getElementById(arguments[0]).style.zIndex = window.__dinoTop = (window.__dinoTop || 0) + 1;"
+
+def frame_script(frame, script):
+    """Run a page script inside the iframe with this id (None: the window itself)"""
+    if frame is None:
+        return script
+    return (f"const window = self.document.getElementById('{frame}').contentWindow, "
+            f"document = window.document, Runner = window.Runner, KeyboardEvent = window.KeyboardEvent;\n"
+            + script)
+
+def wait_for(execute, script, timeout=None, interval=0.02):
+    """
+    Poll a JS expression until it returns something truthy (instead of fixed sleeps).
+    execute runs one script: driver.execute_script or GamePage.execute.
+    """
+    timeout = timeout if timeout is not None else Config.CHROME_READY_TIMEOUT
+    deadline = time.monotonic() + timeout
+    while True:
+        result = execute(script)
+        if result:
+            return result
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Page not ready after {timeout:.1f}s")
+        time.sleep(interval)
+
+def create_driver(extra_args=()):
+    chrome_options = Options()
+    for arg in list(Config.CHROME_ARGS) + list(extra_args):
+        chrome_options.add_argument(arg)
+    return webdriver.Chrome(options=chrome_options)
+
+def load_game(driver):
+    """Open the game in the current window and wait for Runner.instance_"""
+    try:
+        driver.get(Config.GAME_URL)
+    except WebDriverException:
+        # chrome://dino is an error page to the driver, but the game still loads
+        pass
+    wait_for(driver.execute_script, READY_SCRIPT)
+
+class GamePage:
+    """One game page handed out by a BrowserPool: an iframe (frame id) or a window of its browser"""
+
+    def __init__(self, pool, browser, slot):
+        self.pool = pool
+        self.browser = browser
+        self.handle, self.frame = slot
+
+    @property
+    def driver(self):
+        return self.browser.driver
+
+    def execute(self, script, *args):
+        # The browser's lock is held for one round-trip only, pages of a browser step in turn
+        with self.browser.lock:
+            self.browser.activate(self.handle)
+            return self.driver.execute_script(frame_script(self.frame, script), *args)
+
+    def wait_for(self, script, timeout=None):
+        # Polls outside the lock: other pages keep stepping while this one waits
+        return wait_for(self.execute, script, timeout)
+
+    def screenshot_as_base64(self):
+        with self.browser.lock:
+            self.browser.activate(self.handle)
+            if self.frame is not None:
+                self.driver.execute_script(RAISE_FRAME_SCRIPT, self.frame)
+            return self.driver.get_screenshot_as_base64()
+
+    def recover(self):
+        """Replace a crashed or hung page with a fresh one"""
+        self.pool.replace(self)
+
+    def close(self):
+        self.pool.release(self)
+
+class _Browser:
+    def __init__(self):
+        self.driver = create_driver(POOL_CHROME_ARGS)
+        self.lock = threading.RLock()
+        self.pages = []
+        # The host window loads the game once; pages are iframes of the same URL inside it
+        self.host = self.current = self.driver.current_window_handle
+        load_game(self.driver)
+        self.framed = True
+        self.spare = None  # Host game reused as the first window page when frames are not possible
+        self.frame_ids = 0
+
+    def activate(self, handle):
+        # Switching costs a round-trip: skip it when the page is already current
+        if self.current != handle:
+            self.driver.switch_to.window(handle)
+            self.current = handle
+
+    def open_page(self):
+        """(window handle, frame id or None) of a freshly loaded game"""
+        with self.lock:
+            if self.framed:
+                frame = f"dino-page-{self.frame_ids}"
+                self.frame_ids += 1
+                self.activate(self.host)
+                try:
+                    self.driver.execute_script(ADD_FRAME_SCRIPT, frame)
+                    wait_for(self.driver.execute_script, frame_script(frame, READY_SCRIPT))
+                    return self.host, frame
+                except (WebDriverException, TimeoutError):
+                    # The game URL can't be scripted from its frame (cross-origin, e.g. file://
+                    # or chrome://dino): one window per page. Each step on a page other than
+                    # the current window then costs an extra switch_to.window round-trip, as long
+                    # as the step script itself, on every step when envs step in turn.
+                    self.driver.execute_script(REMOVE_FRAME_SCRIPT, frame)
+                    self.framed = False
+                    self.spare = self.host
+            if self.spare is not None:
+                handle, self.spare = self.spare, None
+                self.activate(handle)
+                return handle, None
+            self.driver.switch_to.new_window('window')
+            handle = self.current = self.driver.current_window_handle
+            load_game(self.driver)
+            return handle, None
+
+    def close_page(self, handle, frame):
+        with self.lock:
+            try:
+                self.activate(handle)
+                if frame is not None:
+                    self.driver.execute_script(REMOVE_FRAME_SCRIPT, frame)
+                    return
+                self.driver.close()
+            except WebDriverException:
+                pass
+            self.current = None
+
+    def alive(self):
+        try:
+            self.driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except WebDriverException:
+            pass
+
+class BrowserPool:
+    """
+    Headless Chrome instances hosting several game pages each.
+    Pages are handed out to envs; a new browser starts when all are full.
+    Pages are iframes of one host window where the game URL allows it, browser windows otherwise.
+    """
+
+    def __init__(self, pages_per_browser=None):
+        self.pages_per_browser = pages_per_browser or Config.CHROME_PAGES_PER_BROWSER
+        self.browsers = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            browser = next((b for b in self.browsers if len(b.pages) < self.pages_per_browser), None)
+            if browser is None:
+                browser = _Browser()
+                self.browsers.append(browser)
+            page = GamePage(self, browser, browser.open_page())
+            browser.pages.append(page)
+            return page
+
+    def replace(self, page):
+        with self.lock:
+            browser = page.browser
+            if not browser.alive():
+                # The whole browser is gone: restart it and reopen all of its pages
+                browser.quit()
+                fresh = _Browser()
+                self.browsers[self.browsers.index(browser)] = fresh
+                for other in browser.pages:
+                    other.browser = fresh
+                    other.handle, other.frame = fresh.open_page()
+                fresh.pages = browser.pages
+                return
+            browser.close_page(page.handle, page.frame)
+            page.handle, page.frame = browser.open_page()
+
+    def release(self, page):
+        with self.lock:
+            browser = page.browser
+            if page in browser.pages:
+                browser.pages.remove(page)
+            if browser.pages:
+                browser.close_page(page.handle, page.frame)
+            else:
+                browser.quit()
+                self.browsers.remove(browser)
+
+    def close(self):
+        with self.lock:
+            for browser in self.browsers:
+                browser.quit()
+            self.browsers = []
+
+_default_pool = None
+
+def get_pool():
+    """Process-wide pool shared by pooled DinoChromeEnv instances"""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = BrowserPool()
+    return _default_pool
@@ -0,0 +1,86 @@
+import os
+import time
+
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+try:
+    import psutil
+except ImportError:  # Optional: fall back to /proc on Linux
+    psutil = None
+
+def rss_mb(pid):
+    """Resident memory of a process in MB, or None if it cannot be read"""
+    try:
+        if psutil is not None:
+            return psutil.Process(pid).memory_info().rss / 2**20
+        with open(f"/proc/{pid}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except Exception:
+        # Process gone, access denied or no /proc
+        return None
+
+def worker_pids(vec_env):
+    """PIDs of the env worker processes behind any VecEnv wrappers (empty for DummyVecEnv)"""
+    while hasattr(vec_env, 'venv'):
+        vec_env = vec_env.venv
+    return [p.pid for p in getattr(vec_env, 'processes', [])]
+
+class ThroughputCallback(BaseCallback):
+    """
+    Logs per rollout whether training is env-bound or learner-bound:
+    env steps/sec, rollout collection vs PPO update time, per-env episode rate
+    and resident memory of the main and worker processes.
+    """
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self.rollout_start = None
+        self.rollout_end = None
+        self.update_time = None
+        self.rollout_start_steps = 0
+        self.episodes = None
+        self.pids = []
+
+    def _on_training_start(self):
+        self.pids = worker_pids(self.training_env)
+        self.episodes = np.zeros(self.training_env.num_envs, dtype=np.int64)
+
+    def _on_rollout_start(self):
+        now = time.perf_counter()
+        if self.rollout_end is not None:
+            # Everything between two rollouts is the PPO update
+            self.update_time = now - self.rollout_end
+            self.logger.record("throughput/update_time_s", self.update_time)
+        self.rollout_start = now
+        self.rollout_start_steps = self.num_timesteps
+        self.episodes[:] = 0
+
+    def _on_step(self):
+        self.episodes += np.asarray(self.locals['dones'], dtype=np.int64)
+        return True
+
+    def _on_rollout_end(self):
+        now = time.perf_counter()
+        collect_time = now - self.rollout_start
+        steps = self.num_timesteps - self.rollout_start_steps
+        self.rollout_end = now
+
+        self.logger.record("throughput/env_steps_per_sec", steps / max(collect_time, 1e-9))
+        self.logger.record("throughput/rollout_time_s", collect_time)
+        if self.update_time is not None:
+            # Close to 1: env-bound, close to 0: learner-bound
+            self.logger.record("throughput/rollout_fraction", collect_time / (collect_time + self.update_time))
+
+        minutes = max(collect_time / 60, 1e-9)
+        for i, count in enumerate(self.episodes):
+            self.logger.record(f"throughput/episodes_per_min/env_{i}", count / minutes)
+
+        main_rss = rss_mb(os.getpid())
+        if main_rss is not None:
+            self.logger.record("throughput/rss_mb/main", main_rss)
+        for i, pid in enumerate(self.pids):
+            worker_rss = rss_mb(pid)
+            if worker_rss is not None:
+                self.logger.record(f"throughput/rss_mb/worker_{i}", worker_rss)
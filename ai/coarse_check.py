@@ -0,0 +1,9 @@
+from ai.diff_check import diff_check
+
+def coarse_check(episodes=50, frames=None, seed=0, warm_start_prob=0.5):
+    """
+    Measure divergence of Game.step(action, frames) from frames single ticks on seeded courses
+    played by the scripted expert (diff_check with the coarse candidate only).
+    """
+    return diff_check(['coarse'], episodes, frames=frames, seed=seed, expert_share=1.0,
+                      warm_start_prob=warm_start_prob, max_decisions=20_000)
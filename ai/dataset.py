@@ -0,0 +1,264 @@
+import json
+import os
+import queue
+import threading
+
+import gymnasium as gym
+import numpy as np
+
+from config import Config
+from ai.pygame_env import game_observation, tick_reward
+
+MANIFEST_NAME = "manifest.json"
+
+# Column name -> (dtype, per-step shape or None for the observation shape)
+COLUMNS = {
+    'obs': (np.uint8, None),
+    'action': (np.uint8, ()),
+    'reward': (np.float32, ()),
+    'done': (np.bool_, ()),
+}
+
+def _shard_file(out_dir, column, shard_index):
+    return os.path.join(out_dir, f"{column}_{shard_index:05d}.npy")
+
+class TrajectoryWriter:
+    """
+    Streams (obs, action, reward, done) steps into fixed-size memory-mapped .npy shards.
+    add() only copies the step into an in-memory chunk; full chunks are written to disk
+    by a background thread, so recording never waits on the disk.
+    Each row holds the observation the action was chosen on.
+    """
+
+    def __init__(self, out_dir, obs_shape=None, shard_size=None, chunk_size=None, frame_skip=None):
+        self.out_dir = out_dir
+        self.obs_shape = tuple(obs_shape or (Config.TARGET_HEIGHT, Config.TARGET_WIDTH, 1))
+        self.shard_size = shard_size or Config.DATASET_SHARD_SIZE
+        self.chunk_size = chunk_size or Config.DATASET_CHUNK_SIZE
+        self.frame_skip = frame_skip or Config.FRAME_SKIP
+        os.makedirs(out_dir, exist_ok=True)
+
+        # Append to an existing dataset
+        self.shards = []
+        manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if tuple(manifest['obs_shape']) != self.obs_shape:
+                raise ValueError(f"Dataset {out_dir} has observation shape {manifest['obs_shape']}")
+            self.shard_size = manifest['shard_size']
+            self.shards = manifest['shards']
+
+        self._chunk = self._new_chunk()
+        self._chunk_fill = 0
+
+        # Disk side, only touched by the writer thread
+        self._shard_arrays = None
+        self._shard_fill = 0
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def _new_chunk(self):
+        chunk = {}
+        for column, (dtype, shape) in COLUMNS.items():
+            shape = self.obs_shape if shape is None else shape
+            chunk[column] = np.empty((self.chunk_size,) + shape, dtype=dtype)
+        return chunk
+
+    def add(self, obs, action, reward, done):
+        i = self._chunk_fill
+        self._chunk['obs'][i] = obs
+        self._chunk['action'][i] = action
+        self._chunk['reward'][i] = reward
+        self._chunk['done'][i] = done
+        self._chunk_fill += 1
+
+        if self._chunk_fill == self.chunk_size:
+            self._queue.put((self._chunk, self._chunk_fill))
+            self._chunk = self._new_chunk()
+            self._chunk_fill = 0
+
+    def close(self):
+        """Flush the partial chunk, finish the last shard and write the manifest"""
+        if self._chunk_fill:
+            self._queue.put((self._chunk, self._chunk_fill))
+            self._chunk_fill = 0
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            chunk, count = item
+            start = 0
+            while start < count:
+                if self._shard_arrays is None:
+                    self._open_shard()
+                n = min(count - start, self.shard_size - self._shard_fill)
+                for column, array in self._shard_arrays.items():
+                    array[self._shard_fill:self._shard_fill + n] = chunk[column][start:start + n]
+                self._shard_fill += n
+                start += n
+                self.shards[-1]['count'] = self._shard_fill
+                if self._shard_fill == self.shard_size:
+                    self._close_shard()
+        if self._shard_arrays is not None:
+            self._close_shard()
+
+    def _open_shard(self):
+        index = len(self.shards)
+        self._shard_arrays = {}
+        for column, (dtype, shape) in COLUMNS.items():
+            shape = self.obs_shape if shape is None else shape
+            self._shard_arrays[column] = np.lib.format.open_memmap(
+                _shard_file(self.out_dir, column, index), mode='w+', dtype=dtype,
+                shape=(self.shard_size,) + shape
+            )
+        self._shard_fill = 0
+        self.shards.append({'index': index, 'count': 0})
+
+    def _close_shard(self):
+        for array in self._shard_arrays.values():
+            array.flush()
+        self._shard_arrays = None
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = {
+            'obs_shape': list(self.obs_shape),
+            'shard_size': self.shard_size,
+            'frame_skip': self.frame_skip,
+            'total': sum(shard['count'] for shard in self.shards),
+            'shards': self.shards,
+        }
+        path = os.path.join(self.out_dir, MANIFEST_NAME)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+class TrajectoryDataset:
+    """Random access to a recorded dataset without loading it into RAM"""
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        with open(os.path.join(data_dir, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        self.obs_shape = tuple(self.manifest['obs_shape'])
+        self.shard_size = self.manifest['shard_size']
+        self.frame_skip = self.manifest.get('frame_skip', 1)
+        self.counts = np.array([shard['count'] for shard in self.manifest['shards']], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+        self._shards = {}
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def _column(self, column, shard_index):
+        key = (column, shard_index)
+        if key not in self._shards:
+            self._shards[key] = np.load(_shard_file(self.data_dir, column, shard_index), mmap_mode='r')
+        return self._shards[key]
+
+    def gather(self, column, indices):
+        """Read one column at arbitrary global indices"""
+        indices = np.asarray(indices, dtype=np.int64)
+        dtype, shape = COLUMNS[column]
+        shape = self.obs_shape if shape is None else shape
+        out = np.empty(indices.shape + shape, dtype=dtype)
+        shard_ids = np.searchsorted(self.offsets, indices, side='right') - 1
+        for shard in np.unique(shard_ids):
+            mask = shard_ids == shard
+            out[mask] = self._column(column, int(shard))[indices[mask] - self.offsets[shard]]
+        return out
+
+    def __getitem__(self, index):
+        return tuple(self.gather(column, [index])[0] for column in COLUMNS)
+
+    def stacked_obs(self, indices, n_stack=None):
+        """
+        Frame-stacked observations (N, H, W, n_stack), oldest frame first like VecFrameStack.
+        Frames from a previous episode are zeroed, matching the stack right after a reset.
+        """
+        n_stack = n_stack or Config.FRAME_STACK
+        indices = np.asarray(indices, dtype=np.int64)
+        stacked = np.zeros((len(indices),) + self.obs_shape[:2] + (n_stack,), dtype=np.uint8)
+        valid = np.ones(len(indices), dtype=bool)
+        for k in range(n_stack):
+            back = indices - k
+            if k > 0:
+                # Stop at the start of the dataset or at the end of the previous episode
+                valid &= back >= 0
+                valid[valid] &= ~self.gather('done', back[valid])
+            if not valid.any():
+                break
+            stacked[valid, ..., n_stack - 1 - k] = self.gather('obs', back[valid])[..., 0]
+        return stacked
+
+    def sample(self, batch_size, rng=None, n_stack=None):
+        """Random minibatch of (stacked obs, actions)"""
+        rng = rng or np.random.default_rng()
+        indices = np.sort(rng.integers(0, len(self), size=batch_size))
+        return self.stacked_obs(indices, n_stack), self.gather('action', indices)
+
+class TrajectoryRecorder(gym.Wrapper):
+    """Records every step of a DinoPygameEnv into a TrajectoryWriter"""
+
+    def __init__(self, env, writer):
+        super().__init__(env)
+        self.writer = writer
+        self._last_obs = None
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self._last_obs = obs
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self.writer.add(self._last_obs, action, reward, terminated or truncated)
+        self._last_obs = obs
+        return obs, reward, terminated, truncated, info
+
+    def close(self):
+        self.writer.close()
+        super().close()
+
+class HumanTrajectoryRecorder:
+    """
+    Records human play of Game.run into a TrajectoryWriter (attach via game.recorders).
+    Game.run records a tick before drawing it, so the game surface still holds the frame
+    the player reacted to. Every frame_skip-th tick is kept, like the agent's decisions.
+    """
+
+    def __init__(self, writer, frame_skip=None):
+        self.writer = writer
+        self.frame_skip = frame_skip or Config.FRAME_SKIP
+        self._tick = 0
+        self._pending = None  # (obs, action, reward) of the current decision
+
+    def start_episode(self, game):
+        self._tick = 0
+        self._pending = None
+
+    def record(self, game, action, state):
+        if self._tick % self.frame_skip == 0:
+            self._flush(False)
+            self._pending = [game_observation(game), action, 0.0]
+        self._pending[2] += tick_reward(state, action)
+        self._tick += 1
+
+    def end_episode(self, game):
+        self._flush(True)
+
+    def close(self):
+        self.writer.close()
+
+    def _flush(self, done):
+        if self._pending is not None:
+            obs, action, reward = self._pending
+            self.writer.add(obs, action, reward, done)
+            self._pending = None
@@ -0,0 +1,268 @@
+import json
+import os
+import random
+import time
+
+from config import Config
+from ai.pygame_env import Game, dino_game
+from ai.expert import ScriptedExpert
+
+# Keys compared exactly; every other scalar is a float compared within the candidate's tolerance
+EXACT_KEYS = ('tick', 'jumping', 'ducking', 'speed_drop', 'crashed', 'won', 'score')
+FLOAT_KEYS = ('trex_y', 'jump_velocity', 'distance', 'speed')
+
+def game_snapshot(game, trex, crashed, distance, speed, tick):
+    """Per-tick state compared between the reference Game and a candidate path"""
+    return {
+        'tick': tick,
+        'trex_y': trex.y_pos,
+        'jump_velocity': trex.jump_velocity,
+        'jumping': trex.jumping,
+        'ducking': trex.ducking,
+        'speed_drop': trex.speed_drop,
+        'distance': distance,
+        'score': game.distance_meter.get_actual_distance(distance),
+        'speed': speed,
+        'crashed': crashed,
+        'won': game.won,
+        'obstacles': [(o.type_config.name, o.x_pos, o.y_pos, o.size, o.gap, o.speed_offset)
+                      for o in game.horizon.obstacles],
+    }
+
+def compare_snapshots(reference, candidate, tolerance):
+    """(max position error, first mismatch description or None)"""
+    error = max(abs(reference[key] - candidate[key]) for key in FLOAT_KEYS)
+    for key in EXACT_KEYS:
+        if reference[key] != candidate[key]:
+            return error, f"{key}: {reference[key]} vs {candidate[key]}"
+    if len(reference['obstacles']) != len(candidate['obstacles']):
+        return error, f"obstacle count: {len(reference['obstacles'])} vs {len(candidate['obstacles'])}"
+    for ref_obstacle, cand_obstacle in zip(reference['obstacles'], candidate['obstacles']):
+        if ref_obstacle[0] != cand_obstacle[0] or ref_obstacle[2:] != cand_obstacle[2:]:
+            return error, f"obstacle {ref_obstacle} vs {cand_obstacle}"
+        error = max(error, abs(ref_obstacle[1] - cand_obstacle[1]))
+    for key in FLOAT_KEYS:
+        if abs(reference[key] - candidate[key]) > tolerance:
+            return error, key
+    if error > tolerance:
+        return error, "obstacle x"
+    return error, None
+
+class ReferencePath:
+    """The reference: Game.step one tick at a time"""
+
+    def __init__(self):
+        self.game = Game(human_mode=False)
+        self.tick = 0
+
+    def reset(self, seed, start_speed):
+        self.game.seed(seed)
+        self.game.restart(start_speed)
+        self.game.step(1, present=False)
+        self.tick = 0
+
+    def step(self, action):
+        state = self.game.step(action, present=False)
+        self.tick += state['frames']
+        return state
+
+    def snapshot(self):
+        game = self.game
+        return game_snapshot(game, game.trex, game.crashed, game.distance_ran, game.current_speed, self.tick)
+
+class CoarsePath(ReferencePath):
+    """Game.step(action, frames): one coarse step per decision"""
+    per_tick = False
+    tolerance = 1e-6
+
+    def step(self, action, frames):
+        self.tick += self.game.step(action, frames=frames, present=False)['frames']
+
+class PopulationPath(ReferencePath):
+    """
+    PopulationGame: the first dino plays the reference actions, the others play
+    their own random actions on the same course and must not change what the first one sees
+    """
+    per_tick = True
+    tolerance = 0.0
+    population = 4
+
+    def __init__(self):
+        self.game = dino_game.PopulationGame(self.population)
+        self.tick = 0
+        self.rng = random.Random()
+
+    def reset(self, seed, start_speed):
+        self.rng.seed(seed)
+        self.game.seed(seed)
+        self.game.restart(start_speed)
+        self.game.step([1] * self.population, present=False)
+        self.tick = 0
+
+    def step(self, action):
+        game = self.game
+        # A tick counts while the first dino is in the game, its crash tick included
+        counts = game.playing and not game.crashed and not game.won and game.alive[0]
+        actions = [action] + [self.rng.choice((0, 0, 0, 1, 2)) for _ in range(self.population - 1)]
+        game.step(actions, present=False)
+        self.tick += counts
+
+    def snapshot(self):
+        game = self.game
+        # The others keep the game (and its speed) going after the first dino dies
+        speed = game.current_speed if game.alive[0] else game.death_speed[0]
+        return game_snapshot(game, game.trex, not game.alive[0], game.scores()[0], speed, self.tick)
+
+# Candidate engine paths checked against the reference; a new path (batched simulation,
+# pooled objects, another collision engine) is added here with reset/step/snapshot.
+# per_tick paths step one tick at a time and are compared after every tick,
+# the others advance a whole decision per step and are compared at decision boundaries.
+CANDIDATES = {
+    'coarse': CoarsePath,
+    'population': PopulationPath,
+}
+
+def _policy_action(policy, rng, expert, game, previous, epsilon=0.02):
+    """Action of a seeded episode: the scripted expert with random actions mixed in, or sticky random"""
+    if policy == 'expert':
+        return rng.randrange(3) if rng.random() < epsilon else expert.act(game)
+    if rng.random() < 0.2:
+        return rng.choice((0, 0, 0, 1, 1, 2))
+    return previous
+
+def run_episode(reference, candidates, expert, seed, frames, policy='random', start_speed=None,
+                max_decisions=2000):
+    """
+    Play one seeded action sequence on the reference and every candidate path.
+    Returns per-candidate results; a candidate stops at its first divergence.
+    """
+    rng = random.Random(seed)
+    reference.reset(seed, start_speed)
+    results = {}
+    for name, path in candidates.items():
+        path.reset(seed, start_speed)
+        results[name] = {'seed': seed, 'policy': policy, 'start_speed': start_speed, 'ticks': 0,
+                         'max_error': 0.0, 'divergence': None, 'reference_time': 0.0, 'candidate_time': 0.0}
+    active = dict(candidates)
+    actions = []
+    action = 0
+
+    def compare(name, decision):
+        ref_snapshot = reference.snapshot()
+        cand_snapshot = candidates[name].snapshot()
+        result = results[name]
+        error, mismatch = compare_snapshots(ref_snapshot, cand_snapshot, candidates[name].tolerance)
+        result['max_error'] = max(result['max_error'], error)
+        result['ticks'] = reference.tick
+        if mismatch:
+            result['divergence'] = {'decision': decision, 'tick': reference.tick, 'what': mismatch,
+                                    'actions': list(actions), 'reference': ref_snapshot, 'candidate': cand_snapshot}
+            del active[name]
+
+    for decision in range(max_decisions):
+        action = _policy_action(policy, rng, expert, reference.game, action)
+        actions.append(action)
+
+        ref_time = 0.0
+        for _ in range(frames):
+            start = time.perf_counter()
+            state = reference.step(action)
+            ref_time += time.perf_counter() - start
+            for name in [n for n in active if active[n].per_tick]:
+                start = time.perf_counter()
+                active[name].step(action)
+                results[name]['candidate_time'] += time.perf_counter() - start
+                compare(name, decision)
+            if state['crashed'] or state['won']:
+                break
+
+        for name in [n for n in active if not active[n].per_tick]:
+            start = time.perf_counter()
+            active[name].step(action, frames)
+            results[name]['candidate_time'] += time.perf_counter() - start
+            compare(name, decision)
+        for result in results.values():
+            result['reference_time'] += ref_time
+
+        if not active or reference.game.crashed or reference.game.won:
+            break
+
+    score = reference.game.distance_meter.get_actual_distance(reference.game.distance_ran)
+    for result in results.values():
+        result['decisions'] = len(actions)
+        result['score'] = score
+    return results
+
+def _print_divergence(name, result):
+    divergence = result['divergence']
+    print(f"\n[{name}] first divergence: seed {result['seed']} ({result['policy']} actions, "
+          f"start speed {result['start_speed']}), decision {divergence['decision']}, "
+          f"tick {divergence['tick']}: {divergence['what']}")
+    print(f"  last actions: {divergence['actions'][-10:]}")
+    for key in divergence['reference']:
+        ref_value, cand_value = divergence['reference'][key], divergence['candidate'][key]
+        marker = "" if ref_value == cand_value else "  <-"
+        print(f"  {key}: {ref_value}  |  {cand_value}{marker}")
+
+def diff_check(candidates=None, episodes=1000, frames=None, seed=0, expert_share=0.2, warm_start_prob=0.5,
+               max_decisions=2000, dump_dir=None):
+    """
+    Differential check of candidate engine paths against the reference Game on seeded action
+    sequences (sticky random actions, or the scripted expert for expert_share of the episodes).
+    Compares trex state, obstacles, crash tick and score, times both sides per tick and
+    prints the first divergence of each candidate with a state dump (also written to dump_dir as JSON).
+    Returns ({candidate: [episode results]}, names of the candidates that diverged).
+    """
+    names = list(candidates or CANDIDATES)
+    unknown = [name for name in names if name not in CANDIDATES]
+    if unknown:
+        raise ValueError(f"Unknown candidate paths {unknown}, known: {list(CANDIDATES)}")
+    frames = frames or Config.FRAME_SKIP
+    reference = ReferencePath()
+    paths = {name: CANDIDATES[name]() for name in names}
+    expert = ScriptedExpert(frames)
+    rng = random.Random(seed)
+
+    results = {name: [] for name in names}
+    for episode in range(episodes):
+        episode_seed = rng.getrandbits(32)
+        policy = 'expert' if rng.random() < expert_share else 'random'
+        start_speed = rng.uniform(*Config.WARM_START_SPEED_RANGE) if rng.random() < warm_start_prob else None
+        episode_results = run_episode(reference, paths, expert, episode_seed, frames, policy, start_speed,
+                                      max_decisions)
+        diverged = [name for name, result in episode_results.items() if result['divergence'] is not None]
+        for name, result in episode_results.items():
+            results[name].append(result)
+        if diverged or (episode + 1) % 100 == 0 or episode + 1 == episodes:
+            status = "ok" if not diverged else f"DIVERGED: {', '.join(diverged)}"
+            print(f"Episode {episode + 1}/{episodes}: seed {episode_seed}, {policy}, "
+                  f"score {episode_results[names[0]]['score']} - {status}")
+
+    print(f"\n{'candidate':<12} {'match':>11} {'ticks':>9} {'max error':>10} "
+          f"{'ref ms/tick':>12} {'cand ms/tick':>13} {'speedup':>8}")
+    for name in names:
+        episode_results = results[name]
+        matched = sum(r['divergence'] is None for r in episode_results)
+        ticks = sum(r['ticks'] for r in episode_results)
+        reference_time = sum(r['reference_time'] for r in episode_results)
+        candidate_time = sum(r['candidate_time'] for r in episode_results)
+        print(f"{name:<12} {f'{matched}/{len(episode_results)}':>11} {ticks:>9} "
+              f"{max((r['max_error'] for r in episode_results), default=0.0):>10.2e} "
+              f"{reference_time / max(ticks, 1) * 1e3:>12.4f} {candidate_time / max(ticks, 1) * 1e3:>13.4f} "
+              f"{reference_time / max(candidate_time, 1e-9):>7.2f}x")
+
+    failures = []
+    for name in names:
+        diverged = [r for r in results[name] if r['divergence'] is not None]
+        if not diverged:
+            continue
+        failures.append(name)
+        _print_divergence(name, diverged[0])
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+            path = os.path.join(dump_dir, f"divergence_{name}_{diverged[0]['seed']}.json")
+            with open(path, 'w') as f:
+                json.dump(dict(diverged[0], candidate=name, frames=frames), f, indent=2)
+            print(f"  state dump written to {path}")
+    print("\nAll candidates match the reference" if not failures else f"\nDiverged: {', '.join(failures)}")
+    return results, failures
@@ -0,0 +1,147 @@
+import copy
+import os
+import time
+from collections import deque
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from stable_baselines3.common.logger import configure
+
+from config import Config
+from ai.pygame_env import DinoPygameEnv
+from ai.model import create_dqn_model, load_dqn_model, save_dqn_model
+from ai.replay_memory import FrameReplay
+from ai.training import CHECKPOINTS_DIR, MODELS_DIR, TENSORBOARD_DIR, ensure_directories
+
+# Env steps between checkpoints
+CHECKPOINT_EVERY = 100_000
+
+def linear_schedule(start, end, fraction, progress):
+    """start -> end over the first fraction of training, then end"""
+    if fraction <= 0:
+        return end
+    return start + (end - start) * min(progress / fraction, 1.0)
+
+class DQNLearner:
+    """Double / dueling n-step Q-learning on prioritized FrameReplay samples"""
+
+    def __init__(self, net):
+        self.net = net
+        self.target = copy.deepcopy(net)
+        self.target.requires_grad_(False)
+        self.device = next(net.parameters()).device
+        self.optimizer = torch.optim.Adam(net.parameters(), lr=Config.DQN_LEARNING_RATE, eps=1.5e-4)
+
+    def sync_target(self):
+        self.target.load_state_dict(self.net.state_dict())
+
+    def act(self, stack):
+        with torch.no_grad():
+            obs = torch.as_tensor(stack[None], device=self.device)
+            return int(self.net(obs).argmax(dim=1).item())
+
+    def update(self, batch):
+        def tensor(key, dtype=None):
+            return torch.as_tensor(batch[key], dtype=dtype, device=self.device)
+
+        obs, next_obs = tensor('obs'), tensor('next_obs')
+        actions = tensor('actions', torch.long)
+        q_values = self.net(obs).gather(1, actions.unsqueeze(1)).squeeze(1)
+
+        with torch.no_grad():
+            next_q = self.target(next_obs)
+            if Config.DQN_DOUBLE:
+                # Online network picks the action, target network evaluates it
+                next_actions = self.net(next_obs).argmax(dim=1, keepdim=True)
+                next_values = next_q.gather(1, next_actions).squeeze(1)
+            else:
+                next_values = next_q.max(dim=1).values
+            targets = tensor('returns') + tensor('discounts') * next_values
+
+        td_errors = targets - q_values
+        loss = (tensor('weights') * F.smooth_l1_loss(q_values, targets, reduction='none')).mean()
+
+        self.optimizer.zero_grad()
+        loss.backward()
+        torch.nn.utils.clip_grad_norm_(self.net.parameters(), Config.DQN_MAX_GRAD_NORM)
+        self.optimizer.step()
+
+        td_abs = td_errors.detach().abs().cpu().numpy()
+        return {'loss': loss.item(), 'q_mean': q_values.mean().item(), 'td_abs': float(td_abs.mean())}, td_abs
+
+def train_dqn(init_model=None, seed=0):
+    """
+    Off-policy training of a Q-network on a single DinoPygameEnv.
+    Saves dino_dqn_final.pt, which watch can load like a PPO model.
+    """
+    ensure_directories()
+    env = DinoPygameEnv()
+    net = create_dqn_model()
+    if init_model:
+        net.load_state_dict(load_dqn_model(init_model).net.state_dict())
+        print(f"Initialized weights from {init_model}")
+    learner = DQNLearner(net)
+    logger = configure(os.path.join(TENSORBOARD_DIR, "dqn"), ["stdout", "tensorboard"])
+
+    replay = FrameReplay(Config.DQN_BUFFER_SIZE, env.observation_space.shape[:2], Config.FRAME_STACK,
+                         n_step=Config.DQN_N_STEP, gamma=Config.GAMMA, alpha=Config.DQN_PRIORITY_ALPHA)
+    rng = np.random.default_rng(seed)
+    obs, _ = env.reset(seed=seed)
+    replay.start_episode(obs[..., 0])
+
+    scores = deque(maxlen=100)
+    stats = {}
+    updates = 0
+    start_time = time.time()
+    print("Training started...")
+    try:
+        for step in range(1, Config.TOTAL_TIMESTEPS + 1):
+            progress = step / Config.TOTAL_TIMESTEPS
+            epsilon = linear_schedule(Config.DQN_EPS_START, Config.DQN_EPS_END, Config.DQN_EPS_FRACTION, progress)
+            if rng.random() < epsilon:
+                action = int(rng.integers(env.action_space.n))
+            else:
+                action = learner.act(replay.current_stack())
+
+            obs, reward, terminated, truncated, info = env.step(action)
+            # The env never truncates; a truncated episode is stored as ended
+            done = terminated or truncated
+            replay.add(action, reward, done, obs[..., 0])
+            if done:
+                scores.append(info['score'])
+                obs, _ = env.reset()
+                replay.start_episode(obs[..., 0])
+
+            if step >= Config.DQN_LEARNING_STARTS and step % Config.DQN_TRAIN_FREQ == 0:
+                beta = linear_schedule(Config.DQN_PRIORITY_BETA, 1.0, 1.0, progress)
+                batch = replay.sample(Config.DQN_BATCH_SIZE, beta, rng)
+                stats, td_abs = learner.update(batch)
+                replay.update_priorities(batch['indices'], td_abs + Config.DQN_PRIORITY_EPS)
+                updates += 1
+            if step % Config.DQN_TARGET_UPDATE == 0:
+                learner.sync_target()
+
+            if step % Config.DQN_LOG_INTERVAL == 0:
+                for key, value in stats.items():
+                    logger.record(f"train/{key}", value)
+                logger.record("train/epsilon", epsilon)
+                logger.record("train/replay_size", replay.size)
+                if scores:
+                    logger.record("rollout/ep_score_mean", float(np.mean(scores)))
+                logger.record("time/env_steps_per_sec", step / max(time.time() - start_time, 1e-9))
+                logger.record("time/total_timesteps", step)
+                logger.record("time/updates", updates)
+                logger.dump(step)
+
+            if step % CHECKPOINT_EVERY == 0:
+                save_dqn_model(net, os.path.join(CHECKPOINTS_DIR, f"dino_dqn_{step}_steps.pt"))
+    except KeyboardInterrupt:
+        print("Training interrupted.")
+    finally:
+        final_model_path = os.path.join(MODELS_DIR, "dino_dqn_final.pt")
+        save_dqn_model(net, final_model_path)
+        env.close()
+        logger.close()
+        print(f"Model saved to {final_model_path}")
+    return final_model_path
@@ -3,19 +3,14 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 import cv2
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
+from selenium.common.exceptions import WebDriverException
 import time
 import random
-import io
 import os
 import base64
-from PIL import Image
 
 from config import Config
+from ai.browser_pool import create_driver, load_game, wait_for, get_pool
 
 # Global counter for unique env IDs
 _env_counter = 0
@@ -27,18 +22,93 @@ def _get_next_env_id():
     _env_counter += 1
     return current_id
 
+# Applies the action, reads the runner state and reads back the ROI of the game canvas,
+# downsampled and converted to grayscale in the page: one WebDriver round-trip per step.
+# arguments: action (-1 = none), roi [left, top, width, height] in game pixels, target [width, height]
+STEP_SCRIPT = """
+const runner = Runner.instance_;
+if (!runner) return null;
+const [action, roi, target] = arguments;
+
+function key(type, keyCode) {
+    document.dispatchEvent(new KeyboardEvent(type, {keyCode: keyCode, which: keyCode, bubbles: true}));
+}
+// 0: nothing, 1: jump (tap), 2: duck (held until another action)
+const ducking = !!window.__dinoDucking;
+if (action === 2) {
+    if (!ducking) { key('keydown', 40); window.__dinoDucking = true; }
+} else if (action >= 0) {
+    if (ducking) { key('keyup', 40); window.__dinoDucking = false; }
+    if (action === 1) { key('keydown', 32); key('keyup', 32); }
+}
+
+// Downsample in the browser: the canvas may be scaled by devicePixelRatio
+const source = runner.canvas;
+const scale = source.width / runner.dimensions.WIDTH;
+let canvas = window.__dinoObsCanvas;
+if (!canvas || canvas.width !== target[0] || canvas.height !== target[1]) {
+    canvas = window.__dinoObsCanvas = document.createElement('canvas');
+    canvas.width = target[0];
+    canvas.height = target[1];
+}
+const ctx = canvas.getContext('2d', {willReadFrequently: true});
+ctx.imageSmoothingEnabled = true;
+ctx.imageSmoothingQuality = 'high';
+// The game canvas is transparent: composite on the white page background
+ctx.fillStyle = '#fff';
+ctx.fillRect(0, 0, target[0], target[1]);
+ctx.drawImage(source, roi[0] * scale, roi[1] * scale, roi[2] * scale, roi[3] * scale,
+              0, 0, target[0], target[1]);
+const rgba = ctx.getImageData(0, 0, target[0], target[1]).data;
+
+// Grayscale with the same weights as cv2, returned as base64 bytes
+const n = target[0] * target[1];
+const gray = new Uint8Array(n);
+for (let i = 0, j = 0; i < n; i++, j += 4) {
+    gray[i] = (rgba[j] * 299 + rgba[j + 1] * 587 + rgba[j + 2] * 114 + 500) / 1000;
+}
+let binary = '';
+for (let i = 0; i < n; i += 8192) {
+    binary += String.fromCharCode.apply(null, gray.subarray(i, i + 8192));
+}
+return {
+    crashed: runner.crashed,
+    playing: runner.playing,
+    distance: runner.distanceRan,
+    speed: runner.currentSpeed,
+    obs: btoa(binary)
+};
+"""
+
+# Starts a crashed or idle game; the env polls until the runner is playing again
+RESET_SCRIPT = """
+const runner = window.Runner && Runner.instance_;
+if (!runner) return false;
+function key(type, keyCode) {
+    document.dispatchEvent(new KeyboardEvent(type, {keyCode: keyCode, which: keyCode, bubbles: true}));
+}
+if (window.__dinoDucking) { key('keyup', 40); window.__dinoDucking = false; }
+if (runner.crashed) {
+    runner.restart();
+} else if (!runner.playing) {
+    key('keydown', 32);
+    key('keyup', 32);
+}
+return true;
+"""
+
+PLAYING_SCRIPT = "return Runner.instance_.playing && !Runner.instance_.crashed;"
+
 class DinoChromeEnv(gym.Env):
     metadata = {'render.modes': ['human', 'rgb_array']}
 
-    def __init__(self):
+    def __init__(self, pooled=False):
+        """pooled: open the game as a page of the shared BrowserPool instead of a private browser"""
         super(DinoChromeEnv, self).__init__()
         
         # Assign unique ID to this environment
         self.env_id = _get_next_env_id()
         
-        # Stagger startup to avoid CPU/IO spike and Server overload
-        time.sleep(random.uniform(1.0, 5.0))
-        
         # Actions: 0: Do Nothing, 1: Jump, 2: Duck
         self.action_space = spaces.Discrete(3)
         
@@ -49,11 +119,16 @@ class DinoChromeEnv(gym.Env):
             dtype=np.uint8
         )
 
-        self.driver = self._setup_driver()
-        self.driver.get(Config.GAME_URL)
-        
-        # Wait for game to load
-        time.sleep(2)
+        self.page = None
+        if pooled:
+            self.page = get_pool().acquire()
+            self.driver = self.page.driver
+        else:
+            # Stagger startup to avoid CPU/IO spike and Server overload
+            time.sleep(random.uniform(1.0, 5.0))
+            self.driver = self._setup_driver()
+            # Polls Runner.instance_ until the game is loaded
+            load_game(self.driver)
         
         self.is_ducking = False
 
@@ -63,25 +138,45 @@ class DinoChromeEnv(gym.Env):
         self._debug_saved = False
         
     def _setup_driver(self):
-        chrome_options = Options()
-        for arg in Config.CHROME_ARGS:
-            chrome_options.add_argument(arg)
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        return driver
+        return create_driver()
+
+    def _execute(self, script, *args):
+        if self.page is not None:
+            return self.page.execute(script, *args)
+        return self.driver.execute_script(script, *args)
+
+    def _wait_for(self, script):
+        if self.page is not None:
+            return self.page.wait_for(script)
+        return wait_for(self.driver.execute_script, script)
+
+    def _recover(self):
+        """Replace a crashed page (pooled) or reload the game (private browser)"""
+        if self.page is not None:
+            self.page.recover()
+            self.driver = self.page.driver
+        else:
+            load_game(self.driver)
 
     def save_debug_screenshot(self, logs_dir):
         """Save debug screenshots: full screen with ROI box + scaled observation"""
         try:
             # 1. Capture full screenshot
-            b64_img = self.driver.get_screenshot_as_base64()
+            if self.page is not None:
+                b64_img = self.page.screenshot_as_base64()
+            else:
+                b64_img = self.driver.get_screenshot_as_base64()
             img_data = base64.b64decode(b64_img)
             nparr = np.frombuffer(img_data, np.uint8)
             img_np = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
             
-            # Draw ROI rectangle (green)
-            x, y = Config.ROI_LEFT, Config.ROI_TOP
-            w, h = Config.ROI_WIDTH, Config.ROI_HEIGHT
+            # Draw ROI rectangle (green); ROI is in canvas coordinates
+            canvas = self._execute(
+                "const r = Runner.instance_.canvas.getBoundingClientRect();"
+                "return [r.left * devicePixelRatio, r.top * devicePixelRatio, devicePixelRatio];")
+            x = int(canvas[0] + Config.ROI_LEFT * canvas[2])
+            y = int(canvas[1] + Config.ROI_TOP * canvas[2])
+            w, h = int(Config.ROI_WIDTH * canvas[2]), int(Config.ROI_HEIGHT * canvas[2])
             cv2.rectangle(img_np, (x, y), (x+w, y+h), (0, 255, 0), 2)
             cv2.putText(img_np, f"Env {self.env_id}", (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
@@ -92,7 +187,7 @@ class DinoChromeEnv(gym.Env):
             
             # 2. Get scaled observation
             obs = self._get_observation()
-            scaled_path = os.path.join(logs_dir, f"env_{self.env_id}_scaled_84x84.png")
+            scaled_path = os.path.join(logs_dir, f"env_{self.env_id}_scaled_{Config.TARGET_WIDTH}x{Config.TARGET_HEIGHT}.png")
             cv2.imwrite(scaled_path, obs)
             
             print(f"[Env {self.env_id}] Debug screenshots saved to {logs_dir}")
@@ -103,28 +198,18 @@ class DinoChromeEnv(gym.Env):
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         
-        # Ensure keys are released
-        try:
-             ActionChains(self.driver).key_up(Keys.DOWN).perform()
-        except:
-             pass
         self.is_ducking = False
 
-        # Trigger reset in game
+        # Release keys, restart a crashed game or start an idle one, then wait until it runs
         try:
-            # Check if crashed or not started
-            crashed = self.driver.execute_script("return Runner.instance_ ? Runner.instance_.crashed : true")
-            if crashed:
-                self.driver.execute_script("Runner.instance_.restart()")
-        except:
-            # Fallback if specific runner instance not ready, usually reload
-            self.driver.get(Config.GAME_URL)
-            time.sleep(1)
-
-        # CRITICAL: Press SPACE to actually start the game!
-        time.sleep(0.3)
-        ActionChains(self.driver).send_keys(Keys.SPACE).perform()
-        time.sleep(0.2)  # Wait for game to start running
+            if not self._execute(RESET_SCRIPT):
+                raise WebDriverException("Runner not ready")
+            self._wait_for(PLAYING_SCRIPT)
+        except (WebDriverException, TimeoutError):
+            # Crashed or hung page: replace it and start the fresh game
+            self._recover()
+            self._execute(RESET_SCRIPT)
+            self._wait_for(PLAYING_SCRIPT)
         
         self.last_score = 0
         self.current_speed = 0
@@ -135,36 +220,19 @@ class DinoChromeEnv(gym.Env):
         return observation, info
 
     def step(self, action):
-        # 1. Execute Action using Keyboard
+        # 1-2. Apply action, read game state and observation in one round-trip
         # Action map: 0: Nothing, 1: Jump, 2: Duck
-        
-        # Handle Ducking State (Hold Down Key)
-        if action == 2:
-            if not self.is_ducking:
-                ActionChains(self.driver).key_down(Keys.DOWN).perform()
-                self.is_ducking = True
-        else:
-            if self.is_ducking:
-                ActionChains(self.driver).key_up(Keys.DOWN).perform()
-                self.is_ducking = False
-        
-        # Handle Jump
-        if action == 1:
-            # Press Space (Tap)
-            ActionChains(self.driver).send_keys(Keys.SPACE).perform()
-
-        # 2. Get Game State (Done, Score, Speed) via JS
         try:
-            game_state = self.driver.execute_script("""
-                if (!Runner.instance_) return {crashed: false, distance: 0, speed: 0};
-                return {
-                    crashed: Runner.instance_.crashed,
-                    distance: Runner.instance_.distanceRan,
-                    speed: Runner.instance_.currentSpeed
-                };
-            """)
-        except Exception:
-            game_state = {'crashed': True, 'distance': 0, 'speed': 0}
+            game_state = self._run_step_script(int(action))
+        except WebDriverException:
+            # Page crashed: end the episode, reset() brings up a replacement page
+            game_state = None
+            if self.page is not None:
+                self.page.recover()
+                self.driver = self.page.driver
+        if game_state is None:
+            game_state = {'crashed': True, 'distance': 0, 'speed': 0, 'obs': None}
+        self.is_ducking = action == 2
         
         done = game_state['crashed']
         score = game_state['distance']
@@ -181,8 +249,8 @@ class DinoChromeEnv(gym.Env):
             if action != 0:
                 reward += Config.REWARD_SPARSITY
             
-        # 4. Get Observation
-        observation = self._get_observation()
+        # 4. Observation (already read back above)
+        observation = self._decode_observation(game_state['obs'])
         
         terminated = done
         truncated = False 
@@ -190,35 +258,32 @@ class DinoChromeEnv(gym.Env):
         
         return observation, reward, terminated, truncated, info
 
+    def _run_step_script(self, action=-1):
+        roi = [Config.ROI_LEFT, Config.ROI_TOP, Config.ROI_WIDTH, Config.ROI_HEIGHT]
+        target = [Config.TARGET_WIDTH, Config.TARGET_HEIGHT]
+        return self._execute(STEP_SCRIPT, action, roi, target)
+
+    def _decode_observation(self, obs_b64):
+        if obs_b64 is None:
+            return np.zeros(self.observation_space.shape, dtype=np.uint8)
+        gray = np.frombuffer(base64.b64decode(obs_b64), dtype=np.uint8)
+        return gray.reshape(self.observation_space.shape).copy()
+
     def _get_observation(self):
-        # 1. Capture screenshot
-        b64_img = self.driver.get_screenshot_as_base64()
-        image = Image.open(io.BytesIO(base64.b64decode(b64_img)))
-        img_np = np.array(image)
-        
-        # 2. ROI Crop
-        if len(img_np.shape) == 3 and img_np.shape[2] == 4:
-            img_np = cv2.cvtColor(img_np, cv2.COLOR_RGBA2RGB)
-            
-        roi = img_np[
-            Config.ROI_TOP : Config.ROI_TOP + Config.ROI_HEIGHT,
-            Config.ROI_LEFT : Config.ROI_LEFT + Config.ROI_WIDTH
-        ]
-        
-        # 3. Preprocessing - Grayscale
-        gray = cv2.cvtColor(roi, cv2.COLOR_RGB2GRAY)
-        
-        # 4. Resize
-        resized = cv2.resize(gray, (Config.TARGET_WIDTH, Config.TARGET_HEIGHT), interpolation=cv2.INTER_AREA)
-        
-        # Add channel dimension (H, W, 1)
-        final_obs = np.expand_dims(resized, axis=-1)
-        
-        return final_obs
+        # Canvas readback of the ROI without applying an action
+        try:
+            game_state = self._run_step_script()
+        except Exception:
+            game_state = None
+        return self._decode_observation(game_state['obs'] if game_state else None)
 
     def render(self, mode='human'):
         pass
 
     def close(self):
-        if self.driver:
+        if self.page is not None:
+            self.page.close()
+            self.page = None
+        elif self.driver:
             self.driver.quit()
+        self.driver = None
@@ -0,0 +1,22 @@
+# Preloaded by the forkserver that starts SubprocVecEnv workers (see ai.training.build_vec_env).
+# Everything a worker needs before it can step is imported and loaded here once;
+# workers are forked from the server with it already in memory.
+import os
+
+# Workers are headless
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import cv2  # noqa: F401
+import gymnasium  # noqa: F401
+import pygame
+# The worker loop of SubprocVecEnv (imports torch and SB3)
+from stable_baselines3.common.vec_env import subproc_vec_env  # noqa: F401
+
+import ai.training  # noqa: F401
+from ai.pygame_env import dino_game
+
+# Sprites are converted to the display format: both asset sets, whichever INDEXED_RENDER a worker gets
+pygame.display.set_mode((dino_game.DEFAULT_WIDTH, dino_game.DEFAULT_HEIGHT))
+dino_game.Assets().load()
+dino_game.IndexedAssets().load()
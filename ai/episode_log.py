@@ -0,0 +1,160 @@
+import json
+import os
+import time
+
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnvWrapper
+
+from config import Config
+from ai.pygame_env import dino_game
+
+HEADER_NAME = "columns.json"
+
+# Column name -> dtype; one append-only raw file <column>.bin per column
+EPISODE_COLUMNS = {
+    'return': np.float32,
+    'length': np.uint32,
+    'score': np.float32,
+    'speed': np.float32,  # Game speed at death
+    'obstacle': np.uint8,  # Index into the header's obstacle names, NO_OBSTACLE if none
+    'env_id': np.uint16,
+    'time': np.float32,  # Seconds since the log was opened
+}
+
+OBSTACLE_NAMES = [t.name for t in dino_game.OBSTACLE_TYPES]
+NO_OBSTACLE = 255
+
+def _column_file(log_dir, column):
+    return os.path.join(log_dir, f"{column}.bin")
+
+class EpisodeLogWriter:
+    """
+    Buffers per-episode stats in typed numpy columns and appends them to the column files
+    when the buffer is full or EPISODE_LOG_FLUSH_SECONDS have passed.
+    Files only ever grow, so a reader can map them while training is running.
+    """
+
+    def __init__(self, log_dir, buffer_size=None, flush_seconds=None):
+        self.log_dir = log_dir
+        self.buffer_size = buffer_size or Config.EPISODE_LOG_BUFFER
+        self.flush_seconds = flush_seconds if flush_seconds is not None else Config.EPISODE_LOG_FLUSH_SECONDS
+        os.makedirs(log_dir, exist_ok=True)
+
+        header_path = os.path.join(log_dir, HEADER_NAME)
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                header = json.load(f)
+            if header['columns'] != {c: np.dtype(t).str for c, t in EPISODE_COLUMNS.items()}:
+                raise ValueError(f"Episode log {log_dir} has different columns")
+        else:
+            header = {
+                'columns': {column: np.dtype(dtype).str for column, dtype in EPISODE_COLUMNS.items()},
+                'obstacles': OBSTACLE_NAMES,
+                'created': time.time(),
+            }
+            with open(header_path + ".tmp", 'w') as f:
+                json.dump(header, f, indent=2)
+            os.replace(header_path + ".tmp", header_path)
+
+        self._buffer = {column: np.empty(self.buffer_size, dtype=dtype) for column, dtype in EPISODE_COLUMNS.items()}
+        self._fill = 0
+        self._start = time.time()
+        self._last_flush = self._start
+
+    def add(self, episode_return, length, score, speed, obstacle, env_id):
+        i = self._fill
+        self._buffer['return'][i] = episode_return
+        self._buffer['length'][i] = length
+        self._buffer['score'][i] = score
+        self._buffer['speed'][i] = speed
+        self._buffer['obstacle'][i] = OBSTACLE_NAMES.index(obstacle) if obstacle in OBSTACLE_NAMES else NO_OBSTACLE
+        self._buffer['env_id'][i] = env_id
+        now = time.time()
+        self._buffer['time'][i] = now - self._start
+        self._fill += 1
+        if self._fill == self.buffer_size or now - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self._fill:
+            for column, array in self._buffer.items():
+                with open(_column_file(self.log_dir, column), 'ab') as f:
+                    f.write(array[:self._fill].tobytes())
+            self._fill = 0
+        self._last_flush = time.time()
+
+    def close(self):
+        self.flush()
+
+class VecEpisodeLogger(VecEnvWrapper):
+    """Tracks return and length per env and logs every finished episode to an EpisodeLogWriter"""
+
+    def __init__(self, venv, log_dir):
+        super().__init__(venv)
+        self.writer = EpisodeLogWriter(log_dir)
+        self.returns = np.zeros(self.num_envs, dtype=np.float64)
+        self.lengths = np.zeros(self.num_envs, dtype=np.int64)
+
+    def reset(self):
+        self.returns[:] = 0
+        self.lengths[:] = 0
+        return self.venv.reset()
+
+    def step_wait(self):
+        obs, rewards, dones, infos = self.venv.step_wait()
+        self.returns += rewards
+        self.lengths += 1
+        for env_id in np.flatnonzero(dones):
+            info = infos[env_id]
+            self.writer.add(self.returns[env_id], self.lengths[env_id], info.get('score', 0.0),
+                            info.get('speed', 0.0), info.get('obstacle'), env_id)
+            self.returns[env_id] = 0
+            self.lengths[env_id] = 0
+        return obs, rewards, dones, infos
+
+    def close(self):
+        self.writer.close()
+        return self.venv.close()
+
+class EpisodeLog:
+    """Memory-mapped read access to one episode log directory"""
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        with open(os.path.join(log_dir, HEADER_NAME)) as f:
+            self.header = json.load(f)
+        self.obstacle_names = self.header['obstacles']
+        self.dtypes = {column: np.dtype(dtype) for column, dtype in self.header['columns'].items()}
+        # A flush may be in progress: only rows present in every column count
+        self.length = min(self._rows(column) for column in self.dtypes)
+        self._columns = {}
+
+    def _rows(self, column):
+        path = _column_file(self.log_dir, column)
+        return os.path.getsize(path) // self.dtypes[column].itemsize if os.path.exists(path) else 0
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, column):
+        if column not in self._columns:
+            if self.length == 0:
+                self._columns[column] = np.empty(0, dtype=self.dtypes[column])
+            else:
+                self._columns[column] = np.memmap(_column_file(self.log_dir, column), dtype=self.dtypes[column],
+                                                  mode='r', shape=(self.length,))
+        return self._columns[column]
+
+    def obstacles(self):
+        """Obstacle type names at death (None where there was no obstacle)"""
+        names = np.array(self.obstacle_names + [None], dtype=object)
+        codes = np.asarray(self['obstacle']).astype(np.int64)
+        return names[np.where(codes == NO_OBSTACLE, len(self.obstacle_names), codes)]
+
+def find_episode_logs(root):
+    """Every episode log under root (e.g. logs/episodes), keyed by its path relative to root"""
+    logs = {}
+    for dir_path, _, file_names in sorted(os.walk(root)):
+        if HEADER_NAME in file_names:
+            logs[os.path.relpath(dir_path, root)] = EpisodeLog(dir_path)
+    return logs
@@ -0,0 +1,236 @@
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from config import Config
+from ai.training import CHECKPOINTS_DIR, MODELS_DIR, TENSORBOARD_DIR, ensure_directories
+
+class MLPPolicy:
+    """Small tanh MLP over symbolic observations; the greedy action is the argmax of 3 logits"""
+
+    def __init__(self, n_inputs, hidden, n_actions=3):
+        self.shapes = [(n_inputs, hidden), (hidden,), (hidden, n_actions), (n_actions,)]
+        self.size = sum(int(np.prod(shape)) for shape in self.shapes)
+
+    def init_params(self, rng):
+        params = []
+        for shape in self.shapes:
+            if len(shape) == 2:
+                params.append(rng.standard_normal(shape) / np.sqrt(shape[0]))
+            else:
+                params.append(np.zeros(shape))
+        return np.concatenate([p.ravel() for p in params]).astype(np.float32)
+
+    def unflatten(self, flat):
+        """Split (..., size) parameter vectors into the weight arrays (batched over leading dims)"""
+        arrays, start = [], 0
+        for shape in self.shapes:
+            n = int(np.prod(shape))
+            arrays.append(flat[..., start:start + n].reshape(flat.shape[:-1] + shape))
+            start += n
+        return arrays
+
+    def act(self, params, obs):
+        """Actions for a batch: params (M, size), obs (M, n_inputs), one parameter vector per row"""
+        w1, b1, w2, b2 = self.unflatten(params)
+        hidden = np.tanh(np.einsum('mi,mih->mh', obs, w1) + b1)
+        return (np.einsum('mh,mha->ma', hidden, w2) + b2).argmax(axis=1)
+
+class ESPolicy:
+    """Saved ES policy with the predict() interface of SB3 models (symbolic observations)"""
+    observation = 'symbolic'
+
+    def __init__(self, params, hidden):
+        from ai.population import SYMBOLIC_FEATURES
+        self.net = MLPPolicy(len(SYMBOLIC_FEATURES), hidden)
+        self.params = params
+
+    def predict(self, obs, deterministic=True):
+        obs = np.asarray(obs, dtype=np.float32)
+        single = obs.ndim == 1
+        obs = obs.reshape(-1, obs.shape[-1])
+        actions = self.net.act(np.broadcast_to(self.params, (len(obs), self.net.size)), obs)
+        return (actions[0] if single else actions), None
+
+    def save(self, path):
+        np.savez(path, params=self.params, hidden=self.net.shapes[0][1])
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['params'], int(data['hidden']))
+
+class Adam:
+    def __init__(self, size, lr, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.lr, self.beta1, self.beta2, self.eps = lr, beta1, beta2, eps
+        self.m = np.zeros(size, dtype=np.float32)
+        self.v = np.zeros(size, dtype=np.float32)
+        self.t = 0
+
+    def step(self, gradient):
+        self.t += 1
+        self.m = self.beta1 * self.m + (1 - self.beta1) * gradient
+        self.v = self.beta2 * self.v + (1 - self.beta2) * gradient * gradient
+        step = self.lr * np.sqrt(1 - self.beta2 ** self.t) / (1 - self.beta1 ** self.t)
+        return step * self.m / (np.sqrt(self.v) + self.eps)
+
+def perturbation(generation, pair, size):
+    """Noise direction of an antithetic pair: every process regenerates it from the shared seed"""
+    rng = np.random.default_rng([Config.ES_SEED, generation, pair])
+    return rng.standard_normal(size).astype(np.float32)
+
+def centered_ranks(fitness):
+    """Fitness shaping: ranks scaled to [-0.5, 0.5]"""
+    ranks = np.empty(len(fitness), dtype=np.float32)
+    ranks[np.argsort(fitness)] = np.arange(len(fitness), dtype=np.float32)
+    return ranks / max(len(fitness) - 1, 1) - 0.5
+
+class ESState:
+    """Parameters and optimizer; master and workers apply the same updates and stay identical"""
+
+    def __init__(self, params):
+        self.params = params
+        self.optimizer = Adam(len(params), Config.ES_LEARNING_RATE)
+
+    def update(self, generation, weights):
+        """weights: shaped fitness of (+eps, -eps) per pair, shape (pairs, 2)"""
+        gradient = np.zeros_like(self.params)
+        for pair, (plus, minus) in enumerate(weights):
+            gradient += (plus - minus) * perturbation(generation, pair, len(self.params))
+        gradient /= 2 * len(weights) * Config.ES_SIGMA
+        # Ascent on fitness, with L2 weight decay
+        gradient -= Config.ES_WEIGHT_DECAY * self.params
+        self.params = self.params + self.optimizer.step(gradient)
+
+def course_seeds(generation):
+    rng = np.random.default_rng([Config.ES_SEED, generation, 2**31])
+    return [int(s) for s in rng.integers(0, 2**31, Config.ES_EPISODES)]
+
+def evaluate(env, net, params, seeds):
+    """Mean score of each parameter row over the given courses, played side by side by the population env"""
+    from ai.pygame_env import dino_game
+    scores = np.zeros(len(params))
+    for seed in seeds:
+        obs = env.reset(seed=seed)
+        info = {'scores': env.game.scores()}
+        for _ in range(Config.ES_MAX_DECISIONS):
+            obs, _, dones, info = env.step(net.act(params, obs))
+            if dones.all() or info['won']:
+                break
+        scores += np.asarray(info['scores'])
+    return scores / len(seeds) * dino_game.DistanceMeter.COEFFICIENT
+
+def _es_worker(worker_id, n_workers, params, conn):
+    """Evaluates its share of the antithetic pairs; only seeds and fitness scalars go over the pipe"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from ai.population import PopulationEnv, SYMBOLIC_FEATURES
+
+    net = MLPPolicy(len(SYMBOLIC_FEATURES), Config.ES_HIDDEN)
+    state = ESState(params)
+    pairs = [p for p in range(Config.ES_POPULATION // 2) if p % n_workers == worker_id]
+    env = PopulationEnv(2 * len(pairs), observation='symbolic') if pairs else None
+    try:
+        while True:
+            command, generation, payload = conn.recv()
+            if command == 'evaluate':
+                if not pairs:
+                    conn.send((pairs, np.zeros(0)))
+                    continue
+                noise = np.stack([perturbation(generation, p, net.size) for p in pairs])
+                candidates = np.concatenate([state.params + Config.ES_SIGMA * noise,
+                                             state.params - Config.ES_SIGMA * noise])
+                conn.send((pairs, evaluate(env, net, candidates, course_seeds(generation))))
+            elif command == 'update':
+                state.update(generation, payload)
+            else:
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        if env is not None:
+            env.close()
+
+def train_es(init_model=None, n_workers=None):
+    """
+    OpenAI-style evolution strategies on symbolic observations: antithetic Gaussian perturbations
+    of a small MLP, evaluated on the same seeded courses by worker processes.
+    Workers regenerate the noise from shared seeds, so each generation exchanges only fitness scalars.
+    """
+    from stable_baselines3.common.logger import configure
+    from ai.population import SYMBOLIC_FEATURES
+
+    ensure_directories()
+    n_workers = n_workers or Config.ES_WORKERS or os.cpu_count() or 1
+    net = MLPPolicy(len(SYMBOLIC_FEATURES), Config.ES_HIDDEN)
+    if init_model:
+        policy = ESPolicy.load(init_model)
+        if policy.net.size != net.size:
+            raise ValueError(f"{init_model} has a different network size (ES_HIDDEN = {Config.ES_HIDDEN})")
+        params = policy.params
+        print(f"Initialized weights from {init_model}")
+    else:
+        params = net.init_params(np.random.default_rng(Config.ES_SEED))
+    state = ESState(params)
+    logger = configure(os.path.join(TENSORBOARD_DIR, "es"), ["stdout", "tensorboard"])
+
+    context = mp.get_context('spawn')
+    pipes, workers = [], []
+    for worker_id in range(n_workers):
+        parent_conn, child_conn = context.Pipe()
+        worker = context.Process(target=_es_worker, args=(worker_id, n_workers, params, child_conn), daemon=True)
+        worker.start()
+        pipes.append(parent_conn)
+        workers.append(worker)
+
+    n_pairs = Config.ES_POPULATION // 2
+    print(f"Evolving {net.size} parameters: population {2 * n_pairs}, {n_workers} worker(s)")
+    best = -np.inf
+    start_time = time.time()
+    try:
+        for generation in range(Config.ES_GENERATIONS):
+            for conn in pipes:
+                conn.send(('evaluate', generation, None))
+            fitness = np.zeros((n_pairs, 2))
+            for conn in pipes:
+                pairs, scores = conn.recv()
+                fitness[pairs, 0] = scores[:len(pairs)]
+                fitness[pairs, 1] = scores[len(pairs):]
+
+            weights = centered_ranks(fitness.ravel()).reshape(n_pairs, 2)
+            for conn in pipes:
+                conn.send(('update', generation, weights))
+            state.update(generation, weights)
+
+            if fitness.max() > best:
+                best = fitness.max()
+            logger.record("es/fitness_mean", float(fitness.mean()))
+            logger.record("es/fitness_max", float(fitness.max()))
+            logger.record("es/fitness_best", float(best))
+            logger.record("es/param_norm", float(np.linalg.norm(state.params)))
+            logger.record("time/generations", generation + 1)
+            logger.record("time/elapsed", time.time() - start_time)
+            logger.dump(generation + 1)
+
+            if (generation + 1) % Config.ES_CHECKPOINT_EVERY == 0:
+                ESPolicy(state.params, Config.ES_HIDDEN).save(
+                    os.path.join(CHECKPOINTS_DIR, f"dino_es_{generation + 1}_gen.npz"))
+    except KeyboardInterrupt:
+        print("Training interrupted.")
+    finally:
+        for conn in pipes:
+            try:
+                conn.send(('stop', None, None))
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        final_model_path = os.path.join(MODELS_DIR, "dino_es_final.npz")
+        ESPolicy(state.params, Config.ES_HIDDEN).save(final_model_path)
+        logger.close()
+        print(f"Model saved to {final_model_path}")
+    return final_model_path
@@ -0,0 +1,234 @@
+import random
+
+from config import Config
+from ai.pygame_env import dino_game, DinoPygameEnv, MS_PER_FRAME
+
+# Game speed buckets of the precomputed tables
+SPEED_STEP = 0.25
+NUM_SPEED_BUCKETS = int(round((dino_game.Config.MAX_SPEED - dino_game.Config.SPEED) / SPEED_STEP)) + 1
+
+# Obstacle distances (obstacle x - trex x) covered by the jump windows
+MAX_DISTANCE = 320
+
+# Obstacle handling of a variant
+IGNORE, DUCK, JUMP = 0, 1, 2
+
+def speed_bucket(speed):
+    index = int(round((speed - dino_game.Config.SPEED) / SPEED_STEP))
+    return min(max(index, 0), NUM_SPEED_BUCKETS - 1)
+
+def bucket_speed(index):
+    return dino_game.Config.SPEED + index * SPEED_STEP
+
+def jump_arc(speed):
+    """Trex y after each tick of a full jump started at the given game speed"""
+    trex = dino_game.Trex(None)
+    trex.start_jump(speed)
+    arc = []
+    while trex.jumping:
+        trex.update_jump(MS_PER_FRAME)
+        arc.append(trex.y_pos)
+    return arc
+
+def obstacle_variants():
+    """
+    Every distinct obstacle geometry: (type index, size, y position, speed offset).
+    Returns a list of (key, Obstacle) with collision boxes already adjusted for the size.
+    """
+    variants = []
+    for type_index, obstacle_type in enumerate(dino_game.OBSTACLE_TYPES):
+        y_positions = obstacle_type.y_pos if isinstance(obstacle_type.y_pos, list) else [obstacle_type.y_pos]
+        max_size = dino_game.Config.MAX_OBSTACLE_LENGTH if obstacle_type.multiple_speed < 999 else 1
+        offsets = [-obstacle_type.speed_offset, obstacle_type.speed_offset] if obstacle_type.speed_offset else [0]
+        for size in range(1, max_size + 1):
+            for y_pos in y_positions:
+                for offset in offsets:
+                    obstacle = dino_game.Obstacle(None, obstacle_type, {'WIDTH': 0}, 1.0,
+                                                  dino_game.Config.MAX_SPEED, rng=random.Random(0))
+                    obstacle.size = size
+                    obstacle.init(obstacle_type.multiple_speed)
+                    obstacle.y_pos = y_pos
+                    obstacle.speed_offset = offset
+                    variants.append(((type_index, size, y_pos, offset), obstacle))
+    return variants
+
+class ExpertTables:
+    """
+    Precomputed decision tables:
+    - jump arcs per speed bucket
+    - per speed bucket and obstacle variant, the window of distances from which a full jump clears it
+    - per obstacle variant, whether it can be ignored, ducked under or has to be jumped
+    """
+
+    def __init__(self, frame_skip=None):
+        self.frame_skip = frame_skip or Config.FRAME_SKIP
+        self.trex = dino_game.Trex(None)
+        self.variants = obstacle_variants()
+        self.variant_index = {key: i for i, (key, _) in enumerate(self.variants)}
+
+        self.arcs = [jump_arc(bucket_speed(b)) for b in range(NUM_SPEED_BUCKETS)]
+        self.handling = [self._handling(obstacle) for _, obstacle in self.variants]
+        self.jump_windows = [
+            [self._jump_window(b, obstacle) if handling == JUMP else None
+             for (_, obstacle), handling in zip(self.variants, self.handling)]
+            for b in range(NUM_SPEED_BUCKETS)
+        ]
+
+    def _collides(self, obstacle, x, y, ducking):
+        trex = self.trex
+        trex.y_pos = y
+        trex.ducking = ducking
+        obstacle.x_pos = trex.x_pos + x
+        return dino_game.check_for_collision(obstacle, trex)
+
+    def _hits_at_any_x(self, obstacle, ducking):
+        for x in range(-obstacle.width - 2, self.trex.config.WIDTH_DUCK + 2):
+            if self._collides(obstacle, x, self.trex.ground_y_pos, ducking):
+                return True
+        return False
+
+    def _handling(self, obstacle):
+        if not self._hits_at_any_x(obstacle, False):
+            return IGNORE
+        if not self._hits_at_any_x(obstacle, True):
+            return DUCK
+        return JUMP
+
+    def _jump_window(self, bucket, obstacle):
+        """
+        (lowest, trigger) distances: a jump started at a distance in [lowest, highest] clears
+        the obstacle; trigger is the latest decision point still guaranteed to be inside.
+        None if no full jump clears it.
+        """
+        arc = self.arcs[bucket]
+        speed = bucket_speed(bucket) + obstacle.speed_offset
+        ground = self.trex.ground_y_pos
+        reach = self.trex.config.WIDTH
+
+        clear = []
+        for distance in range(MAX_DISTANCE):
+            # Only the ticks where the obstacle overlaps the trex horizontally matter
+            first = max(1, int((distance - reach) / speed))
+            last = int((distance + obstacle.width) / speed) + 1
+            hit = False
+            for tick in range(first, last + 1):
+                y = arc[tick - 1] if tick <= len(arc) else ground
+                if self._collides(obstacle, distance - speed * tick, y, False):
+                    hit = True
+                    break
+            clear.append(not hit)
+
+        # Largest contiguous clear window
+        best = None
+        start = None
+        for distance, ok in enumerate(clear + [False]):
+            if ok and start is None:
+                start = distance
+            elif not ok and start is not None:
+                if best is None or distance - start > best[1] - best[0]:
+                    best = (start, distance - 1)
+                start = None
+        if best is None:
+            return None
+
+        lowest, highest = best
+        # Decisions come every frame_skip ticks; cover the fastest speed of the bucket
+        trigger = min(highest, lowest + (speed + SPEED_STEP) * self.frame_skip)
+        return lowest, trigger
+
+class ScriptedExpert:
+    """
+    Rule-based player that reads the symbolic game state and decides in O(1) with table lookups.
+    Actions match DinoPygameEnv: 0 - nothing, 1 - jump, 2 - duck.
+    """
+
+    _tables = {}
+
+    def __init__(self, frame_skip=None):
+        frame_skip = frame_skip or Config.FRAME_SKIP
+        if frame_skip not in self._tables:
+            self._tables[frame_skip] = ExpertTables(frame_skip)
+        self.tables = self._tables[frame_skip]
+        self.frame_skip = frame_skip
+
+    def _next_obstacle(self, game):
+        """First obstacle the trex has not passed yet (the game keeps at most a few)"""
+        trex_x = game.trex.x_pos
+        for obstacle in game.horizon.obstacles:
+            if obstacle.x_pos + obstacle.width >= trex_x:
+                return obstacle
+        return None
+
+    def act(self, game):
+        trex = game.trex
+        obstacle = self._next_obstacle(game)
+
+        if obstacle is None:
+            variant = None
+            handling = IGNORE
+        else:
+            key = (dino_game.OBSTACLE_TYPES.index(obstacle.type_config), obstacle.size,
+                   obstacle.y_pos, obstacle.speed_offset)
+            variant = self.tables.variant_index[key]
+            handling = self.tables.handling[variant]
+            distance = obstacle.x_pos - trex.x_pos
+
+        if trex.jumping:
+            # Keep the jump full while rising, drop fast only if the landing leaves time to react
+            if trex.jump_velocity < trex.config.DROP_VELOCITY:
+                return 1
+            # A speed drop lands ducking, which is also the answer to a duckable obstacle
+            if handling != JUMP or distance > self._drop_distance(game, variant, obstacle):
+                return 2
+            return 0
+
+        if handling == DUCK:
+            speed = game.current_speed + obstacle.speed_offset
+            if distance < trex.config.WIDTH_DUCK + speed * self.frame_skip * 2:
+                return 2
+            return 0
+
+        if handling == JUMP:
+            window = self.tables.jump_windows[speed_bucket(game.current_speed)][variant]
+            if window is not None and window[0] <= distance <= window[1]:
+                # A ducking trex cannot jump: release first
+                return 0 if trex.ducking else 1
+        return 0
+
+    def _drop_distance(self, game, variant, obstacle):
+        """Obstacle distance above which a speed drop still lands in time for the next jump"""
+        window = self.tables.jump_windows[speed_bucket(game.current_speed)][variant]
+        if window is None:
+            return MAX_DISTANCE
+        # A speed drop lands ducking: one decision to land, one to stand up, one to spare
+        speed = game.current_speed + obstacle.speed_offset
+        return window[1] + speed * self.frame_skip * 3
+
+def run_expert(episodes=10, dataset_dir=None, record_dir=None, start_options=None):
+    """Play episodes with the scripted expert, optionally recording demonstrations"""
+    env = DinoPygameEnv(start_options=start_options, record_dir=record_dir)
+    writer = None
+    if dataset_dir:
+        from ai.dataset import TrajectoryWriter, TrajectoryRecorder
+        writer = TrajectoryWriter(dataset_dir, frame_skip=env.frame_skip)
+        env = TrajectoryRecorder(env, writer)
+
+    expert = ScriptedExpert(env.unwrapped.frame_skip)
+    game = env.unwrapped.game
+    scores = []
+    try:
+        for episode in range(episodes):
+            env.reset()
+            done = False
+            while not done:
+                _, _, terminated, truncated, info = env.step(expert.act(game))
+                done = terminated or truncated or game.won
+            score = game.distance_meter.get_actual_distance(info['score'])
+            scores.append(score)
+            print(f"Episode {episode + 1}: score {score}")
+    finally:
+        env.close()
+
+    if scores:
+        print(f"Mean score {sum(scores) / len(scores):.1f}, best {max(scores)}")
+    return scores
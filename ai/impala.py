@@ -0,0 +1,259 @@
+import ctypes
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import deque
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+from stable_baselines3.common.logger import configure
+from stable_baselines3.common.vec_env import DummyVecEnv, VecFrameStack
+
+from config import Config
+from ai.model import create_ppo_model
+from ai.training import CHECKPOINTS_DIR, MODELS_DIR, TENSORBOARD_DIR, ensure_directories, make_env
+
+# Env steps between checkpoints of the learner
+CHECKPOINT_EVERY = 100_000
+
+def vtrace(behaviour_log_probs, target_log_probs, rewards, discounts, values, bootstrap_value,
+           rho_clip=1.0, c_clip=1.0):
+    """
+    V-trace targets (Espeholt et al. 2018) for a [T, B] batch of trajectory chunks.
+    discounts is gamma * (1 - done). Returns (vs, policy gradient advantages), both without gradients.
+    """
+    with torch.no_grad():
+        rhos = torch.exp(target_log_probs - behaviour_log_probs)
+        clipped_rhos = torch.clamp(rhos, max=rho_clip)
+        cs = torch.clamp(rhos, max=c_clip)
+
+        next_values = torch.cat([values[1:], bootstrap_value.unsqueeze(0)], dim=0)
+        deltas = clipped_rhos * (rewards + discounts * next_values - values)
+
+        # vs_t - V(x_t) = delta_t + discount_t * c_t * (vs_{t+1} - V(x_{t+1}))
+        corrections = torch.zeros_like(values)
+        acc = torch.zeros_like(bootstrap_value)
+        for t in reversed(range(values.shape[0])):
+            acc = deltas[t] + discounts[t] * cs[t] * acc
+            corrections[t] = acc
+        vs = values + corrections
+
+        next_vs = torch.cat([vs[1:], bootstrap_value.unsqueeze(0)], dim=0)
+        pg_advantages = clipped_rhos * (rewards + discounts * next_vs - values)
+    return vs, pg_advantages
+
+def _build_policy(n_envs, device):
+    """Frame-stacked headless envs and a PPO model whose policy the actor-learner trains"""
+    env = VecFrameStack(DummyVecEnv([make_env(i) for i in range(n_envs)]), n_stack=Config.FRAME_STACK)
+    model = create_ppo_model(env, verbose=0, device=device)
+    return env, model
+
+def _actor(actor_id, weights, version, lock, chunks, stop_event, seed):
+    """Actor process: plays with a CPU copy of the policy and sends fixed-length trajectory chunks"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    torch.set_num_threads(1)
+
+    env, model = _build_policy(Config.IMPALA_ENVS_PER_ACTOR, "cpu")
+    policy = model.policy
+    policy.set_training_mode(False)
+    shared = np.frombuffer(weights, dtype=np.float32)
+    local_version = -1
+
+    env.seed(seed + actor_id * Config.IMPALA_ENVS_PER_ACTOR)
+    obs = env.reset()
+    n_envs, unroll = env.num_envs, Config.IMPALA_UNROLL
+    try:
+        while not stop_event.is_set():
+            # Pick up the newest weights between chunks
+            if version.value != local_version:
+                with lock:
+                    local_version = version.value
+                    params = torch.from_numpy(shared.copy())
+                vector_to_parameters(params, policy.parameters())
+
+            chunk = {
+                'actor': actor_id,
+                'version': local_version,
+                'obs': np.empty((unroll,) + obs.shape, dtype=obs.dtype),
+                'actions': np.empty((unroll, n_envs), dtype=np.int64),
+                'log_probs': np.empty((unroll, n_envs), dtype=np.float32),
+                'rewards': np.empty((unroll, n_envs), dtype=np.float32),
+                'dones': np.empty((unroll, n_envs), dtype=np.float32),
+                'scores': [],
+            }
+            for t in range(unroll):
+                chunk['obs'][t] = obs
+                with torch.no_grad():
+                    obs_tensor, _ = policy.obs_to_tensor(obs)
+                    actions, _, log_probs = policy(obs_tensor)
+                actions = actions.numpy()
+                obs, rewards, dones, infos = env.step(actions)
+                chunk['actions'][t] = actions
+                chunk['log_probs'][t] = log_probs.numpy()
+                chunk['rewards'][t] = rewards
+                chunk['dones'][t] = dones
+                for info, done in zip(infos, dones):
+                    if done and 'score' in info:
+                        chunk['scores'].append(info['score'])
+            chunk['last_obs'] = obs.copy()
+
+            while not stop_event.is_set():
+                try:
+                    chunks.put(chunk, timeout=0.5)
+                    break
+                except queue.Full:
+                    pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+
+class Learner:
+    """Batches trajectory chunks from the actors into V-trace actor-critic updates"""
+
+    def __init__(self, model):
+        self.policy = model.policy
+        self.policy.set_training_mode(True)
+        self.device = self.policy.device
+        self.optimizer = torch.optim.Adam(self.policy.parameters(), lr=Config.LEARNING_RATE, eps=1e-5)
+
+    def update(self, chunks):
+        # [T, B] batch: the envs of all chunks side by side
+        obs = np.concatenate([c['obs'] for c in chunks], axis=1)
+        unroll, batch = obs.shape[:2]
+
+        def tensor(key, dtype=torch.float32):
+            return torch.as_tensor(np.concatenate([c[key] for c in chunks], axis=1), dtype=dtype, device=self.device)
+
+        actions = tensor('actions', torch.long)
+        behaviour_log_probs = tensor('log_probs')
+        rewards = tensor('rewards')
+        discounts = Config.GAMMA * (1.0 - tensor('dones'))
+
+        obs_tensor, _ = self.policy.obs_to_tensor(obs.reshape((unroll * batch,) + obs.shape[2:]))
+        values, log_probs, entropy = self.policy.evaluate_actions(obs_tensor, actions.reshape(-1))
+        values = values.reshape(unroll, batch)
+        log_probs = log_probs.reshape(unroll, batch)
+
+        with torch.no_grad():
+            last_obs, _ = self.policy.obs_to_tensor(np.concatenate([c['last_obs'] for c in chunks], axis=0))
+            bootstrap_value = self.policy.predict_values(last_obs).reshape(batch)
+
+        vs, pg_advantages = vtrace(behaviour_log_probs, log_probs.detach(), rewards, discounts,
+                                   values.detach(), bootstrap_value,
+                                   Config.IMPALA_RHO_CLIP, Config.IMPALA_C_CLIP)
+
+        policy_loss = -(log_probs * pg_advantages).mean()
+        value_loss = 0.5 * ((vs - values) ** 2).mean()
+        entropy_loss = -entropy.mean()
+        loss = policy_loss + Config.IMPALA_VF_COEF * value_loss + Config.ENT_COEF * entropy_loss
+
+        self.optimizer.zero_grad()
+        loss.backward()
+        torch.nn.utils.clip_grad_norm_(self.policy.parameters(), Config.IMPALA_MAX_GRAD_NORM)
+        self.optimizer.step()
+
+        return {
+            'policy_loss': policy_loss.item(),
+            'value_loss': value_loss.item(),
+            'entropy': -entropy_loss.item(),
+            'mean_rho': torch.exp(log_probs.detach() - behaviour_log_probs).mean().item(),
+        }
+
+    def publish(self, weights, version, lock):
+        """Copy the current weights into shared memory for the actors"""
+        params = parameters_to_vector(self.policy.parameters()).detach().cpu().numpy()
+        with lock:
+            np.frombuffer(weights, dtype=np.float32)[:] = params
+            version.value += 1
+
+def train_impala(init_model=None, n_actors=None, seed=0):
+    """
+    Actor-learner training: actor processes play headless DinoPygameEnv instances with
+    local CPU copies of the policy while the learner keeps optimizing on their chunks.
+    Saves an SB3 PPO model like train(), so watch/pretrain can load it.
+    """
+    ensure_directories()
+    n_actors = n_actors or Config.IMPALA_ACTORS
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) - n_actors))
+
+    # The learner's env only provides the spaces of the policy
+    env, model = _build_policy(1, "cuda")
+    if init_model:
+        model.set_parameters(init_model)
+        print(f"Initialized weights from {init_model}")
+    env.close()
+    learner = Learner(model)
+    logger = configure(os.path.join(TENSORBOARD_DIR, "impala"), ["stdout", "tensorboard"])
+
+    context = mp.get_context('spawn')
+    n_params = sum(p.numel() for p in learner.policy.parameters())
+    weights = context.RawArray(ctypes.c_float, n_params)
+    version = context.RawValue(ctypes.c_int64, -1)
+    lock = context.Lock()
+    chunks = context.Queue(maxsize=Config.IMPALA_QUEUE_SIZE)
+    stop_event = context.Event()
+    learner.publish(weights, version, lock)
+
+    print(f"Starting {n_actors} actor(s) x {Config.IMPALA_ENVS_PER_ACTOR} env(s), "
+          f"{n_params} parameters shared")
+    actors = [context.Process(target=_actor, args=(i, weights, version, lock, chunks, stop_event, seed),
+                              daemon=True)
+              for i in range(n_actors)]
+    for actor in actors:
+        actor.start()
+
+    steps = 0
+    updates = 0
+    next_checkpoint = CHECKPOINT_EVERY
+    scores = deque(maxlen=100)
+    start_time = time.time()
+    print("Training started...")
+    try:
+        while steps < Config.TOTAL_TIMESTEPS:
+            batch = [chunks.get() for _ in range(Config.IMPALA_BATCH_CHUNKS)]
+            stats = learner.update(batch)
+            learner.publish(weights, version, lock)
+            updates += 1
+
+            for chunk in batch:
+                steps += chunk['actions'].size
+                scores.extend(chunk['scores'])
+            if updates % Config.IMPALA_LOG_INTERVAL == 0:
+                for key, value in stats.items():
+                    logger.record(f"train/{key}", value)
+                # Updates the learner made since the actors' weights (off-policy drift)
+                logger.record("train/policy_lag", version.value - 1 - np.mean([c['version'] for c in batch]))
+                if scores:
+                    logger.record("rollout/ep_score_mean", float(np.mean(scores)))
+                logger.record("time/env_steps_per_sec", steps / max(time.time() - start_time, 1e-9))
+                logger.record("time/total_timesteps", steps)
+                logger.record("time/updates", updates)
+                logger.dump(steps)
+
+            if steps >= next_checkpoint:
+                next_checkpoint += CHECKPOINT_EVERY
+                model.save(os.path.join(CHECKPOINTS_DIR, f"dino_impala_{steps}_steps"))
+    except KeyboardInterrupt:
+        print("Training interrupted.")
+    finally:
+        stop_event.set()
+        # Drain the queue so actors blocked on put() can exit
+        deadline = time.time() + 10
+        while any(a.is_alive() for a in actors) and time.time() < deadline:
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for actor in actors:
+            actor.join(timeout=1)
+            if actor.is_alive():
+                actor.terminate()
+        final_model_path = os.path.join(MODELS_DIR, "dino_impala_final")
+        model.save(final_model_path)
+        logger.close()
+        print(f"Model saved to {final_model_path}")
+    return final_model_path
@@ -1,11 +1,17 @@
 
+import numpy as np
+import torch
+from torch import nn
+from gymnasium import spaces
 from stable_baselines3 import PPO
+from stable_baselines3.common.torch_layers import NatureCNN
+from stable_baselines3.common.utils import get_device
 from stable_baselines3.common.vec_env import VecFrameStack
 from stable_baselines3.common.env_util import make_vec_env
 from config import Config
 import os
 
-def create_ppo_model(env, tensorboard_log=None, verbose=1):
+def create_ppo_model(env, tensorboard_log=None, verbose=1, device="cuda"):
     """
     Creates or loads a PPO model.
     """
@@ -27,10 +33,76 @@ def create_ppo_model(env, tensorboard_log=None, verbose=1):
         gae_lambda=Config.GAE_LAMBDA,
         tensorboard_log=tensorboard_log,
         verbose=verbose,
-        device="cuda" # Force GPU as requested (RTX 3070Ti)
+        device=device # GPU by default as requested (RTX 3070Ti); actor processes use the CPU
     )
     
     return model
 
 def load_ppo_model(path, env=None):
     return PPO.load(path, env=env)
+
+class QNetwork(nn.Module):
+    """
+    NatureCNN Q-network over channel-first uint8 frame stacks.
+    dueling splits the head into a state value and action advantages.
+    """
+
+    def __init__(self, n_stack, height, width, n_actions, dueling=True):
+        super().__init__()
+        self.config = dict(n_stack=n_stack, height=height, width=width, n_actions=n_actions, dueling=dueling)
+        obs_space = spaces.Box(low=0, high=255, shape=(n_stack, height, width), dtype=np.uint8)
+        self.features = NatureCNN(obs_space, features_dim=512)
+        self.dueling = dueling
+        if dueling:
+            self.value = nn.Linear(512, 1)
+            self.advantage = nn.Linear(512, n_actions)
+        else:
+            self.q = nn.Linear(512, n_actions)
+
+    def forward(self, obs):
+        features = self.features(obs.float() / 255.0)
+        if not self.dueling:
+            return self.q(features)
+        advantage = self.advantage(features)
+        return self.value(features) + advantage - advantage.mean(dim=1, keepdim=True)
+
+class DQNAgent:
+    """Greedy policy of a QNetwork with the predict() interface of SB3 models"""
+
+    def __init__(self, net):
+        self.net = net
+        self.device = next(net.parameters()).device
+
+    def predict(self, obs, deterministic=True):
+        # Channel-last stacks (VecFrameStack layout) -> channel-first
+        obs = np.asarray(obs)
+        single = obs.ndim == 3
+        if single:
+            obs = obs[None]
+        obs = torch.as_tensor(obs.transpose(0, 3, 1, 2), device=self.device)
+        with torch.no_grad():
+            actions = self.net(obs).argmax(dim=1).cpu().numpy()
+        return (actions[0] if single else actions), None
+
+def create_dqn_model(device="cuda"):
+    net = QNetwork(Config.FRAME_STACK, Config.TARGET_HEIGHT, Config.TARGET_WIDTH, 3, dueling=Config.DQN_DUELING)
+    return net.to(get_device(device))
+
+def save_dqn_model(net, path):
+    torch.save({'config': net.config, 'state_dict': net.state_dict()}, path)
+
+def load_dqn_model(path, device="auto"):
+    checkpoint = torch.load(path, map_location="cpu")
+    net = QNetwork(**checkpoint['config'])
+    net.load_state_dict(checkpoint['state_dict'])
+    net.eval()
+    return DQNAgent(net.to(get_device(device)))
+
+def load_model(path):
+    """Any saved agent by extension: .pt Q-network (train_dqn), .npz ES policy (train_es), otherwise PPO"""
+    if path.endswith(".pt"):
+        return load_dqn_model(path)
+    if path.endswith(".npz"):
+        from ai.es import ESPolicy
+        return ESPolicy.load(path)
+    return load_ppo_model(path)
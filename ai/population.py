@@ -0,0 +1,135 @@
+import numpy as np
+
+from config import Config
+from ai.pygame_env import MS_PER_FRAME, dino_game, game_observation, render_profile, tick_reward
+
+# Per-dino features of the symbolic observation: the dino, then the next obstacles ahead of it
+SYMBOLIC_OBSTACLES = 2
+SYMBOLIC_FEATURES = (
+    ['trex_height', 'jump_velocity', 'jumping', 'ducking', 'speed']
+    + [f"obstacle{i}_{name}" for i in range(SYMBOLIC_OBSTACLES)
+       for name in ('dx', 'y', 'width', 'height', 'flying')]
+)
+
+def symbolic_observations(game):
+    """(population, len(SYMBOLIC_FEATURES)) float32 array of normalized game state, one row per dino"""
+    # A plain Game (watch) is a population of one
+    trexes = getattr(game, 'trexes', [game.trex])
+    obs = np.zeros((len(trexes), len(SYMBOLIC_FEATURES)), dtype=np.float32)
+    width, height = dino_game.DEFAULT_WIDTH, dino_game.DEFAULT_HEIGHT
+    speed = game.current_speed / dino_game.Config.MAX_SPEED
+    # The course is shared: obstacles ahead of the dino are the same for everyone
+    x = trexes[0].x_pos
+    ahead = [o for o in game.horizon.obstacles if o.x_pos + o.width > x][:SYMBOLIC_OBSTACLES]
+    obstacle_features = []
+    for obstacle in ahead:
+        obstacle_features += [(obstacle.x_pos - x) / width, obstacle.y_pos / height, obstacle.width / width,
+                              obstacle.type_config.height / height,
+                              float(obstacle.type_config.name == 'PTERODACTYL')]
+    # Missing obstacles are far away
+    for _ in range(SYMBOLIC_OBSTACLES - len(ahead)):
+        obstacle_features += [1.0, 0.0, 0.0, 0.0, 0.0]
+    obs[:, 5:] = obstacle_features
+    obs[:, 4] = speed
+    for i, trex in enumerate(trexes):
+        obs[i, 0] = (trex.ground_y_pos - trex.y_pos) / height
+        obs[i, 1] = trex.jump_velocity / 10.0
+        obs[i, 2] = trex.jumping
+        obs[i, 3] = trex.ducking
+    return obs
+
+class PopulationEnv:
+    """
+    Batched counterpart of DinoPygameEnv for a population on one shared course (PopulationGame).
+    step() takes one action per dino and returns per-dino observations, rewards and dones;
+    a dead dino keeps done=True, zero reward and its last observation until the next reset.
+    observation: 'pixels' gives frame-stacked (N, H, W, FRAME_STACK) like VecFrameStack,
+    'symbolic' gives symbolic_observations rows.
+    """
+
+    def __init__(self, population, observation='pixels'):
+        if observation not in ('pixels', 'symbolic'):
+            raise ValueError(f"Unknown observation mode {observation!r}")
+        self.observation = observation
+        self.game = dino_game.PopulationGame(population, human_mode=True, indexed=Config.INDEXED_RENDER,
+                                             render_profile=render_profile())
+        self.population = population
+        self.frame_skip = Config.FRAME_SKIP
+        self.rng = np.random.default_rng()
+        if observation == 'pixels':
+            self.stacks = np.zeros((population, Config.TARGET_HEIGHT, Config.TARGET_WIDTH, Config.FRAME_STACK),
+                                   dtype=np.uint8)
+        self.dones = np.zeros(population, dtype=bool)
+
+    def reset(self, seed=None, start_speed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.game.seed(int(self.rng.integers(0, 2**32)))
+        self.game.restart(start_speed)
+        self.dones[:] = False
+        if self.observation == 'pixels':
+            self.stacks.fill(0)
+        # Jump to start, as DinoPygameEnv.reset does
+        self.game.step([1] * self.population, present=False)
+        return self._observe()
+
+    def step(self, actions):
+        rewards = np.zeros(self.population, dtype=np.float32)
+        actions = [int(a) for a in actions]
+        for _ in range(self.frame_skip):
+            was_alive = np.logical_not(self.dones)
+            # Ticks without drawing: observations draw once per decision
+            game = self.game
+            game.apply_actions(actions)
+            if game.playing and not game.crashed and not game.won:
+                game.update(MS_PER_FRAME)
+            state = game.get_state()
+            alive = np.array(state['alive'])
+            for i in np.flatnonzero(was_alive):
+                tick_state = {'crashed': not alive[i], 'speed': state['speed']}
+                rewards[i] += tick_reward(tick_state, actions[i])
+            self.dones = ~alive
+            if state['crashed'] or state['won']:
+                break
+        info = {'scores': state['scores'], 'won': state['won']}
+        return self._observe(), rewards, self.dones.copy(), info
+
+    def _observe(self):
+        if self.observation == 'symbolic':
+            return symbolic_observations(self.game)
+        for i in self.game.draw_agents():
+            self.stacks[i, ..., :-1] = self.stacks[i, ..., 1:]
+            self.stacks[i, ..., -1] = game_observation(self.game)[..., 0]
+        return self.stacks
+
+    def close(self):
+        import pygame
+        pygame.quit()
+
+def evaluate_population(models, episodes=1, seed=0, deterministic=True):
+    """
+    Let several trained models (anything with predict(), e.g. PPO, a DQN agent or an ES policy) play
+    the same seeded courses side by side. Returns a (len(models), episodes) array of scores.
+    Models with observation = 'symbolic' (ES policies) see symbolic_observations rows,
+    the others frame-stacked pixels.
+    """
+    symbolic = [getattr(model, 'observation', 'pixels') == 'symbolic' for model in models]
+    env = PopulationEnv(len(models), observation='symbolic' if all(symbolic) else 'pixels')
+    scores = np.zeros((len(models), episodes))
+    try:
+        for episode in range(episodes):
+            obs = env.reset(seed=seed + episode)
+            dones = np.zeros(len(models), dtype=bool)
+            while not dones.all():
+                # Mixed pixel and symbolic models: the symbolic rows are read from the same game
+                features = symbolic_observations(env.game) if any(symbolic) and not all(symbolic) else obs
+                actions = [0 if done else int(model.predict(features[i] if symbolic[i] else obs[i],
+                                                            deterministic=deterministic)[0])
+                           for i, (model, done) in enumerate(zip(models, dones))]
+                obs, _, dones, info = env.step(actions)
+                if info['won']:
+                    break
+            scores[:, episode] = info['scores']
+    finally:
+        env.close()
+    return scores * dino_game.DistanceMeter.COEFFICIENT
@@ -0,0 +1,90 @@
+import os
+import queue
+import threading
+
+import numpy as np
+import torch
+from stable_baselines3.common.vec_env import DummyVecEnv, VecFrameStack
+
+from config import Config
+from ai.dataset import TrajectoryDataset
+from ai.model import create_ppo_model
+from ai.training import MODELS_DIR, ensure_directories, make_env
+
+def iterate_minibatches(dataset, batch_size, epochs, seed=0, prefetch=8):
+    """
+    Stream shuffled (stacked obs, actions) minibatches from a memory-mapped dataset.
+    Batches are read on a background thread so disk reads overlap the optimizer steps.
+    """
+    batches = queue.Queue(maxsize=prefetch)
+
+    def _reader():
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(len(dataset))
+            for start in range(0, len(order) - batch_size + 1, batch_size):
+                # Sorted indices keep the reads within a shard mostly sequential
+                indices = np.sort(order[start:start + batch_size])
+                batches.put((dataset.stacked_obs(indices), dataset.gather('action', indices)))
+        batches.put(None)
+
+    thread = threading.Thread(target=_reader, daemon=True)
+    thread.start()
+    while True:
+        batch = batches.get()
+        if batch is None:
+            break
+        yield batch
+    thread.join()
+
+def pretrain(data_dir, epochs=None, out_path=None):
+    """Behavior cloning: fit the PPO actor to recorded demonstrations"""
+    ensure_directories()
+    epochs = epochs or Config.BC_EPOCHS
+    out_path = out_path or os.path.join(MODELS_DIR, "dino_bc_pretrained")
+
+    dataset = TrajectoryDataset(data_dir)
+    print(f"Dataset {data_dir}: {len(dataset)} steps")
+    if dataset.frame_skip != Config.FRAME_SKIP:
+        print(f"Warning: dataset frame skip {dataset.frame_skip} differs from FRAME_SKIP={Config.FRAME_SKIP}")
+
+    # The env only provides the spaces for the policy
+    env = VecFrameStack(DummyVecEnv([make_env(0)]), n_stack=Config.FRAME_STACK)
+    model = create_ppo_model(env, verbose=0)
+    policy = model.policy
+    policy.set_training_mode(True)
+    optimizer = torch.optim.Adam(policy.parameters(), lr=Config.BC_LEARNING_RATE)
+
+    steps_per_epoch = len(dataset) // Config.BC_BATCH_SIZE
+    running_loss = 0.0
+    running_accuracy = 0.0
+    try:
+        for step, (obs, actions) in enumerate(iterate_minibatches(dataset, Config.BC_BATCH_SIZE, epochs)):
+            obs_tensor, _ = policy.obs_to_tensor(obs)
+            action_tensor = torch.as_tensor(actions, dtype=torch.long, device=policy.device)
+
+            distribution = policy.get_distribution(obs_tensor)
+            loss = -distribution.log_prob(action_tensor).mean()
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+            with torch.no_grad():
+                predicted = distribution.distribution.probs.argmax(dim=1)
+                accuracy = (predicted == action_tensor).float().mean().item()
+            running_loss += loss.item()
+            running_accuracy += accuracy
+
+            if (step + 1) % 100 == 0:
+                print(f"Epoch {step // max(steps_per_epoch, 1) + 1}, step {step + 1}: "
+                      f"loss {running_loss / 100:.4f}, accuracy {running_accuracy / 100:.3f}")
+                running_loss = 0.0
+                running_accuracy = 0.0
+    except KeyboardInterrupt:
+        print("Pretraining interrupted.")
+    finally:
+        model.save(out_path)
+        env.close()
+        print(f"Pretrained model saved to {out_path}")
+    return out_path
@@ -10,6 +10,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from config import Config
+from ai.recording import EpisodeRecord, FLAG_JUMP_START, FLAG_COARSE, record_path
 
 # Import Game from dino-pygame
 # We insert at 0 to prioritize finding 'main' inside dino-pygame over the root main.py
@@ -20,7 +21,8 @@ if game_path not in sys.path:
 # Now we can import main, but we should be careful. 
 # It's better to import the module object to verify it's the right one, 
 # but simply prioritizing path usually works.
-from main import Game, MS_PER_FRAME
+import main as dino_game
+from main import Game, RenderProfile, FixedStepClock, MS_PER_FRAME, FPS
 
 # Cleanup path to avoid side effects for other modules
 try:
@@ -28,92 +30,214 @@ try:
 except ValueError:
     pass
 
+def preprocess_frame(frame):
+    """Convert a raw (H, W, 3) RGB game frame into a (H, W, 1) grayscale observation"""
+    # Resize to TARGET_WIDTH x TARGET_HEIGHT
+    resized = cv2.resize(frame, (Config.TARGET_WIDTH, Config.TARGET_HEIGHT), interpolation=cv2.INTER_AREA)
+    
+    # Grayscale
+    gray = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
+    
+    # Add channel dimension (H, W, 1)
+    final_obs = np.expand_dims(gray, axis=-1)
+    
+    return final_obs.astype(np.uint8)
+
+def preprocess_gray(gray):
+    """Resize a (H, W) grayscale frame into a (H, W, 1) observation"""
+    resized = cv2.resize(gray, (Config.TARGET_WIDTH, Config.TARGET_HEIGHT), interpolation=cv2.INTER_AREA)
+    return resized[..., np.newaxis]
+
+def render_profile():
+    """Observation layers selected in Config"""
+    return RenderProfile(clouds=Config.RENDER_CLOUDS, night_sky=Config.RENDER_NIGHT_SKY,
+                         score=Config.RENDER_SCORE, inversion=Config.RENDER_INVERSION)
+
+def crop_rect():
+    """Config crop of the game surface, None when it is the whole surface"""
+    rect = (Config.CROP_LEFT, Config.CROP_TOP, Config.CROP_WIDTH, Config.CROP_HEIGHT)
+    if rect == (0, 0, dino_game.DEFAULT_WIDTH, dino_game.DEFAULT_HEIGHT):
+        return None
+    return rect
+
+def game_observation(game):
+    """Observation of the cropped game frame (palette games skip the RGB frame entirely)"""
+    rect = crop_rect()
+    if game.indexed:
+        return preprocess_gray(game.get_gray_frame(rect))
+    return preprocess_frame(game.get_frame(rect))
+
+def crash_obstacle(game):
+    """Type name of the first visible obstacle (the one collisions are checked against), or None"""
+    for obstacle in game.horizon.obstacles:
+        if obstacle.x_pos + obstacle.width > 0:
+            return obstacle.type_config.name
+    return None
+
+def tick_reward(state, action):
+    """Reward of a single game tick"""
+    if state['crashed']:
+        return Config.REWARD_DEATH
+    
+    reward = Config.REWARD_ALIVE
+    reward += Config.REWARD_VELOCITY_MULTIPLIER * state['speed']
+    if action != 0:
+        reward += Config.REWARD_SPARSITY
+    return reward
+
 class DinoPygameEnv(gym.Env):
     metadata = {'render.modes': ['human', 'rgb_array']}
 
-    def __init__(self):
+    def __init__(self, start_options=None, record_dir=None):
         super(DinoPygameEnv, self).__init__()
         
         # Initialize Game
         # human_mode=False disables the window popup if we implement that logic properly, 
         # but for now we might want to see it or use SDL_VIDEODRIVER=dummy
-        self.game = Game(human_mode=True) 
+        self.game = Game(human_mode=True, indexed=Config.INDEXED_RENDER, render_profile=render_profile())
         
         # Actions: 0: Do Nothing, 1: Jump, 2: Duck
         self.action_space = spaces.Discrete(3)
         
-        # Observations: Grayscale 84x84
-        # Shape: (84, 84, 1)
+        # Observations: Grayscale crop resized to TARGET_HEIGHT x TARGET_WIDTH
+        # Shape: (TARGET_HEIGHT, TARGET_WIDTH, 1)
         self.observation_space = spaces.Box(
             low=0, high=255, 
             shape=(Config.TARGET_HEIGHT, Config.TARGET_WIDTH, 1), 
             dtype=np.uint8
         )
         
-        self.frame_skip = 4
+        self.frame_skip = Config.FRAME_SKIP
+        # One coarse game step per decision instead of frame_skip single ticks
+        self.coarse = Config.COARSE_STEP and self.frame_skip > 1
+        
+        # Default start-state sampling, overridable per reset via options
+        self.start_options = {
+            'start_speed': Config.WARM_START_SPEED_RANGE,
+            'warm_start_prob': Config.WARM_START_PROB,
+            'obstacle_x': Config.WARM_START_OBSTACLE_X,
+        }
+        if start_options:
+            self.start_options.update(start_options)
+        
+        # Optional seed+action recording of every episode
+        self.record_dir = record_dir
+        self.episode_record = None
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         
-        self.game.restart()
+        self._save_record()
+        
+        # Every episode gets its own seed so it can be replayed exactly
+        episode_seed = int(self.np_random.integers(0, 2**32))
+        self.game.seed(episode_seed)
+        
+        start_speed, start_distance, obstacle_x = self._sample_start(options)
+        self.game.restart(start_speed, start_distance, obstacle_x)
+        info = {'start_speed': self.game.current_speed, 'episode_seed': episode_seed}
+        
+        if self.record_dir:
+            flags = FLAG_JUMP_START | (FLAG_COARSE if self.coarse else 0)
+            self.episode_record = EpisodeRecord(
+                episode_seed, self.frame_skip, flags, self.game.episode_start
+            )
         # Ensure game is in playing state (start running)
         self.game.step(1) # Jump to start
         
         observation = self._get_observation()
-        info = {}
         return observation, info
 
+    def _sample_start(self, options=None):
+        """
+        Pick the start state of an episode.
+        options may hold 'start_speed' or 'start_distance' (a value or a (low, high) range),
+        'warm_start_prob' (share of warm starts, the rest are normal starts) and 'obstacle_x'.
+        Returns (None, None, None) for a normal start.
+        """
+        opts = dict(self.start_options)
+        if options:
+            opts.update(options)
+            # An explicit distance takes precedence over the default speed range
+            if 'start_distance' in options and 'start_speed' not in options:
+                opts['start_speed'] = None
+            # Explicit start values imply a warm start unless a probability is given
+            if ('start_speed' in options or 'start_distance' in options) and 'warm_start_prob' not in options:
+                opts['warm_start_prob'] = 1.0
+        
+        if self.np_random.random() >= opts.get('warm_start_prob', 0.0):
+            return None, None, None
+        
+        start_speed = self._sample_value(opts.get('start_speed'))
+        start_distance = self._sample_value(opts.get('start_distance'))
+        if start_distance is not None:
+            start_speed = None
+        return start_speed, start_distance, opts.get('obstacle_x')
+
+    def _sample_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, (tuple, list)):
+            low, high = value
+            return float(self.np_random.uniform(low, high))
+        return float(value)
+
     def step(self, action):
         total_reward = 0
         terminated = False
         truncated = False
         info = {}
         
-        # Frame Skipping
-        for _ in range(self.frame_skip):
-            state = self.game.step(action)
-            
-            # Accumulate reward
-            step_reward = 0
-            if state['crashed']:
-                step_reward = Config.REWARD_DEATH
-                terminated = True
-            else:
-                step_reward += Config.REWARD_ALIVE
-                step_reward += Config.REWARD_VELOCITY_MULTIPLIER * state['speed']
-                if action != 0:
-                    step_reward += Config.REWARD_SPARSITY
-            
-            total_reward += step_reward
-            
-            if terminated:
-                break
+        if self.episode_record is not None:
+            self.episode_record.actions.append(int(action))
+        
+        if self.coarse:
+            state = self.game.step(action, frames=self.frame_skip)
+            # Every tick but the last one was survived
+            ticks = max(state['frames'], 1)
+            total_reward = tick_reward(dict(state, crashed=False), action) * (ticks - 1)
+            total_reward += tick_reward(state, action)
+            terminated = state['crashed']
+        else:
+            # Frame Skipping
+            for _ in range(self.frame_skip):
+                state = self.game.step(action)
+                
+                # Accumulate reward
+                total_reward += tick_reward(state, action)
+                if state['crashed']:
+                    terminated = True
+                
+                if terminated:
+                    break
         
         observation = self._get_observation()
         info['score'] = state['score']
         
+        if terminated:
+            info['speed'] = state['speed']
+            info['obstacle'] = crash_obstacle(self.game)
+            self._save_record()
+        
         return observation, total_reward, terminated, truncated, info
 
+    def _save_record(self):
+        if self.episode_record is None or not self.episode_record.actions:
+            return
+        self.episode_record.score = self.game.distance_ran
+        self.episode_record.save(record_path(self.record_dir, "agent"))
+        self.episode_record = None
+
     def _get_observation(self):
-        # 1. Get raw frame from game (H, W, 3)
-        frame = self.game.get_frame()
-        
-        # 2. Preprocessing
-        # Resize to 84x84
-        resized = cv2.resize(frame, (Config.TARGET_WIDTH, Config.TARGET_HEIGHT), interpolation=cv2.INTER_AREA)
-        
-        # Grayscale
-        gray = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
-        
-        # Add channel dimension (H, W, 1)
-        final_obs = np.expand_dims(gray, axis=-1)
-        
-        return final_obs.astype(np.uint8)
+        return game_observation(self.game)
 
     def render(self, mode='human'):
         # Game class handles rendering to screen in step()
         pass
 
     def close(self):
+        self._save_record()
         import pygame
         pygame.quit()
@@ -0,0 +1,153 @@
+import math
+import os
+import struct
+import time
+
+# Binary episode record:
+#   header  - magic, version, frame skip, flags, seed, start state, final score, action count
+#   actions - one action per decision, 2 bits each, 4 actions per byte
+MAGIC = b'DREC'
+# Version 2: obstacles come from the per-seed ObstacleCourse; version 1 records replay the old rng stream
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct('<4sBBBxQddddI')
+
+# The episode starts with one extra tick of action 1 after restart (DinoPygameEnv.reset)
+FLAG_JUMP_START = 1
+# Each action was simulated as one coarse step of frame_skip ticks (Game.step(action, frames))
+FLAG_COARSE = 2
+
+RECORD_EXTENSION = '.drec'
+
+def pack_actions(actions):
+    """Pack actions (0-3) into bytes, 4 per byte"""
+    packed = bytearray((len(actions) + 3) // 4)
+    for i, action in enumerate(actions):
+        packed[i >> 2] |= (action & 3) << ((i & 3) * 2)
+    return bytes(packed)
+
+def unpack_actions(packed, count):
+    return [(packed[i >> 2] >> ((i & 3) * 2)) & 3 for i in range(count)]
+
+def _to_float(value):
+    return math.nan if value is None else float(value)
+
+def _from_float(value):
+    return None if math.isnan(value) else value
+
+class EpisodeRecord:
+    """Everything needed to re-simulate an episode: seed, start state and the actions"""
+
+    def __init__(self, seed, frame_skip=1, flags=0, start=(None, None, None)):
+        self.seed = seed
+        self.frame_skip = frame_skip
+        self.flags = flags
+        self.start_speed, self.start_distance, self.obstacle_x = start
+        self.actions = []
+        self.score = None
+        self.version = VERSION
+
+    @property
+    def start(self):
+        return self.start_speed, self.start_distance, self.obstacle_x
+
+    def to_bytes(self):
+        header = HEADER.pack(
+            MAGIC, self.version, self.frame_skip, self.flags, self.seed,
+            _to_float(self.start_speed), _to_float(self.start_distance), _to_float(self.obstacle_x),
+            _to_float(self.score), len(self.actions)
+        )
+        return header + pack_actions(self.actions)
+
+    @classmethod
+    def from_bytes(cls, data):
+        (magic, version, frame_skip, flags, seed,
+         start_speed, start_distance, obstacle_x, score, count) = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not an episode record")
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported episode record version {version}")
+
+        record = cls(seed, frame_skip, flags,
+                     (_from_float(start_speed), _from_float(start_distance), _from_float(obstacle_x)))
+        record.score = _from_float(score)
+        record.version = version
+        record.actions = unpack_actions(data[HEADER.size:], count)
+        return record
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+def record_path(out_dir, prefix):
+    """Unique file name for a new record"""
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    index = 0
+    while True:
+        path = os.path.join(out_dir, f"{prefix}_{stamp}_{index:03d}{RECORD_EXTENSION}")
+        if not os.path.exists(path):
+            return path
+        index += 1
+
+class EpisodeRecorder:
+    """Records human episodes of Game.run (attach via game.recorders)"""
+
+    def __init__(self, out_dir, prefix="human"):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.episode = None
+        os.makedirs(out_dir, exist_ok=True)
+
+    def start_episode(self, game):
+        self.episode = EpisodeRecord(game.episode_seed, frame_skip=1, start=game.episode_start)
+
+    def record(self, game, action, state):
+        self.episode.actions.append(action)
+
+    def end_episode(self, game):
+        if self.episode is None:
+            return
+        self.episode.score = game.distance_ran
+        path = record_path(self.out_dir, self.prefix)
+        self.episode.save(path)
+        print(f"Episode recorded: {path} ({len(self.episode.actions)} actions)")
+        self.episode = None
+
+def simulate(record, game, on_tick=None, present=True):
+    """
+    Re-simulate a recorded episode on a Game.
+    on_tick(game, state) is called after every game tick (every coarse step for coarse records).
+    present=False leaves the window alone (the caller redraws it).
+    Returns the final game state.
+    """
+    game.seed(record.seed, legacy_obstacles=record.version < 2)
+    game.restart(*record.start)
+
+    state = game.get_state()
+    if record.flags & FLAG_JUMP_START:
+        state = game.step(1, present=present)
+        if on_tick:
+            on_tick(game, state)
+
+    for action in record.actions:
+        if record.flags & FLAG_COARSE:
+            state = game.step(action, frames=record.frame_skip, present=present)
+            if on_tick:
+                on_tick(game, state)
+            if state['crashed'] or state['won']:
+                break
+            continue
+        for _ in range(record.frame_skip):
+            state = game.step(action, present=present)
+            if on_tick:
+                on_tick(game, state)
+            if state['crashed'] or state['won']:
+                break
+        if state['crashed'] or state['won']:
+            break
+    return state
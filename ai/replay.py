@@ -0,0 +1,64 @@
+import cv2
+import pygame
+
+from ai.pygame_env import Game, FixedStepClock, FPS
+from ai.recording import EpisodeRecord, simulate
+
+def replay(path, width=None, height=None, video_path=None, fps=FPS, turbo=1):
+    """
+    Re-simulate a recorded episode and show it in a window of any size,
+    or export it to a video file (rendered as fast as possible).
+    turbo speeds up the window playback (0: as fast as possible, Tab cycles).
+    """
+    record = EpisodeRecord.load(path)
+    print(f"Replaying {path}: seed {record.seed}, {len(record.actions)} actions, frame skip {record.frame_skip}")
+
+    game = Game(human_mode=True)
+    if width and height:
+        game.resize_window(width, height)
+
+    writer = None
+    if video_path:
+        fourcc = cv2.VideoWriter_fourcc(*('mp4v' if video_path.endswith('.mp4') else 'XVID'))
+        writer = cv2.VideoWriter(video_path, fourcc, fps, (game.window_width, game.window_height))
+
+    class Stop(Exception):
+        pass
+
+    game.turbo = turbo
+    step_clock = FixedStepClock(fps)
+    frame_ticks = step_clock.ticks(game.turbo)
+
+    def on_tick(game, state):
+        nonlocal frame_ticks
+        if writer is not None:
+            # Screen is (W, H, 3) RGB, VideoWriter expects (H, W, 3) BGR
+            frame = pygame.surfarray.array3d(game.screen).swapaxes(0, 1)
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+            if not game.handle_events(keyboard=False):
+                raise Stop()
+            return
+        # Ticks are paced by the fixed-step clock: the window is redrawn once its frame's ticks are done
+        while next(frame_ticks, Stop) is Stop:
+            game.render_to_screen()
+            if not game.handle_events(keyboard=False):
+                raise Stop()
+            frame_ticks = step_clock.ticks(game.turbo)
+
+    try:
+        state = simulate(record, game, on_tick, present=writer is not None)
+        if writer is None:
+            game.render_to_screen()
+        score = game.distance_meter.get_actual_distance(state['score'])
+        print(f"Replay finished: score {score}, crashed {state['crashed']}")
+        if record.score is not None:
+            matches = abs(state['score'] - record.score) < 1e-6
+            print(f"Recorded score {game.distance_meter.get_actual_distance(record.score)} - "
+                  f"{'replay matches' if matches else 'REPLAY DIVERGED'}")
+    except Stop:
+        print("Replay stopped.")
+    finally:
+        if writer is not None:
+            writer.release()
+            print(f"Video saved to {video_path}")
+        pygame.quit()
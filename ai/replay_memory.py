@@ -0,0 +1,166 @@
+import numpy as np
+
+class SumTree:
+    """
+    Binary tree of priorities where every node holds the sum of its children:
+    updates and proportional sampling are O(log capacity) per item.
+    """
+
+    def __init__(self, capacity):
+        self.leaves = 1
+        while self.leaves < capacity:
+            self.leaves *= 2
+        self.depth = self.leaves.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[self.leaves + np.asarray(indices)]
+
+    def update(self, indices, priorities):
+        nodes = self.leaves + np.asarray(indices, dtype=np.int64)
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """Leaf indices whose prefix-sum interval contains each value"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= self.tree[left] * go_right
+            nodes = left + go_right
+        return nodes - self.leaves
+
+class FrameReplay:
+    """
+    Replay memory for a single env that stores every observation frame once, in a circular
+    array, and rebuilds frame stacks and n-step transitions by index at sample time
+    (a stacked buffer would hold each frame FRAME_STACK times, twice for next states).
+    Slot i holds frame i and the action, reward and done that followed it.
+    Stacks are zero-padded before the first frame of an episode, as VecFrameStack does.
+    Sampling is proportional to priority ** alpha through a sum-tree; alpha = 0 is uniform.
+    """
+
+    def __init__(self, capacity, frame_shape, n_stack, n_step=1, gamma=0.99, alpha=0.0):
+        self.capacity = capacity
+        self.n_stack = n_stack
+        self.n_step = n_step
+        self.gamma = gamma
+        self.alpha = alpha
+
+        self.frames = np.zeros((capacity,) + tuple(frame_shape), dtype=np.uint8)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+        self.firsts = np.zeros(capacity, dtype=np.bool_)
+
+        # A slot's priority is 0 until its n-step transition is complete (not sampleable)
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+
+        self.pos = 0  # Slot of the newest frame, whose action is not known yet
+        self.size = 0  # Transitions that can be sampled
+        self.episode_steps = 0
+
+    def _write_frame(self, frame, first):
+        self.frames[self.pos] = frame
+        self.firsts[self.pos] = first
+        # The overwritten transition and the stacks that looked back at its frame are gone
+        stale = (self.pos + np.arange(self.n_stack)) % self.capacity
+        self.size -= int(np.count_nonzero(self.tree.get(stale)))
+        self.tree.update(stale, 0.0)
+
+    def _validate(self, slots):
+        slots = np.asarray(slots, dtype=np.int64) % self.capacity
+        self.tree.update(slots, self.max_priority ** self.alpha)
+        self.size += len(slots)
+
+    def start_episode(self, frame):
+        self._write_frame(frame, True)
+        self.episode_steps = 0
+
+    def add(self, action, reward, done, next_frame):
+        """Record the action taken on the newest frame and its outcome"""
+        self.actions[self.pos] = action
+        self.rewards[self.pos] = reward
+        self.dones[self.pos] = done
+        self.episode_steps += 1
+
+        if done:
+            # Every pending window of the episode ends here: no next state needed
+            pending = min(self.episode_steps, self.n_step)
+            self._validate(self.pos - np.arange(pending))
+            self.pos = (self.pos + 1) % self.capacity
+            # The next frame is the first one of the new episode (start_episode)
+            return
+        self.pos = (self.pos + 1) % self.capacity
+        self._write_frame(next_frame, False)
+        if self.episode_steps >= self.n_step:
+            self._validate([self.pos - self.n_step])
+
+    def stack(self, slots):
+        """Frame stacks ending at the given slots, (batch, n_stack, *frame_shape)"""
+        slots = np.asarray(slots, dtype=np.int64)
+        out = np.empty((len(slots), self.n_stack) + self.frames.shape[1:], dtype=np.uint8)
+        # Frames before the first one of the episode are zeros
+        blocked = np.zeros(len(slots), dtype=np.bool_)
+        for k in range(self.n_stack):
+            ids = (slots - k) % self.capacity
+            out[:, self.n_stack - 1 - k] = self.frames[ids]
+            out[blocked, self.n_stack - 1 - k] = 0
+            blocked |= self.firsts[ids]
+        return out
+
+    def current_stack(self):
+        """Stack ending at the newest frame: the observation to act on"""
+        return self.stack([self.pos])[0]
+
+    def sample(self, batch_size, beta=0.4, rng=np.random):
+        """
+        Stratified proportional sample of n-step transitions.
+        Returns a dict with obs, actions, returns, next_obs, discounts (gamma^n, 0 after a done),
+        the slot indices and the importance-sampling weights (normalized to max 1).
+        """
+        total = self.tree.total
+        bounds = np.linspace(0.0, total, batch_size + 1)
+        values = rng.uniform(bounds[:-1], bounds[1:])
+        slots = self.tree.find(np.minimum(values, np.nextafter(total, 0)))
+        # Float rounding can land on an empty leaf next to a boundary
+        empty = self.tree.get(slots) <= 0
+        while empty.any():
+            slots[empty] = self.tree.find(rng.uniform(0.0, total, empty.sum()))
+            empty = self.tree.get(slots) <= 0
+
+        returns = np.zeros(batch_size, dtype=np.float32)
+        alive = np.ones(batch_size, dtype=np.bool_)
+        for m in range(self.n_step):
+            ids = (slots + m) % self.capacity
+            returns += alive * (self.gamma ** m) * self.rewards[ids]
+            alive &= ~self.dones[ids]
+        next_slots = (slots + self.n_step) % self.capacity
+
+        probs = self.tree.get(slots) / total
+        weights = (self.size * probs) ** (-beta)
+        weights /= weights.max()
+
+        return {
+            'obs': self.stack(slots),
+            'actions': self.actions[slots],
+            'returns': returns,
+            'next_obs': self.stack(next_slots),
+            'discounts': (alive * self.gamma ** self.n_step).astype(np.float32),
+            'indices': slots,
+            'weights': weights.astype(np.float32),
+        }
+
+    def update_priorities(self, indices, priorities):
+        priorities = np.asarray(priorities, dtype=np.float64)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
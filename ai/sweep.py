@@ -0,0 +1,271 @@
+import csv
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+
+SWEEPS_DIR = os.path.join(Config.BASE_DIR, "logs", "sweeps")
+
+# Defaults for optional spec fields
+SPEC_DEFAULTS = {
+    'method': 'grid',
+    'num_trials': 8,
+    'timesteps': 100_000,
+    'max_parallel': max(1, (os.cpu_count() or 2) // 2),
+    'n_envs': 1,
+    'report_every': 10_000,
+    'score_window': 20,
+    'grace_fraction': 0.25,
+    'seed': 0,
+}
+
+def load_spec(path):
+    """
+    Sweep spec (JSON):
+      params      - Config name -> list of values, or {"low": a, "high": b, "log": bool} (random only)
+      method      - "grid" or "random"
+      num_trials  - number of random trials
+      timesteps   - env steps per trial
+      max_parallel, n_envs, report_every, score_window, grace_fraction, seed
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    for key, value in SPEC_DEFAULTS.items():
+        spec.setdefault(key, value)
+    spec.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+
+    for name in spec['params']:
+        if not hasattr(Config, name):
+            raise ValueError(f"Unknown Config value in sweep spec: {name}")
+    return spec
+
+def generate_trials(spec):
+    """List of Config override dicts"""
+    params = spec['params']
+    names = sorted(params)
+
+    if spec['method'] == 'grid':
+        for name in names:
+            if not isinstance(params[name], list):
+                raise ValueError(f"Grid search needs a list of values for {name}")
+        return [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+
+    rng = random.Random(spec['seed'])
+    trials = []
+    for _ in range(spec['num_trials']):
+        overrides = {}
+        for name in names:
+            space = params[name]
+            if isinstance(space, list):
+                overrides[name] = rng.choice(space)
+            elif space.get('log'):
+                overrides[name] = math.exp(rng.uniform(math.log(space['low']), math.log(space['high'])))
+            else:
+                overrides[name] = rng.uniform(space['low'], space['high'])
+            # Keep integer settings integer
+            if isinstance(getattr(Config, name), int) and not isinstance(getattr(Config, name), bool):
+                overrides[name] = int(round(overrides[name]))
+        trials.append(overrides)
+    return trials
+
+def _run_trial(trial_id, overrides, spec, reports, stop_event):
+    """Trial worker: short headless PPO run with its own Config overrides"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    for name, value in overrides.items():
+        setattr(Config, name, value)
+
+    from stable_baselines3.common.callbacks import BaseCallback
+    from stable_baselines3.common.vec_env import VecFrameStack, VecMonitor
+    from ai.model import create_ppo_model
+    from ai.training import build_vec_env
+    from ai.pygame_env import dino_game
+
+    class ReportCallback(BaseCallback):
+        def __init__(self):
+            super().__init__()
+            self.start_time = time.time()
+            self.scores = []
+            self.next_report = spec['report_every']
+            self.last_reported = 0
+            # The stop event is a Manager proxy (one RPC per check): only polled when reporting
+            self.stopped = False
+
+        def _on_step(self):
+            for info, done in zip(self.locals['infos'], self.locals['dones']):
+                if done and 'score' in info:
+                    self.scores.append(info['score'] * dino_game.DistanceMeter.COEFFICIENT)
+            if self.num_timesteps >= self.next_report:
+                self.next_report += spec['report_every']
+                self.report()
+                self.stopped = stop_event.is_set()
+            return not self.stopped
+
+        def report(self):
+            if self.num_timesteps == self.last_reported:
+                return
+            self.last_reported = self.num_timesteps
+            recent = self.scores[-spec['score_window']:]
+            reports.put({
+                'trial': trial_id,
+                'steps': self.num_timesteps,
+                'elapsed': time.time() - self.start_time,
+                'episodes': len(self.scores),
+                'mean_score': sum(recent) / len(recent) if recent else 0.0,
+            })
+
+    env = build_vec_env(spec['n_envs'])
+    env = VecFrameStack(env, n_stack=Config.FRAME_STACK)
+    env = VecMonitor(env)
+    model = create_ppo_model(env, verbose=0)
+    callback = ReportCallback()
+    try:
+        model.learn(total_timesteps=spec['timesteps'], callback=callback)
+        callback.report()
+    finally:
+        env.close()
+    return 'stopped' if stop_event.is_set() else 'completed'
+
+class TrialState:
+    def __init__(self, trial_id, overrides):
+        self.trial_id = trial_id
+        self.overrides = overrides
+        self.curve = []  # reports in order
+        self.status = 'pending'
+
+    @property
+    def best(self):
+        return max((r['mean_score'] for r in self.curve), default=0.0)
+
+    def best_at(self, steps):
+        return max((r['mean_score'] for r in self.curve if r['steps'] <= steps), default=None)
+
+    def summary(self):
+        row = {'trial': self.trial_id, 'status': self.status}
+        row.update(self.overrides)
+        if self.curve:
+            last = self.curve[-1]
+            best = max(self.curve, key=lambda r: r['mean_score'])
+            row.update({
+                'steps': last['steps'],
+                'wall_s': round(last['elapsed'], 1),
+                'final_score': round(last['mean_score'], 1),
+                'best_score': round(best['mean_score'], 1),
+                'steps_to_best': best['steps'],
+                'wall_s_to_best': round(best['elapsed'], 1),
+                # Mean of the learning curve: rewards trials that get good early
+                'curve_mean': round(sum(r['mean_score'] for r in self.curve) / len(self.curve), 1),
+                'score_per_min': round(best['mean_score'] / max(best['elapsed'] / 60, 1e-9), 1),
+            })
+        return row
+
+def _should_stop(trial, trials, spec):
+    """Median stopping rule: stop a trial whose best score is below the median of its peers at the same step"""
+    if not trial.curve:
+        return False
+    steps = trial.curve[-1]['steps']
+    if steps < spec['grace_fraction'] * spec['timesteps']:
+        return False
+    peers = [t.best_at(steps) for t in trials if t is not trial]
+    peers = sorted(p for p in peers if p is not None)
+    if len(peers) < 2:
+        return False
+    median = peers[len(peers) // 2] if len(peers) % 2 else (peers[len(peers) // 2 - 1] + peers[len(peers) // 2]) / 2
+    return trial.best < median
+
+def run_sweep(spec_path):
+    spec = load_spec(spec_path)
+    overrides = generate_trials(spec)
+    out_dir = os.path.join(SWEEPS_DIR, spec['name'])
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"Sweep {spec['name']}: {len(overrides)} trials, {spec['max_parallel']} in parallel, "
+          f"{spec['timesteps']} steps each")
+
+    trials = [TrialState(i, o) for i, o in enumerate(overrides)]
+    context = mp.get_context('spawn')
+    with mp.Manager() as manager:
+        reports = manager.Queue()
+        stop_events = [manager.Event() for _ in trials]
+        with ProcessPoolExecutor(max_workers=spec['max_parallel'], mp_context=context) as pool:
+            futures = {}
+            for trial in trials:
+                future = pool.submit(_run_trial, trial.trial_id, trial.overrides, spec,
+                                     reports, stop_events[trial.trial_id])
+                futures[future] = trial
+                trial.status = 'queued'
+
+            pending = set(futures)
+            while pending:
+                try:
+                    report = reports.get(timeout=1.0)
+                except queue.Empty:
+                    report = None
+
+                if report is not None:
+                    trial = trials[report['trial']]
+                    trial.status = 'running'
+                    trial.curve.append(report)
+                    print(f"[trial {trial.trial_id}] {report['steps']} steps, {report['elapsed']:.0f}s: "
+                          f"mean score {report['mean_score']:.1f}")
+                    if not stop_events[trial.trial_id].is_set() and _should_stop(trial, trials, spec):
+                        print(f"[trial {trial.trial_id}] stopped early (below median)")
+                        stop_events[trial.trial_id].set()
+
+                for future in [f for f in pending if f.done()]:
+                    pending.discard(future)
+                    trial = futures[future]
+                    try:
+                        trial.status = future.result()
+                    except Exception as e:
+                        trial.status = 'failed'
+                        print(f"[trial {trial.trial_id}] failed: {e}")
+
+            # Reports that arrived after the last trial finished
+            while True:
+                try:
+                    report = reports.get_nowait()
+                except queue.Empty:
+                    break
+                trials[report['trial']].curve.append(report)
+
+    rows = [t.summary() for t in trials]
+    rows.sort(key=lambda r: r.get('best_score', -1), reverse=True)
+    _write_results(out_dir, rows, trials)
+    _print_table(rows)
+    return rows
+
+def _write_results(out_dir, rows, trials):
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    results_path = os.path.join(out_dir, "results.csv")
+    with open(results_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(out_dir, "curves.json"), 'w') as f:
+        json.dump({t.trial_id: t.curve for t in trials}, f)
+    print(f"Results saved to {results_path}")
+
+def _print_table(rows):
+    if not rows:
+        return
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    widths = {c: max(len(c), *(len(str(r.get(c, ''))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c, '')).ljust(widths[c]) for c in columns))
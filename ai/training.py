@@ -1,51 +1,109 @@
+import multiprocessing as mp
 import os
+import random
 import time
+
+import numpy as np
 from stable_baselines3.common.vec_env import SubprocVecEnv, VecFrameStack, VecMonitor, DummyVecEnv
 from stable_baselines3.common.callbacks import CheckpointCallback
 
 from config import Config
 from ai.pygame_env import DinoPygameEnv
 from ai.model import create_ppo_model
+from ai.callbacks import ThroughputCallback
+from ai.episode_log import VecEpisodeLogger
+from ai.video import VideoRecorder, video_enabled
 
 # --- Directory Setup ---
 LOGS_DIR = os.path.join(Config.BASE_DIR, "logs")
 MODELS_DIR = os.path.join(Config.BASE_DIR, "ai", "models")
 CHECKPOINTS_DIR = os.path.join(MODELS_DIR, "checkpoints")
 TENSORBOARD_DIR = os.path.join(LOGS_DIR, "tensorboard")
+EPISODES_DIR = os.path.join(LOGS_DIR, "episodes")
+VIDEOS_DIR = os.path.join(LOGS_DIR, "videos")
 
 def ensure_directories():
     """Create all required directories"""
-    for dir_path in [LOGS_DIR, MODELS_DIR, CHECKPOINTS_DIR, TENSORBOARD_DIR]:
+    for dir_path in [LOGS_DIR, MODELS_DIR, CHECKPOINTS_DIR, TENSORBOARD_DIR, EPISODES_DIR, VIDEOS_DIR]:
         os.makedirs(dir_path, exist_ok=True)
     print(f"Directories ready: logs={LOGS_DIR}, models={MODELS_DIR}")
 
+def create_env(env_id):
+    """DinoPygameEnv; the first env records episode videos when a VIDEO_* trigger is set"""
+    env = DinoPygameEnv()
+    if env_id == 0 and video_enabled():
+        env = VideoRecorder(env, VIDEOS_DIR)
+    return env
+
 def make_env(env_id):
     def _init():
-        env = DinoPygameEnv()
-        return env
+        return create_env(env_id)
     return _init
 
-def train():
+def make_worker_env(env_id, config):
+    """
+    make_env for a SubprocVecEnv worker: applies the parent's Config values (spawned and
+    forkserver workers import config.py fresh, without the overrides of e.g. a sweep trial)
+    and reseeds the RNGs shared with its siblings
+    """
+    def _init():
+        for name, value in config.items():
+            setattr(Config, name, value)
+        random.seed()
+        np.random.seed()
+        return create_env(env_id)
+    return _init
+
+def config_snapshot():
+    return {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+
+def preload_forkserver():
+    """
+    Have the forkserver import and load everything in ai.env_preload before forking workers.
+    Only takes effect if the forkserver of this process is not running yet.
+    """
+    # The forkserver does not get the parent's sys.path
+    python_path = os.environ.get("PYTHONPATH", "")
+    if Config.BASE_DIR not in python_path.split(os.pathsep):
+        os.environ["PYTHONPATH"] = os.pathsep.join(p for p in (Config.BASE_DIR, python_path) if p)
+    context = mp.get_context('forkserver')
+    context.set_forkserver_preload(['ai.env_preload'])
+    return context
+
+def build_vec_env(n_envs):
+    """Vectorized DinoPygameEnv without wrappers"""
+    # Pygame might have issues with SubprocVecEnv on some systems (window management)
+    # Using DummyVecEnv for single environment is safer and easier to debug
+    if n_envs == 1:
+        return DummyVecEnv([make_env(0)])
+    config = config_snapshot()
+    if 'forkserver' not in mp.get_all_start_methods():
+        return SubprocVecEnv([make_worker_env(i, config) for i in range(n_envs)])
+    # Workers fork from a server that has pygame, the game and its sprites loaded
+    preload_forkserver()
+    return SubprocVecEnv([make_worker_env(i, config) for i in range(n_envs)], start_method='forkserver')
+
+def train(init_model=None):
     # 0. Setup directories
     ensure_directories()
     
     # 1. Create Vectorized Environment
     cpu_count = Config.N_ENVS
     print(f"Starting {cpu_count} environment(s)...")
-    
-    # Pygame might have issues with SubprocVecEnv on some systems (window management)
-    # Using DummyVecEnv for single environment is safer and easier to debug
-    if cpu_count == 1:
-        env = DummyVecEnv([make_env(0)])
-    else:
-        env = SubprocVecEnv([make_env(i) for i in range(cpu_count)])
+    env = build_vec_env(cpu_count)
     
     # 2. Apply Wrappers
     env = VecFrameStack(env, n_stack=Config.FRAME_STACK)
-    env = VecMonitor(env, filename=os.path.join(LOGS_DIR, "monitor"))
+    # Episode stats go to a columnar binary log (ai.episode_log); VecMonitor only feeds the SB3 logger
+    env = VecEpisodeLogger(env, os.path.join(EPISODES_DIR, time.strftime("run_%Y%m%d_%H%M%S")))
+    env = VecMonitor(env)
 
     # 3. Create Model
     model = create_ppo_model(env, tensorboard_log=TENSORBOARD_DIR)
+    if init_model:
+        # Warm start from pretrained weights (e.g. behavior cloning)
+        model.set_parameters(init_model)
+        print(f"Initialized weights from {init_model}")
 
     # 4. Callbacks
     checkpoint_callback = CheckpointCallback(
@@ -59,7 +117,7 @@ def train():
     try:
         model.learn(
             total_timesteps=Config.TOTAL_TIMESTEPS, 
-            callback=[checkpoint_callback]
+            callback=[checkpoint_callback, ThroughputCallback()]
         )
     except KeyboardInterrupt:
         print("Training interrupted.")
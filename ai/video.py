@@ -0,0 +1,140 @@
+import os
+import queue
+import threading
+
+import cv2
+import gymnasium as gym
+import numpy as np
+import pygame
+
+from config import Config
+from ai.pygame_env import FPS
+
+def video_enabled():
+    return bool(Config.VIDEO_EVERY or Config.VIDEO_BEST or Config.VIDEO_CRASH_SCORE is not None)
+
+class VideoRecorder(gym.Wrapper):
+    """
+    Records selected episodes of a DinoPygameEnv to video files:
+    every VIDEO_EVERY-th episode, episodes with a new best score (VIDEO_BEST) and
+    crashes at or above VIDEO_CRASH_SCORE points.
+    The step only blits the game frame into a pooled surface; downscaling and encoding happen
+    on a writer thread. When all VIDEO_QUEUE_SIZE pooled frames are waiting for the writer,
+    new frames are dropped and counted in dropped_frames.
+    Best-score and crash triggers are only known at the end, so with them on every episode is
+    encoded to a partial file that is renamed or deleted when the episode ends.
+    """
+
+    def __init__(self, env, video_dir, prefix="episode"):
+        super().__init__(env)
+        self.video_dir = video_dir
+        self.prefix = prefix
+        self.extension = Config.VIDEO_FORMAT
+        self.fps = FPS / self.env.unwrapped.frame_skip
+        os.makedirs(video_dir, exist_ok=True)
+
+        self.episode = 0
+        self.every = False
+        self.capturing = False
+        self.best_score = None
+        self.dropped_frames = 0
+        self.videos = 0
+
+        # Pooled frame surfaces: created on demand up to VIDEO_QUEUE_SIZE, handed back by the writer
+        self._free = queue.SimpleQueue()
+        self._pooled = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def reset(self, **kwargs):
+        if self.capturing:
+            self._end_episode(self.env.unwrapped.game.get_state(), terminated=False)
+        observation, info = self.env.reset(**kwargs)
+        self.episode += 1
+        self.every = bool(Config.VIDEO_EVERY) and self.episode % Config.VIDEO_EVERY == 0
+        self.capturing = self.every or Config.VIDEO_BEST or Config.VIDEO_CRASH_SCORE is not None
+        if self.capturing:
+            self._grab()
+        return observation, info
+
+    def step(self, action):
+        observation, reward, terminated, truncated, info = self.env.step(action)
+        if self.capturing:
+            self._grab()
+            if terminated or truncated:
+                self._end_episode(self.env.unwrapped.game.get_state(), terminated)
+        return observation, reward, terminated, truncated, info
+
+    def _grab(self):
+        surface = self.env.unwrapped.game.game_surface
+        try:
+            frame = self._free.get_nowait()
+        except queue.Empty:
+            if self._pooled >= Config.VIDEO_QUEUE_SIZE:
+                self.dropped_frames += 1
+                return
+            frame = surface.copy()
+            self._pooled += 1
+        if frame.get_bitsize() == 8:
+            # Night mode of the palette renderer swaps the palette
+            frame.set_palette(surface.get_palette())
+        frame.blit(surface, (0, 0))
+        self._queue.put(('frame', frame))
+
+    def _end_episode(self, state, terminated):
+        """Decide whether the episode's video is kept; the writer renames or deletes it"""
+        self.capturing = False
+        score = self.env.unwrapped.game.distance_meter.get_actual_distance(state['score'])
+        reasons = []
+        if self.every:
+            reasons.append("every")
+        if Config.VIDEO_BEST and (self.best_score is None or score > self.best_score):
+            reasons.append("best")
+        if terminated and Config.VIDEO_CRASH_SCORE is not None and score >= Config.VIDEO_CRASH_SCORE:
+            reasons.append("crash")
+        if self.best_score is None or score > self.best_score:
+            self.best_score = score
+        path = None
+        if reasons:
+            name = f"{self.prefix}_{self.episode:06d}_score{score}_{'-'.join(reasons)}.{self.extension}"
+            path = os.path.join(self.video_dir, name)
+        self._queue.put(('end', path))
+
+    def _write_loop(self):
+        writer = None
+        partial_path = os.path.join(self.video_dir, f".{self.prefix}_{os.getpid()}.partial.{self.extension}")
+        while True:
+            kind, payload = self._queue.get()
+            if kind == 'frame':
+                width, height = payload.get_size()
+                rgb = np.frombuffer(pygame.image.tobytes(payload, 'RGB'), dtype=np.uint8).reshape(height, width, 3)
+                self._free.put(payload)
+                scale = min(Config.VIDEO_WIDTH / width, 1.0)
+                # Even sizes for the codecs
+                size = (max(2, round(width * scale / 2) * 2), max(2, round(height * scale / 2) * 2))
+                if writer is None:
+                    fourcc = cv2.VideoWriter_fourcc(*('mp4v' if self.extension == 'mp4' else 'XVID'))
+                    writer = cv2.VideoWriter(partial_path, fourcc, self.fps, size)
+                frame = cv2.resize(rgb, size, interpolation=cv2.INTER_AREA)
+                writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+            elif kind == 'end':
+                if writer is not None:
+                    writer.release()
+                    writer = None
+                    if payload:
+                        os.replace(partial_path, payload)
+                        self.videos += 1
+                    else:
+                        os.remove(partial_path)
+            else:
+                break
+
+    def close(self):
+        if self.capturing:
+            self._end_episode(self.env.unwrapped.game.get_state(), terminated=False)
+        self._queue.put(('stop', None))
+        self._thread.join()
+        if self.videos or self.dropped_frames:
+            print(f"Videos: {self.videos} written to {self.video_dir}, {self.dropped_frames} frame(s) dropped")
+        return self.env.close()
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+from config import Config
+from ai.pygame_env import Game, FixedStepClock, game_observation, render_profile
+from ai.model import load_model
+from ai.population import symbolic_observations
+
+# Number of recent decisions used for the latency stats in the overlay
+STATS_WINDOW = 120
+
+class InferenceWorker(threading.Thread):
+    """
+    Runs policy inference on a background thread.
+    The game loop submits observations and polls for results without ever waiting.
+    Only the newest observation is kept: if a new one arrives before the previous
+    one was picked up, the previous request is dropped.
+    """
+
+    def __init__(self, model):
+        super().__init__(daemon=True)
+        self.model = model
+        self._cond = threading.Condition()
+        self._pending = None  # (request_id, obs, submit_time)
+        self._result = None   # (request_id, action, latency_ms)
+        self._stopped = False
+        self.dropped = 0
+
+    def submit(self, request_id, obs):
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (request_id, obs, time.perf_counter())
+            self._cond.notify()
+
+    def poll(self):
+        """Return the latest finished (request_id, action, latency_ms) or None"""
+        with self._cond:
+            result = self._result
+            self._result = None
+            return result
+
+    def wait(self, request_id):
+        """Block until request_id (or a newer one) is finished; used when the game runs faster than real time"""
+        with self._cond:
+            while (self._result is None or self._result[0] < request_id) and not self._stopped:
+                self._cond.wait()
+            result = self._result
+            self._result = None
+            return result
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                request_id, obs, submit_time = self._pending
+                self._pending = None
+
+            action, _ = self.model.predict(obs, deterministic=True)
+            latency_ms = (time.perf_counter() - submit_time) * 1000
+
+            with self._cond:
+                self._result = (request_id, int(action), latency_ms)
+                self._cond.notify_all()
+
+def watch(model_path, turbo=1):
+    """
+    Let a trained agent play the windowed game in real time.
+    turbo speeds the game up (0: as fast as possible, Tab cycles); faster than real time
+    every decision waits for its inference result instead of counting as late.
+    """
+    model = load_model(model_path)
+    # ES policies act on symbolic game state instead of stacked frames
+    symbolic = getattr(model, 'observation', 'pixels') == 'symbolic'
+
+    game = Game(human_mode=True, indexed=Config.INDEXED_RENDER, render_profile=render_profile())
+    game.turbo = turbo
+    step_clock = FixedStepClock()
+    worker = InferenceWorker(model)
+    worker.start()
+
+    # Same frame stacking as VecFrameStack: oldest frame first, newest in the last channel
+    stack = np.zeros((Config.TARGET_HEIGHT, Config.TARGET_WIDTH, Config.FRAME_STACK), dtype=np.uint8)
+
+    latencies = deque(maxlen=STATS_WINDOW)
+    frame_times = deque(maxlen=STATS_WINDOW)
+    late = 0
+    decisions = 0
+    episodes = 0
+
+    tick = 0
+    action = 0
+    next_request_id = 0
+    episode_first_request = 0
+    outstanding = False
+
+    def start_episode():
+        # Mirror DinoPygameEnv.reset: restart and jump to start
+        stack.fill(0)
+        game.restart()
+        game.step(1, present=False)
+
+    start_episode()
+
+    running = True
+    try:
+        while running:
+            running = game.handle_events(keyboard=False)
+
+            # Game ticks due in this window frame (several in turbo mode), one redraw after them
+            for _ in step_clock.ticks(game.turbo):
+                if tick % Config.FRAME_SKIP == 0:
+                    if outstanding and game.turbo != 1:
+                        result = worker.wait(next_request_id - 1)
+                    else:
+                        result = worker.poll()
+                    if result is not None and result[0] >= episode_first_request:
+                        action = result[1]
+                        latencies.append(result[2])
+                        outstanding = False
+                    elif outstanding:
+                        # Inference missed its frame budget: keep acting on the last action
+                        late += 1
+
+                    if symbolic:
+                        worker.submit(next_request_id, symbolic_observations(game)[0])
+                    else:
+                        stack[..., :-1] = stack[..., 1:]
+                        stack[..., -1] = game_observation(game)[..., 0]
+                        worker.submit(next_request_id, stack.copy())
+                    next_request_id += 1
+                    decisions += 1
+                    outstanding = True
+
+                state = game.step(action, present=False)
+                tick += 1
+
+                if state['crashed']:
+                    episodes += 1
+                    print(f"Episode {episodes}: score {game.distance_meter.get_actual_distance(state['score'])}")
+                    episode_first_request = next_request_id
+                    outstanding = False
+                    action = 0
+                    tick = 0
+                    start_episode()
+
+            game.overlay_lines = _overlay_lines(latencies, frame_times, decisions, late, worker.dropped, episodes)
+            game.render_to_screen()
+            # Work time of the previous window frame, without the frame-rate wait
+            frame_times.append(step_clock.clock.get_rawtime())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+        pygame.quit()
+
+    print(f"Decisions: {decisions}, late: {late}, dropped: {worker.dropped}")
+
+def _overlay_lines(latencies, frame_times, decisions, late, dropped, episodes):
+    if latencies:
+        lat = np.asarray(latencies)
+        latency_line = (f"infer ms  avg {lat.mean():5.1f}  p95 {np.percentile(lat, 95):5.1f}  "
+                        f"max {lat.max():5.1f}")
+    else:
+        latency_line = "infer ms  --"
+    frame_line = f"frame ms  avg {np.mean(frame_times):5.1f}" if frame_times else "frame ms  --"
+    return [
+        latency_line,
+        frame_line,
+        f"decisions {decisions}  late {late}  dropped {dropped}  episodes {episodes}",
+    ]
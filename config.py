@@ -4,10 +4,59 @@ class Config:
     # --- Paths ---
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     
+    # --- Chrome Environment Config ---
+    # Any page running the Chrome dino Runner; a saved local copy works offline (file:///.../index.html)
+    GAME_URL = os.environ.get("DINO_GAME_URL", "chrome://dino")
+    CHROME_ARGS = ["--headless=new", "--mute-audio", "--disable-gpu", "--window-size=800,400"]
+    # Observation crop in game canvas pixels (the Runner canvas is 600x150)
+    ROI_LEFT = 0
+    ROI_TOP = 0
+    ROI_WIDTH = 600
+    ROI_HEIGHT = 150
+    CHROME_PAGES_PER_BROWSER = 8  # Game pages per browser in the pooled backend
+    CHROME_READY_TIMEOUT = 10.0  # Seconds to wait for a page to load or a game to start
+
     # --- Pygame Environment Config ---
     TARGET_WIDTH = 84
     TARGET_HEIGHT = 84
+    # Crop of the 600x150 game surface taken before downsampling (game pixels).
+    # The dino stands at x=50: e.g. CROP_LEFT = 40, CROP_WIDTH = 360 keeps a 350px window ahead
+    # of it and drops the area behind. TARGET_* need not be square (NatureCNN wants >= 36 per side).
+    CROP_LEFT = 0
+    CROP_TOP = 0
+    CROP_WIDTH = 600
+    CROP_HEIGHT = 150
     FRAME_STACK = 4
+    FRAME_SKIP = 4  # Game ticks per agent decision
+    COARSE_STEP = False  # Advance FRAME_SKIP ticks in one coarse Game.step (one draw per decision)
+    INDEXED_RENDER = False  # 8-bit palette frames: night is a palette swap, grayscale via lookup table
+    # Layers drawn into observations; physics and RNG are the same whichever are off
+    RENDER_CLOUDS = True
+    RENDER_NIGHT_SKY = True  # Moon and stars
+    RENDER_SCORE = True  # Score and high score digits
+    RENDER_INVERSION = True  # Day/night color inversion
+
+    # --- Start-State Sampling ---
+    # Share of episodes that skip the warm-up and start mid-run
+    WARM_START_PROB = 0.0
+    WARM_START_SPEED_RANGE = (8.0, 13.0)  # Start speed sampled uniformly from this range
+    WARM_START_OBSTACLE_X = 300  # Position of the first obstacle of a warm start
+
+    # --- Trajectory Dataset ---
+    DATASET_SHARD_SIZE = 50_000  # Steps per memory-mapped shard
+    DATASET_CHUNK_SIZE = 1024  # Steps buffered in memory before a background write
+
+    # --- Episode Log ---
+    EPISODE_LOG_BUFFER = 1024  # Episodes buffered in memory before an append to the column files
+    EPISODE_LOG_FLUSH_SECONDS = 60.0  # Flush at least this often
+
+    # --- Episode Videos (first training env, logs/videos) ---
+    VIDEO_EVERY = 0  # Record every Nth episode (0: off)
+    VIDEO_BEST = False  # Record episodes that set a new best score
+    VIDEO_CRASH_SCORE = None  # Record crashes at or above this score (None: off)
+    VIDEO_WIDTH = 300  # Frames are downscaled to this width on the writer thread
+    VIDEO_QUEUE_SIZE = 256  # Frames waiting for the writer; further frames are dropped
+    VIDEO_FORMAT = "mp4"  # mp4 or avi
 
     # --- PPO Hyperparameters ---
     N_ENVS = 1  # Start with 1 for Pygame stability
@@ -20,6 +69,55 @@ class Config:
     GAE_LAMBDA = 0.95
     TOTAL_TIMESTEPS = 1_000_000 
 
+    # --- IMPALA Actor-Learner ---
+    IMPALA_ACTORS = 4  # Actor processes, each with a CPU copy of the policy
+    IMPALA_ENVS_PER_ACTOR = 2
+    IMPALA_UNROLL = 64  # Steps per trajectory chunk
+    IMPALA_BATCH_CHUNKS = 8  # Chunks per learner update
+    IMPALA_QUEUE_SIZE = 16  # Chunks waiting for the learner before actors block
+    IMPALA_RHO_CLIP = 1.0  # V-trace importance weight clip (rho bar)
+    IMPALA_C_CLIP = 1.0  # V-trace trace cutting clip (c bar)
+    IMPALA_VF_COEF = 0.5
+    IMPALA_MAX_GRAD_NORM = 40.0
+    IMPALA_LOG_INTERVAL = 10  # Learner updates between log dumps
+
+    # --- DQN (double / dueling, n-step, prioritized replay) ---
+    DQN_BUFFER_SIZE = 100_000  # Frames kept in replay (one 84x84 frame per step, ~0.7 GB)
+    DQN_LEARNING_STARTS = 10_000  # Env steps collected before the first update
+    DQN_BATCH_SIZE = 32
+    DQN_LEARNING_RATE = 1e-4
+    DQN_TRAIN_FREQ = 4  # Env steps per gradient step
+    DQN_TARGET_UPDATE = 8_000  # Env steps between target network syncs
+    DQN_N_STEP = 3
+    DQN_DOUBLE = True
+    DQN_DUELING = True
+    DQN_EPS_START = 1.0
+    DQN_EPS_END = 0.01
+    DQN_EPS_FRACTION = 0.1  # Share of TOTAL_TIMESTEPS over which epsilon decays
+    DQN_PRIORITY_ALPHA = 0.6  # 0 = uniform replay
+    DQN_PRIORITY_BETA = 0.4  # Importance-sampling exponent, annealed to 1
+    DQN_PRIORITY_EPS = 1e-6
+    DQN_MAX_GRAD_NORM = 10.0
+    DQN_LOG_INTERVAL = 5_000  # Env steps between log dumps
+
+    # --- Evolution Strategies ---
+    ES_POPULATION = 64  # Perturbed policies per generation (antithetic pairs)
+    ES_SIGMA = 0.05  # Perturbation scale
+    ES_LEARNING_RATE = 0.03
+    ES_WEIGHT_DECAY = 0.005
+    ES_GENERATIONS = 300
+    ES_EPISODES = 2  # Seeded courses per generation, the same for every policy
+    ES_MAX_DECISIONS = 5000  # Cap on the length of an evaluation episode
+    ES_HIDDEN = 32  # Hidden units of the MLP policy
+    ES_WORKERS = None  # Worker processes (None: one per CPU)
+    ES_SEED = 0
+    ES_CHECKPOINT_EVERY = 25  # Generations between checkpoints
+
+    # --- Behavior Cloning Warm Start ---
+    BC_EPOCHS = 5
+    BC_BATCH_SIZE = 256
+    BC_LEARNING_RATE = 1e-4
+
     # --- Rewards ---
     REWARD_ALIVE = 0.1
     REWARD_VELOCITY_MULTIPLIER = 0.02
@@ -4,7 +4,10 @@ Chrome Dino Clone - Точная копия физики оригинально
 import pygame
 import random
 import math
+import bisect
+import functools
 import os
+import numpy as np
 
 # Инициализация pygame
 pygame.init()
@@ -63,6 +66,83 @@ COLOR_BG_NIGHT = (32, 33, 36)  # Тёмно-серый для ночи
 COLOR_TEXT = (83, 83, 83)
 COLOR_TEXT_NIGHT = (172, 172, 172)
 
+# ============================================================================
+# ПАЛИТРОВЫЙ РЕЖИМ (8 БИТ)
+# ============================================================================
+
+# Игра монохромная: в палитровом режиме кадр рисуется индексами, а день и ночь -
+# это две палитры, которые применяются только при выводе (инверсия бесплатна).
+# Индексы от PALETTE_FIRST_GRAY до 255 - уровни серого дневных спрайтов.
+PALETTE_TRANSPARENT = 0  # colorkey спрайтов
+PALETTE_BG = 1  # фон
+PALETTE_SKY = 2  # луна и звёзды (прозрачность - через цвет в палитре)
+PALETTE_FIRST_GRAY = 3
+
+# Рабочая палитра всех 8-битных поверхностей: все цвета различны,
+# поэтому блиты между ними копируют индексы без пересчёта
+BASE_PALETTE = [(255, 0, 255), (0, 255, 0), (0, 0, 255)] + [(i, i, i) for i in range(PALETTE_FIRST_GRAY, 256)]
+
+DAY_PALETTE = np.array([(i, i, i) for i in range(256)], dtype=np.uint8)
+DAY_PALETTE[PALETTE_BG] = COLOR_BG
+DAY_PALETTE[PALETTE_SKY] = COLOR_BG
+
+# Ночь - инверсия серого, как у invert_surface
+NIGHT_PALETTE = 255 - DAY_PALETTE
+NIGHT_PALETTE[PALETTE_BG] = COLOR_BG_NIGHT
+NIGHT_PALETTE[PALETTE_SKY] = COLOR_BG_NIGHT
+
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
+def gray_lut(palette):
+    """Таблица индекс -> уровень серого (веса как у cv2.COLOR_RGB2GRAY)"""
+    return (palette @ GRAY_WEIGHTS + 0.5).astype(np.uint8)
+
+def to_indexed(surface, background=None):
+    """
+    Перевод RGB(A) поверхности в 8-битную с рабочей палитрой.
+    Прозрачные пиксели (и пиксели цвета background) становятся colorkey.
+    """
+    rgb = pygame.surfarray.array3d(surface)
+    indices = np.maximum(gray_lut(rgb.reshape(-1, 3)).reshape(rgb.shape[:2]), PALETTE_FIRST_GRAY)
+    if surface.get_flags() & pygame.SRCALPHA:
+        indices[pygame.surfarray.array_alpha(surface) < 128] = PALETTE_TRANSPARENT
+    if background is not None:
+        indices[(rgb == background).all(axis=2)] = PALETTE_TRANSPARENT
+    
+    indexed = pygame.Surface(surface.get_size(), 0, 8)
+    indexed.set_palette(BASE_PALETTE)
+    pygame.surfarray.blit_array(indexed, indices)
+    indexed.set_colorkey(BASE_PALETTE[PALETTE_TRANSPARENT])
+    return indexed
+
+_text_cache = {}
+
+def render_text(font, text, color, surface, alpha=None):
+    """
+    Текст для отрисовки на surface: обычный RGBA или 8-битный для палитрового режима.
+    Кэшируется: счёт меняется раз в несколько кадров, а рисуется каждый кадр
+    """
+    indexed = surface.get_bitsize() == 8
+    key = (font, text, color, alpha, indexed)
+    text_surface = _text_cache.get(key)
+    if text_surface is not None:
+        return text_surface
+    
+    if not indexed:
+        text_surface = font.render(text, True, color)
+        if alpha is not None:
+            text_surface.set_alpha(alpha)
+    else:
+        if alpha is not None:
+            # Смешивания с 8-битным кадром нет: прозрачность заранее смешана с фоном
+            color = tuple(round(c * alpha / 255 + b * (1 - alpha / 255)) for c, b in zip(color, COLOR_BG))
+        text_surface = to_indexed(font.render(text, True, color, COLOR_BG), COLOR_BG)
+    
+    if len(_text_cache) > 256:
+        _text_cache.clear()
+    _text_cache[key] = text_surface
+    return text_surface
+
 def invert_surface(surface):
     """Инвертирует цвета surface, сохраняя альфа-канал (быстрый метод)"""
     # Создаём копию с альфа-каналом
@@ -83,6 +163,26 @@ def invert_surface(surface):
     
     return inv
 
+# ============================================================================
+# ПРОФИЛЬ ОТРИСОВКИ
+# ============================================================================
+
+class RenderProfile:
+    """
+    Какие слои рисовать. Слои-отвлекатели для агента можно отключить по одному:
+    обновление игры (физика, генераторы случайных чисел, таймеры) не меняется.
+    """
+    def __init__(self, clouds=True, night_sky=True, score=True, inversion=True):
+        self.clouds = clouds  # облака
+        self.night_sky = night_sky  # луна и звёзды
+        self.score = score  # счёт и рекорд
+        self.inversion = inversion  # смена дня и ночи
+    
+    @classmethod
+    def minimal(cls):
+        """Только земля, препятствия и дино"""
+        return cls(clouds=False, night_sky=False, score=False, inversion=False)
+
 # ============================================================================
 # ЗАГРУЗКА РЕСУРСОВ
 # ============================================================================
@@ -117,6 +217,15 @@ class Assets:
         if self._loaded:
             return
         
+        self.load_sprites()
+        
+        # Создаём инвертированные версии для ночного режима
+        self._create_inverted_sprites()
+        
+        self._loaded = True
+    
+    def load_sprites(self):
+        """Загрузка дневных спрайтов"""
         # Дино спрайты - масштабируем до оригинальных размеров Chrome
         # Оригинал: 44x47, duck: 59x25
         self.dino_run = [
@@ -157,11 +266,6 @@ class Assets:
         # UI
         self.game_over = load_image("Other/GameOver.png", (191, 11))
         self.reset = load_image("Other/Reset.png", (36, 32))
-        
-        # Создаём инвертированные версии для ночного режима
-        self._create_inverted_sprites()
-        
-        self._loaded = True
     
     def _create_inverted_sprites(self):
         """Создание инвертированных версий спрайтов для ночного режима"""
@@ -179,6 +283,28 @@ class Assets:
         self.track_inv = invert_surface(self.track)
         self.reset_inv = invert_surface(self.reset)
 
+class IndexedAssets(Assets):
+    """Спрайты для палитрового режима: 8 бит, без инвертированных копий"""
+    _instance = None
+    
+    def load(self):
+        if self._loaded:
+            return
+        
+        self.load_sprites()
+        for name, value in list(vars(self).items()):
+            if isinstance(value, list):
+                indexed = [to_indexed(s) for s in value]
+            elif isinstance(value, pygame.Surface):
+                indexed = to_indexed(value)
+            else:
+                continue
+            setattr(self, name, indexed)
+            # Ночь - смена палитры, поэтому "инвертированный" спрайт - тот же самый
+            setattr(self, name + '_inv', indexed)
+        
+        self._loaded = True
+
 # ============================================================================
 # COLLISION BOX
 # ============================================================================
@@ -198,6 +324,14 @@ def box_compare(box1, box2):
             box1.y < box2.y + box2.height and
             box1.y + box1.height > box2.y)
 
+def drop_removed(items):
+    """Удаление помеченных remove элементов на месте: список не пересоздаётся каждый кадр"""
+    i = len(items)
+    while i:
+        i -= 1
+        if items[i].remove:
+            del items[i]
+
 def create_adjusted_collision_box(box, adjustment):
     """Создание скорректированного collision box"""
     return CollisionBox(
@@ -238,6 +372,15 @@ class Trex:
         RUNNING = 'RUNNING'
         WAITING = 'WAITING'
     
+    # Длительность кадра анимации по статусу (мс)
+    ANIM_SPEED = {
+        Status.WAITING: 1000 / 3,
+        Status.RUNNING: 1000 / 12,
+        Status.CRASHED: 1000 / 60,
+        Status.JUMPING: 1000 / 60,
+        Status.DUCKING: 1000 / 8
+    }
+    
     def __init__(self, assets):
         self.assets = assets
         self.x_pos = 0
@@ -361,15 +504,7 @@ class Trex:
                 self.set_blink_delay()
         
         # Анимация
-        anim_speed = {
-            self.Status.WAITING: 1000 / 3,
-            self.Status.RUNNING: 1000 / 12,
-            self.Status.CRASHED: 1000 / 60,
-            self.Status.JUMPING: 1000 / 60,
-            self.Status.DUCKING: 1000 / 8
-        }
-        
-        ms_per_frame = anim_speed.get(self.status, MS_PER_FRAME)
+        ms_per_frame = self.ANIM_SPEED.get(self.status, MS_PER_FRAME)
         
         if self.timer >= ms_per_frame:
             if self.status == self.Status.RUNNING:
@@ -479,14 +614,70 @@ OBSTACLE_TYPES = [
 
 MAX_GAP_COEFFICIENT = 1.5
 
+OBSTACLE_INDEX = {obstacle_type.name: i for i, obstacle_type in enumerate(OBSTACLE_TYPES)}
+
+# Границы скоростных диапазонов: в пределах диапазона набор допустимых по min_speed типов не меняется
+OBSTACLE_SPEED_BRACKETS = sorted({obstacle_type.min_speed for obstacle_type in OBSTACLE_TYPES})
+
+def speed_bracket(speed):
+    """Индекс скоростного диапазона для выбора типа препятствия"""
+    return bisect.bisect_right(OBSTACLE_SPEED_BRACKETS, speed) - 1
+
+def build_obstacle_choices():
+    """
+    Таблицы выбора типа без отбраковки: (скоростной диапазон, заблокированный тип или None) ->
+    индексы типов, которые допускают и min_speed, и проверка повторов
+    """
+    choices = {}
+    for bracket, bracket_speed in enumerate(OBSTACLE_SPEED_BRACKETS):
+        for blocked in [None] + list(range(len(OBSTACLE_TYPES))):
+            choices[bracket, blocked] = tuple(
+                i for i, obstacle_type in enumerate(OBSTACLE_TYPES)
+                if obstacle_type.min_speed <= bracket_speed and i != blocked
+            )
+    return choices
+
+OBSTACLE_CHOICES = build_obstacle_choices()
+
+class ObstacleCourse:
+    """
+    Трасса препятствий забега, заранее разложенная по seed: на каждое препятствие строка
+    равномерных чисел из [0, 1) (выбор типа, размер, высота, знак смещения скорости, промежуток).
+    Строки генерируются кусками по CHUNK_SIZE по мере надобности и хранятся в компактных массивах.
+    Зависящее от скорости (допустимые типы, размер группы, промежуток) считается при появлении препятствия,
+    поэтому один seed даёт одну и ту же трассу при любой скорости старта и любом шаге симуляции.
+    """
+    CHUNK_SIZE = 256
+    TYPE, SIZE, Y, OFFSET, GAP = range(5)
+    
+    def __init__(self, seed):
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self.chunks = []
+    
+    def row(self, index):
+        """Случайные числа препятствия с номером index (кортеж float)"""
+        chunk, offset = divmod(index, self.CHUNK_SIZE)
+        while len(self.chunks) <= chunk:
+            self.chunks.append(self.generator.random((self.CHUNK_SIZE, 5), dtype=np.float32))
+        return tuple(self.chunks[chunk][offset].tolist())
+
+@functools.lru_cache(maxsize=64)
+def obstacle_course(seed):
+    """Трасса по seed; игры с одинаковым seed делят одни и те же массивы"""
+    return ObstacleCourse(seed)
+
 class Obstacle:
     """Препятствие"""
     
-    def __init__(self, assets, type_config, dimensions, gap_coefficient, speed, opt_x_offset=0):
+    def __init__(self, assets, type_config, dimensions, gap_coefficient, speed, opt_x_offset=0, rng=random,
+                 draws=None):
+        """draws - строка ObstacleCourse: случайные числа берутся из неё, а не из rng"""
         self.assets = assets
         self.type_config = type_config
         self.gap_coefficient = gap_coefficient
-        self.size = random.randint(1, Config.MAX_OBSTACLE_LENGTH)
+        self.rng = rng
+        self.draws = draws
+        self.size = self.random_int(1, Config.MAX_OBSTACLE_LENGTH, ObstacleCourse.SIZE)
         self.dimensions = dimensions
         self.remove = False
         self.x_pos = dimensions['WIDTH'] + opt_x_offset
@@ -519,7 +710,11 @@ class Obstacle:
         
         # Y позиция (случайная для птеродактиля)
         if isinstance(self.type_config.y_pos, list):
-            self.y_pos = random.choice(self.type_config.y_pos)
+            if self.draws is None:
+                self.y_pos = self.rng.choice(self.type_config.y_pos)
+            else:
+                y_positions = self.type_config.y_pos
+                self.y_pos = y_positions[int(self.draws[ObstacleCourse.Y] * len(y_positions))]
         else:
             self.y_pos = self.type_config.y_pos
         
@@ -532,7 +727,8 @@ class Obstacle:
         
         # Случайное смещение скорости для птеродактиля
         if self.type_config.speed_offset:
-            self.speed_offset = (self.type_config.speed_offset if random.random() > 0.5 
+            offset_draw = self.rng.random() if self.draws is None else self.draws[ObstacleCourse.OFFSET]
+            self.speed_offset = (self.type_config.speed_offset if offset_draw > 0.5 
                                 else -self.type_config.speed_offset)
         
         self.gap = self.get_gap(self.gap_coefficient, speed)
@@ -541,7 +737,13 @@ class Obstacle:
         """Расчёт промежутка до следующего препятствия"""
         min_gap = round(self.width * speed + self.type_config.min_gap * gap_coefficient)
         max_gap = round(min_gap * MAX_GAP_COEFFICIENT)
-        return random.randint(min_gap, max_gap)
+        return self.random_int(min_gap, max_gap, ObstacleCourse.GAP)
+    
+    def random_int(self, low, high, column):
+        """Случайное целое из [low, high]: из строки трассы (столбец column) или из rng"""
+        if self.draws is None:
+            return self.rng.randint(low, high)
+        return low + int(self.draws[column] * (high - low + 1))
     
     def update(self, delta_time, speed):
         """Обновление позиции препятствия"""
@@ -592,13 +794,13 @@ class Cloud:
     MIN_SKY_LEVEL = 71
     MAX_SKY_LEVEL = 30
     
-    def __init__(self, assets, container_width):
+    def __init__(self, assets, container_width, rng=random):
         self.assets = assets
         self.container_width = container_width
         self.x_pos = container_width
-        self.y_pos = random.randint(self.MAX_SKY_LEVEL, self.MIN_SKY_LEVEL)
+        self.y_pos = rng.randint(self.MAX_SKY_LEVEL, self.MIN_SKY_LEVEL)
         self.remove = False
-        self.cloud_gap = random.randint(self.MIN_CLOUD_GAP, self.MAX_CLOUD_GAP)
+        self.cloud_gap = rng.randint(self.MIN_CLOUD_GAP, self.MAX_CLOUD_GAP)
     
     def update(self, speed):
         """Обновление позиции облака"""
@@ -628,8 +830,9 @@ class NightMode:
     STAR_MAX_Y = 70
     MOON_SPEED = 0.25
     
-    def __init__(self, container_width):
+    def __init__(self, container_width, rng=random):
         self.container_width = container_width
+        self.rng = rng
         self.x_pos = container_width - 50
         self.y_pos = 30
         self.current_phase = 0
@@ -638,8 +841,8 @@ class NightMode:
         self.draw_stars = False
         self.place_stars()
         
-        # Оптимизация: создаём поверхность один раз
-        self.night_surface = pygame.Surface((self.container_width, DEFAULT_HEIGHT), pygame.SRCALPHA)
+        # Оптимизация: поверхность создаётся один раз (при первой отрисовке)
+        self.night_surface = None
     
     def place_stars(self):
         """Размещение звёзд"""
@@ -647,8 +850,8 @@ class NightMode:
         self.stars = []
         for i in range(self.NUM_STARS):
             self.stars.append({
-                'x': random.randint(segment_size * i, segment_size * (i + 1)),
-                'y': random.randint(0, self.STAR_MAX_Y)
+                'x': self.rng.randint(segment_size * i, segment_size * (i + 1)),
+                'y': self.rng.randint(0, self.STAR_MAX_Y)
             })
     
     def update(self, activated):
@@ -686,6 +889,17 @@ class NightMode:
         if self.opacity <= 0:
             return
         
+        if surface.get_bitsize() == 8:
+            # Палитровый режим: прозрачность луны и звёзд - цвет PALETTE_SKY в ночной палитре
+            if self.draw_stars:
+                for star in self.stars:
+                    pygame.draw.circle(surface, PALETTE_SKY, (int(star['x']), star['y']), 2)
+            pygame.draw.circle(surface, PALETTE_SKY, (int(self.x_pos), self.y_pos), 10)
+            return
+        
+        if self.night_surface is None:
+            self.night_surface = pygame.Surface((self.container_width, DEFAULT_HEIGHT), pygame.SRCALPHA)
+        
         # Очистка поверхности (прозрачный цвет)
         self.night_surface.fill((0, 0, 0, 0))
         
@@ -752,19 +966,28 @@ class HorizonLine:
 class Horizon:
     """Управление фоном: земля, облака, препятствия"""
     
-    def __init__(self, assets, dimensions, gap_coefficient):
+    def __init__(self, assets, dimensions, gap_coefficient, rng=random, sky_rng=random):
         self.assets = assets
         self.dimensions = dimensions
         self.gap_coefficient = gap_coefficient
         
+        # Отдельные генераторы: препятствия (влияют на игру) и небо (только вид)
+        self.rng = rng
+        self.sky_rng = sky_rng
+        
         self.obstacles = []
         self.obstacle_history = []
+        # Трасса препятствий по seed (ObstacleCourse) и номер следующей строки; без трассы - числа из rng
+        self.course = None
+        self.course_index = 0
+        # Выбор типа с отбраковкой, как в оригинале (воспроизведение записей эпизодов версии 1)
+        self.legacy_selection = False
         self.clouds = []
         self.cloud_frequency = Config.CLOUD_FREQUENCY
         self.cloud_speed = Config.BG_CLOUD_SPEED
         
         self.horizon_line = HorizonLine(assets)
-        self.night_mode = NightMode(dimensions['WIDTH'])
+        self.night_mode = NightMode(dimensions['WIDTH'], sky_rng)
         
         self.running_time = 0
         
@@ -773,7 +996,7 @@ class Horizon:
     
     def add_cloud(self):
         """Добавление нового облака"""
-        self.clouds.append(Cloud(self.assets, self.dimensions['WIDTH']))
+        self.clouds.append(Cloud(self.assets, self.dimensions['WIDTH'], self.sky_rng))
     
     def update_clouds(self, delta_time, speed):
         """Обновление облаков"""
@@ -788,25 +1011,31 @@ class Horizon:
             # Добавление нового облака
             if (len(self.clouds) < Config.MAX_CLOUDS and
                 (self.dimensions['WIDTH'] - last_cloud.x_pos) > last_cloud.cloud_gap and
-                self.cloud_frequency > random.random()):
+                self.cloud_frequency > self.sky_rng.random()):
                 self.add_cloud()
             
             # Удаление невидимых облаков
-            self.clouds = [c for c in self.clouds if not c.remove]
+            drop_removed(self.clouds)
         else:
             self.add_cloud()
     
     def add_new_obstacle(self, speed):
         """Добавление нового препятствия"""
-        # Выбираем случайный тип
-        obstacle_type_index = random.randint(0, len(OBSTACLE_TYPES) - 1)
-        obstacle_type = OBSTACLE_TYPES[obstacle_type_index]
+        draws = None
+        if self.course is not None:
+            draws = self.course.row(self.course_index)
+            self.course_index += 1
         
-        # Проверка дупликатов и минимальной скорости
-        if (self.duplicate_obstacle_check(obstacle_type.name) or
-            speed < obstacle_type.min_speed):
-            self.add_new_obstacle(speed)
-            return
+        if self.legacy_selection:
+            obstacle_type = self.legacy_obstacle_type(speed)
+        else:
+            # Один розыгрыш среди допустимых типов вместо повторов с отбраковкой
+            choices = OBSTACLE_CHOICES[speed_bracket(speed), self.blocked_obstacle_type()]
+            if draws is None:
+                pick = self.rng.randrange(len(choices))
+            else:
+                pick = int(draws[ObstacleCourse.TYPE] * len(choices))
+            obstacle_type = OBSTACLE_TYPES[choices[pick]]
         
         obstacle = Obstacle(
             self.assets, 
@@ -814,7 +1043,9 @@ class Horizon:
             self.dimensions,
             self.gap_coefficient, 
             speed, 
-            obstacle_type.width
+            obstacle_type.width,
+            self.rng,
+            draws
         )
         self.obstacles.append(obstacle)
         self.obstacle_history.insert(0, obstacle_type.name)
@@ -822,6 +1053,34 @@ class Horizon:
         if len(self.obstacle_history) > 1:
             self.obstacle_history = self.obstacle_history[:Config.MAX_OBSTACLE_DUPLICATION]
     
+    def legacy_obstacle_type(self, speed):
+        """Случайный тип с отбраковкой по повторам и минимальной скорости (старый поток rng)"""
+        while True:
+            obstacle_type = OBSTACLE_TYPES[self.rng.randint(0, len(OBSTACLE_TYPES) - 1)]
+            if not (self.duplicate_obstacle_check(obstacle_type.name) or
+                    speed < obstacle_type.min_speed):
+                return obstacle_type
+    
+    def blocked_obstacle_type(self):
+        """Индекс типа, который сейчас нельзя повторить (то же, что duplicate_obstacle_check), или None"""
+        history = self.obstacle_history
+        if (history and len(history) >= Config.MAX_OBSTACLE_DUPLICATION and
+                history.count(history[0]) == len(history)):
+            return OBSTACLE_INDEX[history[0]]
+        return None
+    
+    def populate(self, speed, start_x):
+        """Заполнение экрана препятствиями начиная с start_x (старт с середины забега)"""
+        self.obstacles = []
+        x = start_x
+        while x < self.dimensions['WIDTH']:
+            if self.obstacles:
+                self.obstacles[-1].following_obstacle_created = True
+            self.add_new_obstacle(speed)
+            obstacle = self.obstacles[-1]
+            obstacle.x_pos = x
+            x += obstacle.width + obstacle.gap
+    
     def duplicate_obstacle_check(self, next_type):
         """Проверка на слишком частое повторение типа препятствия"""
         duplicate_count = 0
@@ -832,13 +1091,13 @@ class Horizon:
                 duplicate_count = 0
         return duplicate_count >= Config.MAX_OBSTACLE_DUPLICATION
     
-    def update_obstacles(self, delta_time, speed):
-        """Обновление препятствий"""
+    def update_obstacles(self, delta_time, speed, spawn_speed=None):
+        """Обновление препятствий (spawn_speed - скорость игры для нового препятствия, по умолчанию speed)"""
         for obstacle in self.obstacles:
             obstacle.update(delta_time, speed)
         
         # Удаление невидимых
-        self.obstacles = [o for o in self.obstacles if not o.remove]
+        drop_removed(self.obstacles)
         
         if self.obstacles:
             last_obstacle = self.obstacles[-1]
@@ -848,29 +1107,35 @@ class Horizon:
                 last_obstacle.is_visible() and
                 (last_obstacle.x_pos + last_obstacle.width + last_obstacle.gap) < 
                  self.dimensions['WIDTH']):
-                self.add_new_obstacle(speed)
+                self.add_new_obstacle(speed if spawn_speed is None else spawn_speed)
                 last_obstacle.following_obstacle_created = True
         else:
-            self.add_new_obstacle(speed)
+            self.add_new_obstacle(speed if spawn_speed is None else spawn_speed)
     
-    def update(self, delta_time, speed, update_obstacles, show_night_mode):
-        """Обновление всего горизонта"""
+    def update(self, delta_time, speed, update_obstacles, show_night_mode, frames=1, spawn_speed=None):
+        """
+        Обновление всего горизонта.
+        frames > 1 - грубый шаг: delta_time покрывает frames кадров, speed - средняя скорость за них,
+        spawn_speed - скорость последнего кадра (с ней создаётся новое препятствие)
+        """
         self.running_time += delta_time
         self.horizon_line.update(delta_time, speed)
-        self.night_mode.update(show_night_mode)
+        for _ in range(frames):
+            self.night_mode.update(show_night_mode)
         self.update_clouds(delta_time, speed)
         
         if update_obstacles:
-            self.update_obstacles(delta_time, speed)
+            self.update_obstacles(delta_time, speed, spawn_speed)
     
-    def draw(self, surface, inverted=False):
-        """Отрисовка горизонта"""
+    def draw(self, surface, inverted=False, clouds=True, night_sky=None):
+        """Отрисовка горизонта (night_sky - рисовать луну и звёзды, по умолчанию ночью)"""
         # Облака (на заднем плане)
-        for cloud in self.clouds:
-            cloud.draw(surface, inverted)
+        if clouds:
+            for cloud in self.clouds:
+                cloud.draw(surface, inverted)
         
         # Ночное небо (только в ночном режиме)
-        if inverted:
+        if inverted if night_sky is None else night_sky:
             self.night_mode.draw(surface)
         
         # Земля
@@ -884,8 +1149,11 @@ class Horizon:
         """Сброс горизонта"""
         self.obstacles = []
         self.obstacle_history = []
+        self.clouds = []
+        self.add_cloud()
         self.horizon_line.reset()
         self.night_mode.reset()
+        self.night_mode.place_stars()
 
 # ============================================================================
 # DISTANCE METER (СЧЁТ)
@@ -909,6 +1177,12 @@ class DistanceMeter:
         self.flash_timer = 0
         self.flash_iterations = 0
         
+        # Тексты счёта пересобираются только при изменении чисел
+        self.text_distance = None
+        self.score_text = ""
+        self.text_high_score = None
+        self.high_score_text = ""
+        
         # Шрифт
         self.font = pygame.font.Font(None, 24)
     
@@ -956,15 +1230,18 @@ class DistanceMeter:
         
         if paint:
             # Текущий счёт
-            score_text = str(self.current_distance).zfill(5)
-            text_surface = self.font.render(score_text, True, text_color)
+            if self.text_distance != self.current_distance:
+                self.text_distance = self.current_distance
+                self.score_text = str(self.current_distance).zfill(5)
+            text_surface = render_text(self.font, self.score_text, text_color, surface)
             surface.blit(text_surface, (self.x, self.y))
         
         # High score
         if self.high_score > 0:
-            hi_text = f"HI {str(self.high_score).zfill(5)}"
-            hi_surface = self.font.render(hi_text, True, text_color)
-            hi_surface.set_alpha(200)
+            if self.text_high_score != self.high_score:
+                self.text_high_score = self.high_score
+                self.high_score_text = f"HI {str(self.high_score).zfill(5)}"
+            hi_surface = render_text(self.font, self.high_score_text, text_color, surface, alpha=200)
             surface.blit(hi_surface, (self.x - 100, self.y))
     
     def reset(self):
@@ -991,7 +1268,7 @@ class GameOverPanel:
         text_color = COLOR_TEXT_NIGHT if inverted else COLOR_TEXT
         
         # Game Over текст (шрифтом для чёткости)
-        text = self.font.render("G A M E   O V E R", True, text_color)
+        text = render_text(self.font, "G A M E   O V E R", text_color, surface)
         go_x = (self.dimensions['WIDTH'] - text.get_width()) // 2
         go_y = (self.dimensions['HEIGHT'] - 25) // 3
         surface.blit(text, (go_x, go_y))
@@ -1007,43 +1284,42 @@ class GameOverPanel:
 # ============================================================================
 
 def check_for_collision(obstacle, trex):
-    """Проверка столкновения дино с препятствием"""
+    """Проверка столкновения дино с препятствием (боксы - локальные числа, без объектов на каждый кадр)"""
     # Внешний bounding box дино
-    trex_box = CollisionBox(
-        trex.x_pos + 1,
-        trex.y_pos + 1,
-        trex.config.WIDTH - 2,
-        trex.config.HEIGHT - 2
-    )
+    trex_x = trex.x_pos + 1
+    trex_y = trex.y_pos + 1
+    trex_width = trex.config.WIDTH - 2
+    trex_height = trex.config.HEIGHT - 2
     
     # Корректировка для duck
     if trex.ducking:
-        trex_box.height = trex.config.HEIGHT_DUCK - 2
-        trex_box.y = trex.y_pos + (trex.config.HEIGHT - trex.config.HEIGHT_DUCK) + 1
+        trex_height = trex.config.HEIGHT_DUCK - 2
+        trex_y = trex.y_pos + (trex.config.HEIGHT - trex.config.HEIGHT_DUCK) + 1
     
     # Внешний bounding box препятствия
-    obstacle_box = CollisionBox(
-        obstacle.x_pos + 1,
-        obstacle.y_pos + 1,
-        obstacle.type_config.width * obstacle.size - 2,
-        obstacle.type_config.height - 2
-    )
-    
-    # Грубая проверка
-    if box_compare(trex_box, obstacle_box):
+    obstacle_x = obstacle.x_pos + 1
+    obstacle_y = obstacle.y_pos + 1
+    obstacle_width = obstacle.type_config.width * obstacle.size - 2
+    obstacle_height = obstacle.type_config.height - 2
+    
+    # Грубая проверка (AABB)
+    if (trex_x < obstacle_x + obstacle_width and
+        trex_x + trex_width > obstacle_x and
+        trex_y < obstacle_y + obstacle_height and
+        trex_y + trex_height > obstacle_y):
         # Детальная проверка с collision boxes
         trex_collision_boxes = trex.get_collision_boxes()
         obstacle_collision_boxes = obstacle.collision_boxes
         
         for t_box in trex_collision_boxes:
             # Абсолютные координаты бокса дино
-            t_abs_x = t_box.x + trex_box.x
-            t_abs_y = t_box.y + trex_box.y
+            t_abs_x = t_box.x + trex_x
+            t_abs_y = t_box.y + trex_y
             
             for o_box in obstacle_collision_boxes:
                 # Абсолютные координаты бокса препятствия
-                o_abs_x = o_box.x + obstacle_box.x
-                o_abs_y = o_box.y + obstacle_box.y
+                o_abs_x = o_box.x + obstacle_x
+                o_abs_y = o_box.y + obstacle_y
                 
                 # Проверка пересечения (AABB)
                 if (t_abs_x < o_abs_x + o_box.width and
@@ -1054,6 +1330,75 @@ def check_for_collision(obstacle, trex):
     
     return False
 
+# ============================================================================
+# РАЗГОН (СВЯЗЬ СКОРОСТИ И ДИСТАНЦИИ)
+# ============================================================================
+
+def frames_to_max_speed():
+    """Количество кадров разгона от начальной до максимальной скорости"""
+    return math.ceil((Config.MAX_SPEED - Config.SPEED) / Config.ACCELERATION)
+
+def distance_after_frames(frames):
+    """Дистанция, пройденная за frames кадров с начала забега"""
+    accel_frames = min(frames, frames_to_max_speed())
+    distance = accel_frames * Config.SPEED + Config.ACCELERATION * accel_frames * (accel_frames - 1) / 2
+    return distance + (frames - accel_frames) * Config.MAX_SPEED
+
+def frames_for_distance(distance):
+    """Количество кадров, за которое пробегается дистанция distance"""
+    accel_frames = frames_to_max_speed()
+    accel_distance = distance_after_frames(accel_frames)
+    if distance >= accel_distance:
+        return accel_frames + math.ceil((distance - accel_distance) / Config.MAX_SPEED)
+    # Решение n*SPEED + ACCELERATION*n*(n-1)/2 = distance
+    a = Config.ACCELERATION / 2
+    b = Config.SPEED - a
+    return math.ceil((-b + math.sqrt(b * b + 4 * a * distance)) / (2 * a))
+
+def speed_after_frames(frames):
+    """Скорость игры после frames кадров с начала забега"""
+    return min(Config.MAX_SPEED, Config.SPEED + Config.ACCELERATION * frames)
+
+# ============================================================================
+# ФИКСИРОВАННЫЙ ШАГ ВРЕМЕНИ
+# ============================================================================
+
+# Режимы ускорения (Tab переключает по кругу); 0 - без ограничения скорости
+TURBO_SPEEDS = (1, 2, 8, 0)
+
+class FixedStepClock:
+    """
+    Накопитель времени: физика всегда идёт тиками по MS_PER_FRAME, а окно
+    перерисовывается не чаще FPS раз в секунду, сколько бы тиков ни пришлось на кадр.
+    speed - ускорение относительно реального времени, 0 - тики подряд без ожидания
+    (окно при этом перерисовывается по таймеру).
+    """
+    MAX_FRAME_MS = 250  # Более долгий кадр (подвисание) не догоняется
+    
+    def __init__(self, render_fps=FPS):
+        self.clock = pygame.time.Clock()
+        self.render_fps = render_fps
+        self.accumulator = 0.0
+    
+    def ticks(self, speed=1):
+        """Итератор по тикам физики одного кадра окна"""
+        if not speed:
+            # Без ограничения: тики идут, пока не пора показать кадр
+            self.clock.tick()
+            self.accumulator = 0.0
+            frame_end = pygame.time.get_ticks() + 1000 / self.render_fps
+            yield
+            while pygame.time.get_ticks() < frame_end:
+                yield
+            return
+        
+        # Ожидание до следующего кадра окна, затем тики за прошедшее время
+        elapsed = min(self.clock.tick(self.render_fps), self.MAX_FRAME_MS)
+        self.accumulator += elapsed * speed
+        while self.accumulator >= MS_PER_FRAME:
+            self.accumulator -= MS_PER_FRAME
+            yield
+
 # ============================================================================
 # ГЛАВНЫЙ КЛАСС ИГРЫ
 # ============================================================================
@@ -1061,7 +1406,14 @@ def check_for_collision(obstacle, trex):
 class Game:
     """Главный класс игры"""
     
-    def __init__(self, human_mode=True):
+    def __init__(self, human_mode=True, indexed=False, render_profile=None):
+        """
+        indexed - палитровый 8-битный кадр: ночь - смена палитры, наблюдения через таблицу серого
+        render_profile - RenderProfile с отключаемыми слоями (по умолчанию рисуется всё)
+        """
+        # Повторная инициализация безопасна (нужна, если pygame.quit() уже вызывался)
+        pygame.init()
+        
         # Размеры окна (пропорционально игровому полю 600x150)
         self.window_width = 900
         self.window_height = 225
@@ -1079,12 +1431,19 @@ class Game:
             self.screen = pygame.display.set_mode((self.window_width, self.window_height))
 
         # Игровая поверхность (логическое разрешение)
-        self.game_surface = pygame.Surface((DEFAULT_WIDTH, DEFAULT_HEIGHT))
+        self.render_profile = render_profile or RenderProfile()
+        self.indexed = indexed
+        if indexed:
+            self.game_surface = pygame.Surface((DEFAULT_WIDTH, DEFAULT_HEIGHT), 0, 8)
+            self.game_surface.set_palette(BASE_PALETTE)
+        else:
+            self.game_surface = pygame.Surface((DEFAULT_WIDTH, DEFAULT_HEIGHT))
         
         self.clock = pygame.time.Clock()
+        self.turbo = 1  # Ускорение в run(), см. TURBO_SPEEDS
         
         # Загрузка ресурсов
-        self.assets = Assets()
+        self.assets = IndexedAssets() if indexed else Assets()
         self.assets.load()
         
         # Состояние игры
@@ -1104,20 +1463,60 @@ class Game:
         self.invert_timer = 0
         self.invert_trigger = False
         
+        # Генераторы случайных чисел (seed() делает забег воспроизводимым)
+        self.rng = random.Random()
+        self.sky_rng = random.Random()
+        self.episode_seed = None
+        self.episode_start = (None, None, None)
+        
+        # Запись эпизодов: объекты с методами start_episode/record/end_episode
+        self.recorders = []
+        self.jump_held = False
+        
         # Игровые объекты
         self.trex = Trex(self.assets)
-        self.horizon = Horizon(self.assets, self.dimensions, Config.GAP_COEFFICIENT)
+        self.horizon = Horizon(self.assets, self.dimensions, Config.GAP_COEFFICIENT,
+                               self.rng, self.sky_rng)
         self.distance_meter = DistanceMeter(self.dimensions['WIDTH'])
         self.game_over_panel = None
+        
+        # Строки отладочного оверлея поверх окна (например, статистика агента)
+        self.overlay_lines = []
+        self.overlay_font = None
+        self.victory_font = None
 
-    def step(self, action):
+    def step(self, action, frames=1, present=True):
         """
         Выполнить один шаг игры (для агента)
         action: 0 - ничего, 1 - прыжок, 2 - присед
+        frames > 1 - грубый шаг: физика продвигается на frames кадров
+        (действие повторяется на каждом), отрисовка одна.
+        present=False - кадр рисуется только на игровую поверхность, окно не обновляется
+        state['frames'] - сколько кадров прошло на самом деле (меньше при столкновении)
         """
         # Фиксированный шаг времени (1/60 сек)
         delta_time = MS_PER_FRAME
 
+        self.apply_action(action)
+        
+        advanced = 0
+        if self.playing and not self.crashed and not self.won:
+            # Обновление логики
+            if frames > 1:
+                advanced = self.update_coarse(action, frames)
+            else:
+                self.update(delta_time)
+                advanced = 1
+
+        # Отрисовка
+        self.draw(present)
+
+        state = self.get_state()
+        state['frames'] = advanced
+        return state
+
+    def apply_action(self, action):
+        """Применение действия агента (0 - ничего, 1 - прыжок, 2 - присед)"""
         if not self.playing:
              if action == 1: # Jump to start
                 self.playing = True
@@ -1125,33 +1524,43 @@ class Game:
                 self.trex.start_jump(self.current_speed)
         
         if self.playing and not self.crashed and not self.won:
-            # Обработка действий агента
-            if action == 1: # Jump
-                if not self.trex.jumping and not self.trex.ducking:
-                    self.trex.start_jump(self.current_speed)
-            elif action == 2: # Duck
-                if self.trex.jumping:
-                    self.trex.set_speed_drop()
-                elif not self.trex.jumping:
-                    self.trex.set_duck(True)
-            else: # Nothing / Release Duck
-                 if self.trex.ducking:
-                     self.trex.set_duck(False)
-                 # Handle jump end (release space) logic if needed, 
-                 # but current jump logic handles duration internally somewhat.
-                 # Actually, end_jump is called on key UP. 
-                 # For agent, we might need to simulate holding key.
-                 # If action != 1 and jumping, call end_jump to allow variable height jumps?
-                 if self.trex.jumping:
-                     self.trex.end_jump()
-
-            # Обновление логики
-            self.update(delta_time)
-
-        # Отрисовка
-        self.draw()
-
-        return self.get_state()
+            self.control_trex(self.trex, action)
+    
+    def control_trex(self, trex, action):
+        """Действие агента для одного дино"""
+        # Обработка действий агента
+        if action == 1: # Jump
+            if not trex.jumping and not trex.ducking:
+                trex.start_jump(self.current_speed)
+        elif action == 2: # Duck
+            if trex.jumping:
+                trex.set_speed_drop()
+            elif not trex.ducking:
+                # set_duck(True) при уже активном приседе отменяет его
+                trex.set_duck(True)
+        else: # Nothing / Release Duck
+             if trex.ducking:
+                 trex.set_duck(False)
+             # Handle jump end (release space) logic if needed, 
+             # but current jump logic handles duration internally somewhat.
+             # Actually, end_jump is called on key UP. 
+             # For agent, we might need to simulate holding key.
+             # If action != 1 and jumping, call end_jump to allow variable height jumps?
+             if trex.jumping:
+                 trex.end_jump()
+    
+    def seed(self, seed, legacy_obstacles=False):
+        """
+        Фиксация генераторов случайных чисел для воспроизводимого забега.
+        Препятствия берутся из трассы obstacle_course(seed);
+        legacy_obstacles - старый поток rng с отбраковкой (записи эпизодов версии 1)
+        """
+        self.episode_seed = seed
+        self.rng.seed(seed)
+        self.sky_rng.seed(f"{seed}-sky")
+        self.horizon.course = None if legacy_obstacles else obstacle_course(seed)
+        self.horizon.course_index = 0
+        self.horizon.legacy_selection = legacy_obstacles
 
     def get_state(self):
         """Получить текущее состояние игры"""
@@ -1162,29 +1571,58 @@ class Game:
             "won": self.won
         }
 
-    def get_frame(self):
-        """Получить текущий кадр как numpy array"""
+    def get_frame(self, rect=None):
+        """Получить текущий кадр как numpy array (rect - (x, y, w, h) вырезаемой области)"""
         # Используем surfarray для быстрого доступа к пикселям game_surface
         # array3d возвращает (width, height, 3)
         # Нам нужно транспонировать для удобства (height, width, 3) если нужно, 
         # но обычно (W, H, C) это стандарт Pygame.
         # Gym обычно ждет (H, W, C).
-        frame = pygame.surfarray.array3d(self.game_surface)
+        if self.indexed:
+            return self.palette()[self.get_indices(rect)]
+        frame = pygame.surfarray.array3d(self.crop_surface(rect))
         return frame.swapaxes(0, 1) # (W, H, 3) -> (H, W, 3)
     
-    def handle_events(self):
-        """Обработка событий"""
+    def get_indices(self, rect=None):
+        """Индексы палитрового кадра (H, W)"""
+        return pygame.surfarray.array2d(self.crop_surface(rect)).T
+    
+    def get_gray_frame(self, rect=None):
+        """Кадр в оттенках серого (H, W); в палитровом режиме - прямо из индексов"""
+        if self.indexed:
+            return gray_lut(self.palette())[self.get_indices(rect)]
+        return (self.get_frame(rect) @ GRAY_WEIGHTS + 0.5).astype(np.uint8)
+    
+    def crop_surface(self, rect=None):
+        """Область игровой поверхности без копирования пикселей (вся поверхность при rect=None)"""
+        if rect is None:
+            return self.game_surface
+        return self.game_surface.subsurface(rect)
+    
+    def palette(self):
+        """Текущая палитра вывода (256, 3): день или ночь с прозрачностью луны и звёзд"""
+        if not self.show_night():
+            return DAY_PALETTE
+        palette = NIGHT_PALETTE.copy()
+        opacity = self.horizon.night_mode.opacity
+        palette[PALETTE_SKY] = [round(b + (255 - b) * opacity) for b in COLOR_BG_NIGHT]
+        return palette
+    
+    def handle_events(self, keyboard=True):
+        """Обработка событий (keyboard=False - клавиатура не управляет дино)"""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
             
             if event.type == pygame.VIDEORESIZE:
-                self.window_width = event.w
-                self.window_height = event.h
-                self.screen = pygame.display.set_mode(
-                    (self.window_width, self.window_height), 
-                    pygame.RESIZABLE
-                )
+                self.resize_window(event.w, event.h)
+            
+            # Ускорение переключается и при управлении агентом
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+                self.cycle_turbo()
+            
+            if not keyboard:
+                continue
             
             if event.type == pygame.KEYDOWN:
                 self.on_key_down(event)
@@ -1194,6 +1632,32 @@ class Game:
         
         return True
     
+    def cycle_turbo(self):
+        """Следующий режим ускорения из TURBO_SPEEDS"""
+        index = TURBO_SPEEDS.index(self.turbo) if self.turbo in TURBO_SPEEDS else -1
+        self.turbo = TURBO_SPEEDS[(index + 1) % len(TURBO_SPEEDS)]
+        if self.human_mode:
+            label = f"x{self.turbo}" if self.turbo else "max"
+            pygame.display.set_caption("Dino Runner" if self.turbo == 1 else f"Dino Runner ({label})")
+    
+    def resize_window(self, width, height):
+        """Изменение размера окна"""
+        self.window_width = width
+        self.window_height = height
+        self.screen = pygame.display.set_mode(
+            (self.window_width, self.window_height), 
+            pygame.RESIZABLE
+        )
+    
+    def poll_action(self):
+        """Текущее состояние клавиатуры как действие агента"""
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_DOWN]:
+            return 2
+        if keys[pygame.K_SPACE] or keys[pygame.K_UP]:
+            return 1
+        return 0
+    
     def on_key_down(self, event):
         """Обработка нажатия клавиши"""
         # Прыжок: пробел или стрелка вверх
@@ -1258,44 +1722,172 @@ class Game:
             if has_obstacles and self.horizon.obstacles:
                 collision = check_for_collision(self.horizon.obstacles[0], self.trex)
             
-            if not collision:
-                self.distance_ran += self.current_speed * delta_time / MS_PER_FRAME
-                
-                # Победа на 100000 очков
-                if self.distance_meter.get_actual_distance(self.distance_ran) >= 100000:
-                    self.victory()
-                
-                if self.current_speed < Config.MAX_SPEED:
-                    self.current_speed += Config.ACCELERATION
-            else:
-                self.game_over()
+            self.finish_tick(delta_time, collision)
+    
+    def finish_tick(self, delta_time, collision):
+        """Вторая половина кадра после сдвига мира: дистанция, скорость, счёт, ночной режим, анимация дино"""
+        if not collision:
+            self.distance_ran += self.current_speed * delta_time / MS_PER_FRAME
+            
+            # Победа на 100000 очков
+            if self.distance_meter.get_actual_distance(self.distance_ran) >= 100000:
+                self.victory()
             
-            # Обновление счётчика
-            play_sound, paint = self.distance_meter.update(
-                delta_time, 
+            if self.current_speed < Config.MAX_SPEED:
+                self.current_speed += Config.ACCELERATION
+        else:
+            self.game_over()
+        
+        # Обновление счётчика
+        play_sound, paint = self.distance_meter.update(
+            delta_time, 
+            math.ceil(self.distance_ran)
+        )
+        
+        # Ночной режим
+        if self.invert_timer > Config.INVERT_FADE_DURATION:
+            self.invert_timer = 0
+            self.invert_trigger = False
+            self.invert(reset=False)
+        elif self.invert_timer:
+            self.invert_timer += delta_time
+        else:
+            actual_distance = self.distance_meter.get_actual_distance(
                 math.ceil(self.distance_ran)
             )
+            if actual_distance > 0:
+                self.invert_trigger = (actual_distance % Config.INVERT_DISTANCE == 0)
+                
+                if self.invert_trigger and self.invert_timer == 0:
+                    self.invert_timer += delta_time
+                    self.invert(reset=False)
+        
+        # Обновление дино
+        self.trex.update(delta_time)
+    
+    def update_coarse(self, action, frames):
+        """
+        Грубый шаг: frames кадров физики за один проход по горизонту.
+        Дино, скорость и дистанция считаются покадрово (дёшево, только числа),
+        препятствия, земля и облака сдвигаются один раз на суммарный путь.
+        Столкновения: swept AABB по всему шагу отбрасывает препятствия, которых
+        дино не может коснуться, остальные проверяются на каждом промежуточном
+        кадре - быстрые препятствия не проскакивают сквозь дино.
+        Возвращает число пройденных кадров (меньше frames при столкновении).
+        """
+        delta_time = MS_PER_FRAME
+        has_obstacles = self.running_time + delta_time > Config.CLEAR_TIME
+        
+        # Начало фазы препятствий посреди шага или пустой горизонт - обычные кадры
+        if (has_obstacles != (self.running_time + frames * delta_time > Config.CLEAR_TIME) or
+                (has_obstacles and not self.horizon.obstacles)):
+            advanced = 0
+            for tick in range(frames):
+                if tick:
+                    self.apply_action(action)
+                self.update(delta_time)
+                advanced += 1
+                if not self.playing:
+                    break
+            return advanced
+        
+        candidates = self.swept_obstacles(action, frames) if has_obstacles else []
+        # Путь препятствия за кадр при скорости 1 (как в Obstacle.update)
+        frame_factor = FPS / 1000 * delta_time
+        
+        travelled = 0.0  # Сумма скоростей игры за пройденные кадры
+        advanced = 0
+        speeds = []
+        for tick in range(frames):
+            if tick:
+                self.apply_action(action)
+            if self.trex.jumping:
+                self.trex.update_jump(delta_time)
+            self.running_time += delta_time
+            travelled += self.current_speed
+            speeds.append(self.current_speed)
+            advanced += 1
             
-            # Ночной режим
-            if self.invert_timer > Config.INVERT_FADE_DURATION:
-                self.invert_timer = 0
-                self.invert_trigger = False
-                self.invert(reset=False)
-            elif self.invert_timer:
-                self.invert_timer += delta_time
-            else:
-                actual_distance = self.distance_meter.get_actual_distance(
-                    math.ceil(self.distance_ran)
-                )
-                if actual_distance > 0:
-                    self.invert_trigger = (actual_distance % Config.INVERT_DISTANCE == 0)
-                    
-                    if self.invert_trigger and self.invert_timer == 0:
-                        self.invert_timer += delta_time
-                        self.invert(reset=False)
+            # Как в update: проверяется только первое видимое препятствие
+            collision = False
+            for obstacle, x_pos, reachable in candidates:
+                x = x_pos - (travelled + advanced * obstacle.speed_offset) * frame_factor
+                if x + obstacle.width <= 0:
+                    continue
+                if reachable:
+                    obstacle.x_pos = x
+                    collision = check_for_collision(obstacle, self.trex)
+                    obstacle.x_pos = x_pos
+                break
             
-            # Обновление дино
-            self.trex.update(delta_time)
+            self.finish_tick(delta_time, collision)
+            if not self.playing:
+                break
+        
+        # Новое препятствие появляется на кадре, где последнее отошло на свой промежуток:
+        # горизонт сдвигается двумя частями, чтобы оно появилось и сдвинулось как покадрово
+        spawn_tick = self.spawn_tick(speeds) if has_obstacles else None
+        if spawn_tick is not None and spawn_tick < advanced - 1:
+            split = spawn_tick + 1
+            self.horizon.update(split * delta_time, sum(speeds[:split]) / split,
+                                has_obstacles, self.inverted, split, speeds[spawn_tick])
+            rest = advanced - split
+            self.horizon.update(rest * delta_time, sum(speeds[split:]) / rest,
+                                has_obstacles, self.inverted, rest)
+        else:
+            self.horizon.update(advanced * delta_time, travelled / advanced,
+                                has_obstacles, self.inverted, advanced, speeds[-1])
+        return advanced
+    
+    def spawn_tick(self, speeds):
+        """Кадр грубого шага (индекс в speeds), на котором появится следующее препятствие, или None"""
+        last_obstacle = self.horizon.obstacles[-1]
+        if last_obstacle.following_obstacle_created:
+            return None
+        frame_factor = FPS / 1000 * MS_PER_FRAME
+        spawn_x = self.dimensions['WIDTH'] - last_obstacle.width - last_obstacle.gap
+        travelled = 0.0
+        for tick, speed in enumerate(speeds):
+            travelled += speed
+            x = last_obstacle.x_pos - (travelled + (tick + 1) * last_obstacle.speed_offset) * frame_factor
+            # Ушло за экран раньше (горизонт опустел) или отошло на свой промежуток
+            if x + last_obstacle.width <= 0 or x < spawn_x:
+                return tick
+        return None
+    
+    def swept_obstacles(self, action, frames):
+        """
+        Препятствия, которые за frames кадров могут оказаться первыми у дино:
+        (препятствие, x в начале шага, пересекает ли его swept AABB область дино).
+        Пустой список, если ни одно не пересекает.
+        """
+        trex = self.trex
+        trex_left = trex.x_pos + 1
+        trex_right = trex.x_pos + trex.config.WIDTH - 1
+        # Без прыжка дино весь шаг на земле, иначе - любая высота
+        if trex.jumping or action == 1:
+            trex_top = -math.inf
+        else:
+            trex_top = trex.ground_y_pos + 1
+        
+        # Верхняя граница скорости за шаг
+        max_speed = min(self.current_speed + frames * Config.ACCELERATION, Config.MAX_SPEED)
+        
+        candidates = []
+        for obstacle in self.horizon.obstacles:
+            travel = frames * (max_speed + obstacle.speed_offset) * FPS / 1000 * MS_PER_FRAME
+            left = obstacle.x_pos - travel + 1
+            right = obstacle.x_pos + obstacle.width - 1
+            bottom = obstacle.y_pos + obstacle.type_config.height - 1
+            if left >= trex_right:
+                # Это и следующие препятствия не дотягиваются до дино
+                break
+            reachable = right > trex_left and bottom > trex_top
+            candidates.append((obstacle, obstacle.x_pos, reachable))
+        
+        if not any(reachable for _, _, reachable in candidates):
+            return []
+        return candidates
     
     def invert(self, reset=False):
         """Переключение ночного режима"""
@@ -1328,8 +1920,14 @@ class Game:
             self.highest_score = math.ceil(self.distance_ran)
             self.distance_meter.set_high_score(self.highest_score)
     
-    def restart(self):
-        """Перезапуск игры"""
+    def restart(self, start_speed=None, start_distance=None, obstacle_x=None):
+        """
+        Перезапуск игры.
+        start_speed / start_distance - старт с середины забега (без разминки):
+        скорость и дистанция согласованы с обычным разгоном, экран сразу
+        заполнен препятствиями начиная с obstacle_x.
+        """
+        self.episode_start = (start_speed, start_distance, obstacle_x)
         self.running_time = 0
         self.playing = True
         self.crashed = False
@@ -1343,37 +1941,75 @@ class Game:
         self.trex.init()
         
         self.invert(reset=True)
+        
+        if start_speed is not None or start_distance is not None:
+            self.warm_start(start_speed, start_distance, obstacle_x)
+    
+    def warm_start(self, start_speed=None, start_distance=None, obstacle_x=None):
+        """Перенос забега в точку с заданной скоростью или дистанцией"""
+        if start_distance is not None:
+            frames = frames_for_distance(start_distance)
+        else:
+            frames = math.ceil((min(start_speed, Config.MAX_SPEED) - Config.SPEED) / Config.ACCELERATION)
+        frames = max(frames, 0)
+        
+        self.current_speed = speed_after_frames(frames)
+        self.distance_ran = distance_after_frames(frames)
+        # Фаза без препятствий уже пройдена
+        self.running_time = max(frames * MS_PER_FRAME, Config.CLEAR_TIME + MS_PER_FRAME)
+        self.distance_meter.update(0, math.ceil(self.distance_ran))
+        
+        if obstacle_x is None:
+            obstacle_x = self.dimensions['WIDTH'] // 2
+        self.horizon.populate(self.current_speed, obstacle_x)
     
-    def draw(self):
-        """Отрисовка игры"""
+    def draw(self, present=True):
+        """Отрисовка игры (present=False - без вывода в окно)"""
+        profile = self.render_profile
+        night = self.show_night()
+        
         # Очистка игровой поверхности
-        bg_color = COLOR_BG_NIGHT if self.inverted else COLOR_BG
-        self.game_surface.fill(bg_color)
+        if self.indexed:
+            # Палитровый режим: всё рисуется дневными индексами, ночь - палитра при выводе
+            self.game_surface.fill(PALETTE_BG)
+            inverted = False
+        else:
+            bg_color = COLOR_BG_NIGHT if night else COLOR_BG
+            self.game_surface.fill(bg_color)
+            inverted = night
         
         # Отрисовка горизонта
-        self.horizon.draw(self.game_surface, self.inverted)
+        self.horizon.draw(self.game_surface, inverted, clouds=profile.clouds,
+                          night_sky=night and profile.night_sky)
         
         # Отрисовка дино
-        self.trex.draw(self.game_surface, self.inverted)
+        self.draw_trexes(inverted)
         
-        # Отрисовка счёта
+        # Отрисовка счёта (состояние вспышки обновляется и без отрисовки)
         _, paint = self.distance_meter.update(0, math.ceil(self.distance_ran))
-        self.distance_meter.draw(self.game_surface, paint, self.inverted)
+        if profile.score:
+            self.distance_meter.draw(self.game_surface, paint, inverted)
         
         # Game Over панель
         if self.crashed and self.game_over_panel:
-            self.game_over_panel.draw(self.game_surface, self.inverted)
+            self.game_over_panel.draw(self.game_surface, inverted)
         
         # Victory message
         if self.won:
-            font = pygame.font.Font(None, 48)
-            text_color = COLOR_TEXT_NIGHT if self.inverted else COLOR_TEXT
-            text = font.render("V I C T O R Y !", True, text_color)
+            if self.victory_font is None:
+                self.victory_font = pygame.font.Font(None, 48)
+            text_color = COLOR_TEXT_NIGHT if inverted else COLOR_TEXT
+            text = render_text(self.victory_font, "V I C T O R Y !", text_color, self.game_surface)
             text_rect = text.get_rect(center=(DEFAULT_WIDTH // 2, DEFAULT_HEIGHT // 2))
             self.game_surface.blit(text, text_rect)
         
         # Масштабирование на размер окна с сохранением пропорций
-        self.render_to_screen()
+        if present:
+            self.render_to_screen()
+    
+    def draw_trexes(self, inverted):
+        """Отрисовка дино на игровой поверхности"""
+        self.trex.draw(self.game_surface, inverted)
     
     def render_to_screen(self):
         """Масштабирование и центрирование игровой поверхности"""
@@ -1388,36 +2024,231 @@ class Game:
         
         # Масштабирование с качественной интерполяцией
         scaled_surface = pygame.transform.scale(self.game_surface, (new_width, new_height))
+        if self.indexed:
+            # Копия с палитрой вывода; палитра игровой поверхности не меняется
+            scaled_surface.set_palette([tuple(c) for c in self.palette()])
         
         # Центрирование
         x_offset = (self.window_width - new_width) // 2
         y_offset = (self.window_height - new_height) // 2
         
         # Очистка экрана и отрисовка
-        bg_color = (32, 33, 36) if self.inverted else (247, 247, 247)
+        bg_color = (32, 33, 36) if self.show_night() else (247, 247, 247)
         self.screen.fill(bg_color)
         self.screen.blit(scaled_surface, (x_offset, y_offset))
         
+        # Оверлей рисуется в разрешении окна, поэтому не попадает в наблюдения
+        if self.overlay_lines:
+            self.draw_overlay()
+        
         pygame.display.flip()
     
-    def run(self):
-        """Главный игровой цикл"""
+    def show_night(self):
+        """Рисуется ли ночь (режим ночи идёт в игре всегда, профиль может отключить его вид)"""
+        return self.inverted and self.render_profile.inversion
+    
+    def draw_overlay(self):
+        """Отрисовка строк оверлея в левом верхнем углу окна"""
+        if self.overlay_font is None:
+            self.overlay_font = pygame.font.Font(None, 20)
+        
+        text_color = COLOR_TEXT_NIGHT if self.show_night() else COLOR_TEXT
+        y = 4
+        for line in self.overlay_lines:
+            text_surface = self.overlay_font.render(line, True, text_color)
+            self.screen.blit(text_surface, (4, y))
+            y += text_surface.get_height()
+    
+    def run(self, turbo=1):
+        """
+        Главный игровой цикл: физика фиксированными тиками (FixedStepClock),
+        отрисовка - один раз за кадр окна. turbo - начальное ускорение (Tab переключает)
+        """
         running = True
+        self.turbo = turbo
+        step_clock = FixedStepClock()
         
         while running:
-            # Delta time в миллисекундах
-            delta_time = self.clock.tick(FPS)
-            
-            # Обработка событий
-            running = self.handle_events()
+            # Обработка событий (при записи ввод читается как действие агента в каждом тике,
+            # чтобы эпизод можно было точно воспроизвести)
+            running = self.handle_events(keyboard=not self.recorders)
             
-            # Обновление
-            self.update(delta_time)
+            # Обновление: столько тиков, сколько накопилось времени
+            for _ in step_clock.ticks(self.turbo):
+                if self.recorders:
+                    self.record_tick()
+                else:
+                    self.update(MS_PER_FRAME)
             
             # Отрисовка
             self.draw()
         
+        if self.recorders and self.playing:
+            for recorder in self.recorders:
+                recorder.end_episode(self)
+        
         pygame.quit()
+    
+    def record_tick(self):
+        """Один кадр игры человека в режиме записи"""
+        action = self.poll_action()
+        jump_pressed = action == 1 and not self.jump_held
+        self.jump_held = action == 1
+        
+        if not self.playing:
+            # Новый эпизод (и рестарт после game over) - по нажатию прыжка
+            if not jump_pressed:
+                return
+            self.seed(random.getrandbits(32))
+            self.restart()
+            for recorder in self.recorders:
+                recorder.start_episode(self)
+        
+        self.apply_action(action)
+        self.update(MS_PER_FRAME)
+        
+        state = self.get_state()
+        for recorder in self.recorders:
+            recorder.record(self, action, state)
+        
+        if not self.playing:
+            for recorder in self.recorders:
+                recorder.end_episode(self)
+
+# ============================================================================
+# ПОПУЛЯЦИЯ
+# ============================================================================
+
+class PopulationGame(Game):
+    """
+    Несколько дино на одной трассе. Горизонт (препятствия, облака, ночь, прокрутка),
+    скорость и дистанция считаются один раз за кадр, у каждого дино свои действия и момент смерти.
+    Забег идёт, пока жив хотя бы один. До своей смерти каждый дино проходит ровно то же,
+    что одиночная игра с тем же seed и теми же действиями.
+    """
+    
+    def __init__(self, population, human_mode=False, indexed=False, render_profile=None):
+        super().__init__(human_mode, indexed, render_profile)
+        self.trexes = [self.trex] + [Trex(self.assets) for _ in range(population - 1)]
+        self.alive = [True] * population
+        self.death_distance = [None] * population
+        self.death_speed = [None] * population
+        
+        # Общий фон кадров агентов (всё, кроме дино), см. draw_agents
+        self.world_surface = None
+        self.agent_view = False
+        self.trex_inverted = False
+    
+    @property
+    def population(self):
+        return len(self.trexes)
+    
+    def restart(self, start_speed=None, start_distance=None, obstacle_x=None):
+        super().restart(start_speed, start_distance, obstacle_x)
+        for trex in self.trexes[1:]:
+            trex.reset()
+            trex.init()
+        self.alive = [True] * self.population
+        self.death_distance = [None] * self.population
+        self.death_speed = [None] * self.population
+    
+    def step(self, actions, present=True):
+        """
+        Кадр для всех дино: actions - действие каждого (у выбывших не учитывается).
+        Грубого шага нет: столкновения каждого дино проверяются покадрово.
+        """
+        self.apply_actions(actions)
+        if self.playing and not self.crashed and not self.won:
+            self.update(MS_PER_FRAME)
+        self.draw(present)
+        return self.get_state()
+    
+    def apply_actions(self, actions):
+        if not self.playing and not self.crashed and not self.won and 1 in actions:
+            # Старт по прыжку, как в apply_action (прыгают те, чьё действие - прыжок)
+            self.playing = True
+            self.activated = True
+        if self.playing and not self.crashed and not self.won:
+            for trex, alive, action in zip(self.trexes, self.alive, actions):
+                if alive:
+                    self.control_trex(trex, action)
+    
+    def update(self, delta_time):
+        """Обновление: горизонт сдвигается один раз, столкновения - для каждого живого дино"""
+        if self.playing:
+            for trex, alive in zip(self.trexes, self.alive):
+                if alive and trex.jumping:
+                    trex.update_jump(delta_time)
+            
+            self.running_time += delta_time
+            has_obstacles = self.running_time > Config.CLEAR_TIME
+            
+            # Обновление горизонта
+            self.horizon.update(delta_time, self.current_speed, has_obstacles, self.inverted)
+            
+            # Как в одиночной игре: проверяется первое препятствие
+            if has_obstacles and self.horizon.obstacles:
+                obstacle = self.horizon.obstacles[0]
+                for i, trex in enumerate(self.trexes):
+                    if self.alive[i] and check_for_collision(obstacle, trex):
+                        self.alive[i] = False
+                        self.death_distance[i] = self.distance_ran
+                        self.death_speed[i] = self.current_speed
+                        trex.update(100, Trex.Status.CRASHED)
+            
+            # Game over, когда выбыли все
+            self.finish_tick(delta_time, not any(self.alive))
+    
+    def finish_tick(self, delta_time, collision):
+        super().finish_tick(delta_time, collision)
+        # Анимация остальных дино (первый обновляется в finish_tick)
+        for trex in self.trexes[1:]:
+            trex.update(delta_time)
+    
+    def scores(self):
+        """Дистанция каждого дино: до смерти или текущая у живых"""
+        return [self.distance_ran if d is None else d for d in self.death_distance]
+    
+    def get_state(self):
+        state = super().get_state()
+        state['alive'] = list(self.alive)
+        state['scores'] = self.scores()
+        return state
+    
+    def draw_trexes(self, inverted):
+        self.trex_inverted = inverted
+        if self.agent_view:
+            return
+        # В окне - все дино, живые поверх выбывших
+        for trex, alive in zip(self.trexes, self.alive):
+            if not alive:
+                trex.draw(self.game_surface, inverted)
+        for trex, alive in zip(self.trexes, self.alive):
+            if alive:
+                trex.draw(self.game_surface, inverted)
+    
+    def draw_agents(self):
+        """
+        Кадры агентов. Общий фон рисуется один раз, затем для каждого живого дино
+        копируется на игровую поверхность вместе с ним.
+        Генератор индексов: на каждой итерации game_surface - кадр этого агента,
+        такой же, как у одиночной игры.
+        """
+        self.agent_view = True
+        try:
+            self.draw(present=False)
+        finally:
+            self.agent_view = False
+        if self.world_surface is None:
+            self.world_surface = self.game_surface.copy()
+        else:
+            self.world_surface.blit(self.game_surface, (0, 0))
+        
+        for i, trex in enumerate(self.trexes):
+            if self.alive[i]:
+                self.game_surface.blit(self.world_surface, (0, 0))
+                trex.draw(self.game_surface, self.trex_inverted)
+                yield i
 
 # ============================================================================
 # ТОЧКА ВХОДА
@@ -12,23 +12,154 @@ def main():
 
     # Train Command
     train_parser = subparsers.add_parser("train", help="Start PPO training")
+    train_parser.add_argument("--init", metavar="MODEL", help="Initialize from a saved model (e.g. from pretrain)")
+
+    # DQN Command
+    dqn_parser = subparsers.add_parser("dqn", help="Start DQN training (double/dueling, n-step, prioritized replay)")
+    dqn_parser.add_argument("--init", metavar="MODEL", help="Initialize from a saved .pt Q-network")
+
+    # IMPALA Command
+    impala_parser = subparsers.add_parser("impala", help="Start actor-learner training with V-trace")
+    impala_parser.add_argument("--init", metavar="MODEL", help="Initialize from a saved model (e.g. from pretrain)")
+    impala_parser.add_argument("--actors", type=int, help="Actor processes (default IMPALA_ACTORS)")
+
+    # ES Command
+    es_parser = subparsers.add_parser("es", help="Start evolution strategies training on symbolic observations")
+    es_parser.add_argument("--init", metavar="MODEL", help="Continue from a saved .npz ES policy")
+    es_parser.add_argument("--workers", type=int, help="Worker processes (default ES_WORKERS or one per CPU)")
+
+    # Pretrain Command
+    pretrain_parser = subparsers.add_parser("pretrain", help="Behavior-clone the PPO actor on demonstrations")
+    pretrain_parser.add_argument("--data", required=True, metavar="DIR", help="Trajectory dataset directory")
+    pretrain_parser.add_argument("--epochs", type=int, help="Passes over the dataset")
+    pretrain_parser.add_argument("--out", help="Output model path")
+
+    # Sweep Command
+    sweep_parser = subparsers.add_parser("sweep", help="Run a parallel hyperparameter sweep")
+    sweep_parser.add_argument("spec", help="Path to a JSON sweep spec")
 
     # Play Command
     play_parser = subparsers.add_parser("play", help="Play the game manually")
+    play_parser.add_argument("--record", metavar="DIR", help="Record every episode (seed + actions) into DIR")
+    play_parser.add_argument("--dataset", metavar="DIR", help="Stream (obs, action, reward, done) into a dataset in DIR")
+
+    # Watch Command
+    watch_parser = subparsers.add_parser("watch", help="Watch a trained agent play in real time")
+    watch_parser.add_argument("model", help="Path to a saved PPO model (or a .pt DQN model, .npz ES policy)")
+    watch_parser.add_argument("--turbo", type=int, default=1, help="Game speed multiplier, 0 = as fast as possible (Tab cycles)")
+
+    # Evaluate Command
+    evaluate_parser = subparsers.add_parser("evaluate", help="Race saved models on the same seeded courses")
+    evaluate_parser.add_argument("models", nargs="+", help="Saved PPO models (or .pt DQN models, .npz ES policies)")
+    evaluate_parser.add_argument("--episodes", type=int, default=5, help="Number of courses")
+    evaluate_parser.add_argument("--seed", type=int, default=0, help="Seed of the first course")
+
+    # Expert Command
+    expert_parser = subparsers.add_parser("expert", help="Play episodes with the scripted expert")
+    expert_parser.add_argument("--episodes", type=int, default=10, help="Number of episodes")
+    expert_parser.add_argument("--dataset", metavar="DIR", help="Record demonstrations into a dataset in DIR")
+    expert_parser.add_argument("--record", metavar="DIR", help="Record episodes (seed + actions) into DIR")
+
+    # Replay Command
+    replay_parser = subparsers.add_parser("replay", help="Re-simulate a recorded episode")
+    replay_parser.add_argument("record", help="Path to a .drec episode record")
+    replay_parser.add_argument("--width", type=int, help="Window / video width")
+    replay_parser.add_argument("--height", type=int, help="Window / video height")
+    replay_parser.add_argument("--video", help="Export to a video file (.mp4 or .avi) instead of showing it")
+    replay_parser.add_argument("--turbo", type=int, default=1, help="Playback speed multiplier, 0 = as fast as possible (Tab cycles)")
+
+    # Coarse Check Command
+    coarse_parser = subparsers.add_parser("coarse-check", help="Compare coarse game steps against single ticks")
+    coarse_parser.add_argument("--episodes", type=int, default=50, help="Number of seeded courses")
+    coarse_parser.add_argument("--frames", type=int, help="Ticks per coarse step (default FRAME_SKIP)")
+    coarse_parser.add_argument("--seed", type=int, default=0, help="Seed of the course generator")
+
+    # Differential Check Command
+    diff_parser = subparsers.add_parser("diff-check", help="Check optimized engine paths against the reference Game")
+    diff_parser.add_argument("--candidates", nargs="+", help="Engine paths to check (default: all)")
+    diff_parser.add_argument("--episodes", type=int, default=1000, help="Number of seeded action sequences")
+    diff_parser.add_argument("--frames", type=int, help="Ticks per decision (default FRAME_SKIP)")
+    diff_parser.add_argument("--seed", type=int, default=0, help="Seed of the sequence generator")
+    diff_parser.add_argument("--expert-share", type=float, default=0.2, help="Fraction of episodes played by the scripted expert")
+    diff_parser.add_argument("--max-decisions", type=int, default=2000, help="Decisions per episode at most")
+    diff_parser.add_argument("--dump", metavar="DIR", help="Write the first divergence of each candidate as JSON into DIR")
+
+    # Allocation Check Command
+    alloc_parser = subparsers.add_parser("alloc-check", help="Check allocations per game/env step against budgets")
+    alloc_parser.add_argument("--steps", type=int, default=2000, help="Measured game ticks")
+    alloc_parser.add_argument("--seed", type=int, default=0, help="Seed of the courses")
 
     args = parser.parse_args()
 
     if args.command == "train":
         print("Initializing Training Sequence...")
         from ai.training import train
-        train()
+        train(init_model=args.init)
+    elif args.command == "dqn":
+        print("Initializing DQN Training...")
+        from ai.dqn import train_dqn
+        train_dqn(init_model=args.init)
+    elif args.command == "impala":
+        print("Initializing Actor-Learner Training...")
+        from ai.impala import train_impala
+        train_impala(init_model=args.init, n_actors=args.actors)
+    elif args.command == "es":
+        print("Initializing Evolution Strategies...")
+        from ai.es import train_es
+        train_es(init_model=args.init, n_workers=args.workers)
+    elif args.command == "pretrain":
+        print("Initializing Behavior Cloning...")
+        from ai.pretrain import pretrain
+        pretrain(args.data, epochs=args.epochs, out_path=args.out)
+    elif args.command == "sweep":
+        from ai.sweep import run_sweep
+        run_sweep(args.spec)
     elif args.command == "play":
         print("Launching Game for Human Play...")
         # Add dino-pygame to path so we can import main
         sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "dino-pygame"))
         from main import Game
         game = Game(human_mode=True)
+        if args.record:
+            from ai.recording import EpisodeRecorder
+            game.recorders.append(EpisodeRecorder(args.record))
+        if args.dataset:
+            from ai.dataset import TrajectoryWriter, HumanTrajectoryRecorder
+            dataset_recorder = HumanTrajectoryRecorder(TrajectoryWriter(args.dataset))
+            game.recorders.append(dataset_recorder)
         game.run()
+        if args.dataset:
+            dataset_recorder.close()
+    elif args.command == "watch":
+        print(f"Watching agent {args.model}...")
+        from ai.watch import watch
+        watch(args.model, turbo=args.turbo)
+    elif args.command == "evaluate":
+        from ai.model import load_model
+        from ai.population import evaluate_population
+        models = [load_model(path) for path in args.models]
+        scores = evaluate_population(models, args.episodes, seed=args.seed)
+        for path, model_scores in zip(args.models, scores):
+            print(f"{path}: mean {model_scores.mean():.0f}, scores {', '.join(f'{s:.0f}' for s in model_scores)}")
+    elif args.command == "expert":
+        from ai.expert import run_expert
+        run_expert(args.episodes, dataset_dir=args.dataset, record_dir=args.record)
+    elif args.command == "replay":
+        from ai.replay import replay
+        replay(args.record, args.width, args.height, args.video, turbo=args.turbo)
+    elif args.command == "coarse-check":
+        from ai.coarse_check import coarse_check
+        coarse_check(args.episodes, frames=args.frames, seed=args.seed)
+    elif args.command == "diff-check":
+        from ai.diff_check import diff_check
+        _, failures = diff_check(args.candidates, args.episodes, frames=args.frames, seed=args.seed,
+                                 expert_share=args.expert_share, max_decisions=args.max_decisions,
+                                 dump_dir=args.dump)
+        sys.exit(1 if failures else 0)
+    elif args.command == "alloc-check":
+        from ai.alloc_check import alloc_check
+        _, failures = alloc_check(args.steps, seed=args.seed)
+        sys.exit(1 if failures else 0)
     else:
         parser.print_help()
 
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Headless pygame, and the project root importable as in main.py
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,10 @@
+import pytest
+
+from config import Config
+from ai.alloc_check import alloc_check
+
+@pytest.mark.parametrize("indexed", [False, True], ids=["rgb", "indexed"])
+def test_hot_path_within_alloc_budgets(indexed, monkeypatch):
+    monkeypatch.setattr(Config, "INDEXED_RENDER", indexed)
+    _, failures = alloc_check(steps=1000, warmup=200)
+    assert not failures, "\n".join(failures)
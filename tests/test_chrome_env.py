@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("selenium")
+
+from config import Config
+
+# Local Runner page: no network, no chrome://dino
+FIXTURE_URL = "file://" + os.path.abspath(os.path.join(os.path.dirname(__file__), "fixtures", "runner.html"))
+
+@pytest.fixture(scope="module")
+def chrome():
+    from ai.browser_pool import create_driver
+    try:
+        create_driver().quit()
+    except Exception as e:
+        pytest.skip(f"Chrome is not available: {e}")
+
+@pytest.fixture
+def env(chrome, monkeypatch):
+    import ai.env
+    monkeypatch.setattr(Config, "GAME_URL", FIXTURE_URL)
+    # No startup stagger for a single private browser
+    monkeypatch.setattr(ai.env.random, "uniform", lambda low, high: 0.0)
+    env = ai.env.DinoChromeEnv()
+    yield env
+    env.close()
+
+def runner(env, expression):
+    return env._execute(f"return Runner.instance_.{expression};")
+
+def test_reset_starts_the_game(env):
+    obs, _ = env.reset()
+    assert obs.shape == (Config.TARGET_HEIGHT, Config.TARGET_WIDTH, 1)
+    assert runner(env, "playing")
+
+def test_step_dispatches_key_events(env):
+    env.reset()
+    env._execute("window.__keys = [];")
+
+    env.step(1)
+    assert env._execute("return window.__keys;") == [['keydown', 32], ['keyup', 32]]
+    assert runner(env, "jumping")
+
+    env._execute("window.__keys = [];")
+    env.step(2)
+    env.step(2)  # Duck stays held: no second keydown
+    assert env._execute("return window.__keys;") == [['keydown', 40]]
+    assert runner(env, "ducking")
+
+    env.step(0)
+    assert env._execute("return window.__keys.slice(-1);") == [['keyup', 40]]
+    assert not runner(env, "ducking")
+
+@pytest.mark.parametrize("roi_left, roi_width, expected", [
+    (0, 300, 'black'),
+    (300, 300, 'white'),
+    (0, 600, 'split'),
+])
+def test_observation_roi_scaling(env, monkeypatch, roi_left, roi_width, expected):
+    # The fixture canvas is drawn at 2x: black left half, transparent (white page) right half
+    monkeypatch.setattr(Config, "ROI_LEFT", roi_left)
+    monkeypatch.setattr(Config, "ROI_WIDTH", roi_width)
+    env.reset()
+    obs, _, _, _, _ = env.step(0)
+    obs = obs[..., 0].astype(np.int64)
+    middle = Config.TARGET_WIDTH // 2
+    if expected == 'black':
+        assert obs.max() < 10
+    elif expected == 'white':
+        assert obs.min() > 245
+    else:
+        assert obs[:, :middle - 2].max() < 10
+        assert obs[:, middle + 2:].min() > 245
+
+def test_crash_ends_episode_and_reset_restarts(env):
+    env.reset()
+    env._execute("Runner.instance_.distanceRan = 123; Runner.instance_.crashed = true;")
+    _, reward, terminated, _, info = env.step(0)
+    assert terminated
+    assert info['score'] == 123
+    assert reward == Config.REWARD_DEATH
+
+    env.reset()
+    assert runner(env, "restarts") == 1
+    assert runner(env, "playing") and not runner(env, "crashed")
+
+@pytest.fixture(params=['frames', 'windows'])
+def pooled_envs(request, chrome, monkeypatch):
+    import ai.browser_pool
+    from ai.env import DinoChromeEnv
+    monkeypatch.setattr(Config, "GAME_URL", FIXTURE_URL)
+    if request.param == 'frames':
+        # file:// pages are cross-origin to each other unless allowed: without it the pool falls back to windows
+        monkeypatch.setattr(Config, "CHROME_ARGS", Config.CHROME_ARGS + ["--allow-file-access-from-files"])
+    pool = ai.browser_pool.BrowserPool(pages_per_browser=2)
+    monkeypatch.setattr(ai.browser_pool, "_default_pool", pool)
+    envs = [DinoChromeEnv(pooled=True) for _ in range(2)]
+    yield request.param, envs
+    for env in envs:
+        env.close()
+    pool.close()
+
+def test_pooled_pages_step_independently(pooled_envs):
+    mode, (first, second) = pooled_envs
+    assert first.page.browser is second.page.browser
+    assert first.page.browser.framed == (mode == 'frames')
+    if mode == 'frames':
+        # Both games live in the host window: stepping either one needs no window switch
+        assert len(first.driver.window_handles) == 1
+
+    for env in (first, second):
+        env.reset()
+        env._execute("window.__keys = [];")
+    first.step(2)
+    second.step(1)
+    assert first._execute("return window.__keys;") == [['keydown', 40]]
+    assert second._execute("return window.__keys;") == [['keydown', 32], ['keyup', 32]]
+    assert runner(first, "ducking") and not runner(second, "ducking")
+
+    obs, _, _, _, _ = second.step(0)
+    assert obs[:, :Config.TARGET_WIDTH // 2 - 2].max() < 10
+
+    first._execute("Runner.instance_.crashed = true;")
+    assert first.step(0)[2] and not second.step(0)[2]
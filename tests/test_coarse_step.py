@@ -0,0 +1,11 @@
+import pytest
+
+from config import Config
+from ai.coarse_check import coarse_check
+
+@pytest.mark.parametrize("frames", [Config.FRAME_SKIP, 8])
+def test_coarse_step_matches_single_ticks(frames):
+    results, failures = coarse_check(episodes=8, frames=frames)
+    diverged = [r for r in results['coarse'] if r['divergence'] is not None]
+    assert not failures, (f"frames={frames} diverged in {len(diverged)} episode(s), first: seed {diverged[0]['seed']}, "
+                          f"tick {diverged[0]['divergence']['tick']}: {diverged[0]['divergence']['what']}")
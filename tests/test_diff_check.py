@@ -0,0 +1,10 @@
+import pytest
+
+from ai.diff_check import CANDIDATES, diff_check
+
+@pytest.mark.parametrize("name", list(CANDIDATES))
+def test_candidate_matches_reference(name):
+    results, failures = diff_check([name], episodes=50, max_decisions=800)
+    diverged = [r for r in results[name] if r['divergence'] is not None]
+    assert not failures, (f"{name} diverged in {len(diverged)} episode(s), first: seed {diverged[0]['seed']}, "
+                          f"tick {diverged[0]['divergence']['tick']}: {diverged[0]['divergence']['what']}")